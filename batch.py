@@ -0,0 +1,223 @@
+import json
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from capture import (
+    ChangeSampler, DirectorySource, ImageFileSource, VideoFileSource,
+    IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, CHANGE_THRESHOLD, default_chat_region
+)
+from engine import ConfidenceGate, MIN_LINE_CONFIDENCE, is_chat_message
+from normalize import cache_key, normalize_ocr_line
+from ocr import OCREngine, group_lines, rerecognize_line
+
+DEDUP_FRAMES = 3             # previous frames a repeated line is checked against
+
+# One OCR engine per worker process, created by the pool initializer
+_worker_ocr = None
+
+
+def _init_worker(use_gpu, torch_threads, languages):
+    global _worker_ocr
+    import torch
+    # Split the cores between workers instead of letting each grab all of them
+    torch.set_num_threads(torch_threads)
+    _worker_ocr = OCREngine(languages)
+    _worker_ocr.load(use_gpu)
+
+
+def _ocr_frame(image, min_confidence):
+    """(text, confidence) of the chat lines in a frame; doubtful lines are re-read once"""
+    messages = []
+    for line in group_lines(_worker_ocr.readtext(image)):
+        line = normalize_ocr_line(line)
+        if line.confidence < min_confidence:
+            line = normalize_ocr_line(rerecognize_line(_worker_ocr, image, line))
+        if is_chat_message(line.text):
+            messages.append((line.text, line.confidence))
+    return messages
+
+
+def default_worker_count(use_gpu):
+    # A single process saturates one GPU; on CPU scale with the cores
+    if use_gpu:
+        return 1
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def iter_sources(paths, sample_fps):
+    """Expand files and directories into capture sources"""
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(os.listdir(path))
+            for name in names:
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    yield VideoFileSource(os.path.join(path, name), sample_fps)
+            if any(name.lower().endswith(IMAGE_EXTENSIONS) for name in names):
+                yield DirectorySource(path)
+        elif path.lower().endswith(VIDEO_EXTENSIONS):
+            yield VideoFileSource(path, sample_fps)
+        else:
+            yield ImageFileSource(path)
+
+
+def crop_region(img, region):
+    """Slice a region out of an image without copying"""
+    if region is None:
+        return img
+    top, left = region['top'], region['left']
+    return img[top:top + region['height'], left:left + region['width']]
+
+
+class Transcript:
+    """Ordered chat lines deduplicated across overlapping frames"""
+
+    def __init__(self, frames=DEDUP_FRAMES):
+        self.entries = []
+        self.recent_frames = deque(maxlen=frames)   # Counter of cache keys per frame
+
+    def add_frame(self, frame_source, timestamp, messages):
+        """Add the lines of a frame that the previous frames did not already show
+
+        Lines match by exact cache key, so "rush A" and "rush B" stay two
+        messages. A key counts as seen as often as one of the last few
+        frames showed it: a message sent again while the first copy is
+        still on screen is kept, and a line OCR missed in one frame is not
+        added twice.
+        """
+        seen = Counter()
+        for keys in self.recent_frames:
+            seen |= keys
+        current = Counter()
+        added = []
+        for message in messages:
+            key = cache_key(message)
+            current[key] += 1
+            if current[key] <= seen[key]:
+                continue
+            entry = {'source': frame_source, 'timestamp': timestamp, 'original': message, 'translated': None,
+                     'translations': {}, 'error': None}
+            self.entries.append(entry)
+            added.append(entry)
+        self.recent_frames.append(current)
+        return added
+
+    def translate(self, translator, targets):
+        """Translate each distinct line once per target language
+
+        The first target fills 'translated'; all of them are in 'translations'.
+        """
+        texts = {}
+        for entry in self.entries:
+            texts.setdefault(cache_key(entry['original']), entry['original'])
+        results = {}
+        for dest in targets:
+            translated = translator.translate_batch(list(texts.values()), dest=dest) if texts else []
+            results[dest] = dict(zip(texts, translated))
+
+        for entry in self.entries:
+            key = cache_key(entry['original'])
+            entry['translations'] = {}
+            errors = []
+            for dest in targets:
+                result = results[dest][key]
+                if isinstance(result, Exception):
+                    errors.append(f"{dest}: {result}" if len(targets) > 1 else str(result))
+                else:
+                    entry['translations'][dest] = result
+            entry['translated'] = entry['translations'].get(targets[0])
+            entry['error'] = "; ".join(errors) or None
+
+    def write(self, path):
+        if path.lower().endswith('.jsonl'):
+            with open(path, 'w', encoding='utf-8') as f:
+                for entry in self.entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            return
+
+        with open(path, 'w', encoding='utf-8') as f:
+            for entry in self.entries:
+                minutes, seconds = divmod(int(entry['timestamp']), 60)
+                f.write(f"[{minutes:02d}:{seconds:02d}] {os.path.basename(entry['source'])}\n")
+                f.write(f"   Original: {entry['original']}\n")
+                if entry['error']:
+                    f.write(f"   Error:    {entry['error']}\n")
+                if len(entry['translations']) > 1:
+                    for dest, text in entry['translations'].items():
+                        f.write(f"   {dest.upper()}: {text}\n")
+                elif entry['translated'] is not None:
+                    f.write(f"   Translated: {entry['translated']}\n")
+
+
+class BatchProcessor:
+    """Offline OCR over screenshots and videos using a process pool"""
+
+    def __init__(self, workers=None, use_gpu=False, region=None, full_frame=False,
+                 sample_fps=4.0, change_threshold=CHANGE_THRESHOLD, min_confidence=MIN_LINE_CONFIDENCE, languages=None,
+                 progress=None):
+        self.use_gpu = use_gpu
+        self.languages = languages
+        self.workers = workers or default_worker_count(use_gpu)
+        self.region = region
+        self.full_frame = full_frame
+        self.sample_fps = sample_fps
+        self.change_threshold = change_threshold
+        self.min_confidence = min_confidence
+        self.progress = progress or (lambda message: None)
+
+    def chat_area(self, img):
+        if self.full_frame:
+            return img
+        if self.region:
+            return crop_region(img, self.region)
+        height, width = img.shape[:2]
+        return crop_region(img, default_chat_region({'width': width, 'height': height}))
+
+    def sampled_frames(self, paths):
+        for source in iter_sources(paths, self.sample_fps):
+            sampler = ChangeSampler(self.change_threshold)
+            for frame in source.frames():
+                chat = self.chat_area(frame.image)
+                if sampler.should_sample(chat):
+                    # Contiguous copy so only the chat area is pickled to the worker
+                    yield frame.source, frame.timestamp, np.ascontiguousarray(chat)
+
+    def run(self, paths, transcript=None):
+        """OCR all sampled frames in order and collect a deduplicated transcript"""
+        transcript = transcript or Transcript()
+        # Doubtful lines only make it into the transcript once a later frame agrees
+        gate = ConfidenceGate(self.min_confidence)
+        torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        pending = deque()
+        processed = 0
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.use_gpu, torch_threads, self.languages)
+        ) as pool:
+            def drain_one():
+                source, timestamp, future = pending.popleft()
+                gate.next_frame()
+                messages = [
+                    text for text, confidence in future.result()
+                    if gate.accepts(confidence) or gate.confirm(text)
+                ]
+                transcript.add_frame(source, timestamp, messages)
+
+            for source, timestamp, chat in self.sampled_frames(paths):
+                pending.append((source, timestamp, pool.submit(_ocr_frame, chat, self.min_confidence)))
+                # Bound the number of frames held in memory while preserving order
+                if len(pending) >= self.workers * 2:
+                    drain_one()
+                    processed += 1
+                    self.progress(f"{processed} frames processed, {len(transcript.entries)} lines")
+
+            while pending:
+                drain_one()
+                processed += 1
+
+        self.progress(f"{processed} frames processed, {len(transcript.entries)} lines")
+        return transcript
@@ -0,0 +1,236 @@
+import os
+import time
+from collections import namedtuple
+
+import cv2
+import mss
+import numpy as np
+
+from defaults import CHANGE_THRESHOLD
+
+# A single captured image plus where and when it came from. `regions` maps
+# region names to (view, region) when several regions share one grab; `seq`
+# is the frame's sequence number when it lives in a FrameRing.
+Frame = namedtuple('Frame', ['image', 'timestamp', 'source', 'regions', 'seq'], defaults=(None, None))
+
+PRIMARY_REGION = 'all_chat'
+REGION_NAMES = (PRIMARY_REGION, 'party_chat', 'banner')
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.webp')
+
+THUMBNAIL_WIDTH = 160
+
+
+def default_chat_region(monitor):
+    """Calculate the default VALORANT chatbox for a monitor"""
+    screen_width = monitor["width"]
+    screen_height = monitor["height"]
+
+    # Calculate chatbox dimensions
+    chatbox_width = round(screen_width * 0.236)
+    chatbox_height = round(screen_height * 0.21)
+    chatbox_top = round(screen_height * 0.79)
+
+    return {
+        "left": monitor.get("left", 0),
+        "top": monitor.get("top", 0) + chatbox_top,
+        "width": chatbox_width,
+        "height": chatbox_height
+    }
+
+
+def strip_alpha(img):
+    """Drop the alpha channel from a BGRA image"""
+    if img.ndim == 3 and img.shape[2] == 4:
+        return img[:, :, :3]
+    return img
+
+
+def load_image(path):
+    """Read an image file as a BGR array (handles non-ASCII paths)"""
+    data = np.fromfile(path, dtype=np.uint8)
+    img = cv2.imdecode(data, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError(f"Could not read image: {path}")
+    return img
+
+
+def union_region(regions):
+    """Smallest region covering all the given regions"""
+    left = min(region['left'] for region in regions)
+    top = min(region['top'] for region in regions)
+    right = max(region['left'] + region['width'] for region in regions)
+    bottom = max(region['top'] + region['height'] for region in regions)
+    return {"left": left, "top": top, "width": right - left, "height": bottom - top}
+
+
+def slice_region(img, outer, region):
+    """View of `region` inside an image captured at `outer` (no copy)"""
+    top = region['top'] - outer['top']
+    left = region['left'] - outer['left']
+    return img[top:top + region['height'], left:left + region['width']]
+
+
+class ChangeSampler:
+    """Keep only frames whose chat area visibly changed since the last kept frame"""
+
+    def __init__(self, threshold=CHANGE_THRESHOLD):
+        self.threshold = threshold
+        self.last_thumbnail = None
+
+    def thumbnail(self, img):
+        height, width = img.shape[:2]
+        scale = THUMBNAIL_WIDTH / max(width, 1)
+        small = cv2.resize(img, (THUMBNAIL_WIDTH, max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def should_sample(self, img):
+        thumbnail = self.thumbnail(img)
+        if self.last_thumbnail is None or self.last_thumbnail.shape != thumbnail.shape:
+            self.last_thumbnail = thumbnail
+            return True
+
+        difference = np.abs(thumbnail - self.last_thumbnail).mean()
+        if difference < self.threshold:
+            return False
+        self.last_thumbnail = thumbnail
+        return True
+
+
+def list_monitors():
+    """mss monitors; index 0 is the virtual screen spanning all of them"""
+    with mss.mss() as sct:
+        return list(sct.monitors)
+
+
+class ScreenCaptureSource:
+    """Grab frames from a screen region with mss
+
+    With a FrameRing the pixels are written straight into shared memory and
+    the frame's image is a view of its ring slot.
+    """
+
+    def __init__(self, region=None, monitor_index=1, ring=None):
+        self.region = region
+        self.monitor_index = monitor_index
+        self.monitor_info = None
+        self.ring = ring
+
+    def resolve_region(self):
+        """Return the capture region, falling back to the default chatbox"""
+        if self.region:
+            return self.region
+
+        with mss.mss() as sct:
+            self.monitor_info = sct.monitors[self.monitor_index]
+        self.region = default_chat_region(self.monitor_info)
+        return self.region
+
+    def grab(self):
+        """Capture a single frame"""
+        region = self.resolve_region()
+        # mss handles are thread-bound on Windows, so open one per grab
+        with mss.mss() as sct:
+            screenshot = sct.grab(region)
+        timestamp = time.time()
+        # Wrap mss' buffer instead of copying it
+        raw = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(screenshot.height, screenshot.width, 4)
+        img = strip_alpha(raw)
+        if self.ring is not None and self.ring.fits(img):
+            seq = self.ring.write(img, timestamp)
+            return Frame(self.ring.read(seq)[0], timestamp, 'screen', seq=seq)
+        return Frame(img, timestamp, 'screen')
+
+    def frames(self, interval=1.0, count=None):
+        """Yield frames every `interval` seconds, forever or `count` times"""
+        captured = 0
+        while count is None or captured < count:
+            started = time.monotonic()
+            yield self.grab()
+            captured += 1
+            remaining = interval - (time.monotonic() - started)
+            if remaining > 0 and (count is None or captured < count):
+                time.sleep(remaining)
+
+
+class MultiRegionCaptureSource(ScreenCaptureSource):
+    """Grab several named regions with one capture of their union"""
+
+    def __init__(self, regions, monitor_index=1, ring=None):
+        super().__init__(union_region(regions.values()), monitor_index, ring)
+        self.named_regions = dict(regions)
+
+    def grab(self):
+        frame = super().grab()
+        regions = {
+            name: (slice_region(frame.image, self.region, region), region)
+            for name, region in self.named_regions.items()
+        }
+        return frame._replace(regions=regions)
+
+
+def build_capture_source(regions, monitor_index=1, ring=None):
+    """Plain source for one region, union grab for several"""
+    if len(regions) == 1:
+        return ScreenCaptureSource(next(iter(regions.values())), monitor_index, ring)
+    return MultiRegionCaptureSource(regions, monitor_index, ring)
+
+
+class ImageFileSource:
+    """Read a single image file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def frames(self):
+        yield Frame(load_image(self.path), os.path.getmtime(self.path), self.path)
+
+
+class DirectorySource:
+    """Read every image in a directory in name order"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def list_files(self):
+        names = sorted(
+            name for name in os.listdir(self.path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        return [os.path.join(self.path, name) for name in names]
+
+    def frames(self):
+        for file_path in self.list_files():
+            yield Frame(load_image(file_path), os.path.getmtime(file_path), file_path)
+
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.webm', '.avi', '.mov')
+
+
+class VideoFileSource:
+    """Decode frames from a video file, `sample_fps` frames per second of footage"""
+
+    def __init__(self, path, sample_fps=4.0):
+        self.path = path
+        self.sample_fps = sample_fps
+
+    def frames(self):
+        video = cv2.VideoCapture(self.path)
+        if not video.isOpened():
+            raise ValueError(f"Could not open video: {self.path}")
+
+        try:
+            native_fps = video.get(cv2.CAP_PROP_FPS) or 30.0
+            step = max(1, round(native_fps / self.sample_fps))
+            index = 0
+            # grab() only demuxes; retrieve() pays for decoding the frames we keep
+            while video.grab():
+                if index % step == 0:
+                    ok, img = video.retrieve()
+                    if not ok:
+                        break
+                    timestamp = video.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                    yield Frame(img, timestamp, self.path)
+                index += 1
+        finally:
+            video.release()
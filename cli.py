@@ -0,0 +1,298 @@
+import argparse
+import json
+import multiprocessing
+import sys
+
+from batch import BatchProcessor, CHANGE_THRESHOLD
+from capture import (
+    ScreenCaptureSource, ImageFileSource, DirectorySource, build_capture_source, default_chat_region, PRIMARY_REGION
+)
+from capture import list_monitors
+from engine import TranslationEngine, JsonLinesSink, MIN_LINE_CONFIDENCE
+from glossary import load_glossary
+from governor import ResourceGovernor
+from line_cache import LineCache
+from memory_monitor import MemoryMonitor
+from ocr import OCREngine, check_cuda
+from ocr_scheduler import OCRScheduler
+from ocr_worker import IsolatedOCREngine
+from recognizer_router import DEFAULT_LANGUAGES, SUPPORTED_LANGUAGES
+from rate_limiter import RateLimiter
+from recorder import FrameRecorder, RecordingCaptureSource, ReplaySource
+from regions import localize_chat_region
+from tracker import LineTracker
+from translation import create_translator, parse_target_languages, DEFAULT_TARGET_LANGUAGE
+from translation_server import serve, DEFAULT_HOST, DEFAULT_PORT
+
+
+def parse_region(value):
+    """Parse LEFT,TOP,WIDTH,HEIGHT into an mss region dict"""
+    try:
+        left, top, width, height = (int(part) for part in value.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError("region must be LEFT,TOP,WIDTH,HEIGHT")
+    return {"left": left, "top": top, "width": width, "height": height}
+
+
+def parse_named_region(value):
+    """Parse NAME=LEFT,TOP,WIDTH,HEIGHT"""
+    name, sep, region = value.partition('=')
+    if not sep or not name:
+        raise argparse.ArgumentTypeError("region must be NAME=LEFT,TOP,WIDTH,HEIGHT")
+    return name, parse_region(region)
+
+
+def parse_languages(value):
+    """Parse a comma separated list of OCR language codes"""
+    languages = [code.strip() for code in value.split(',') if code.strip()]
+    unknown = [code for code in languages if code not in SUPPORTED_LANGUAGES]
+    if unknown or not languages:
+        raise argparse.ArgumentTypeError(f"languages must be among {','.join(SUPPORTED_LANGUAGES)}")
+    return languages
+
+
+def parse_dest(value):
+    targets = parse_target_languages(value)
+    if not targets:
+        raise argparse.ArgumentTypeError("at least one target language is required")
+    return targets
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Headless VALORANT chat OCR + translation. Results are streamed to stdout as JSON lines."
+    )
+    parser.add_argument('--dest', type=parse_dest, default=[DEFAULT_TARGET_LANGUAGE],
+                        help="target language code(s), comma separated: en,de,pt (default: en)")
+    parser.add_argument('--cpu', action='store_true', help="force CPU inference")
+    parser.add_argument('--no-tune', action='store_true', help="skip the startup OCR benchmark and use easyocr defaults")
+    parser.add_argument('--min-confidence', type=float, default=MIN_LINE_CONFIDENCE,
+                        help="OCR confidence below which lines are re-read or held until a later frame confirms them (0 disables)")
+    parser.add_argument('--no-track', action='store_true',
+                        help="live: translate every line of every capture instead of each chat line once, after it settles")
+    parser.add_argument('--isolated-ocr', action='store_true', help="run OCR in a separate, auto-restarted worker process")
+    parser.add_argument('--ocr-languages', type=parse_languages, default=DEFAULT_LANGUAGES,
+                        help=f"chat languages to read, recognizers load on first use ({','.join(SUPPORTED_LANGUAGES)}; default: en,ru)")
+    parser.add_argument('--line-cache', metavar='PATH',
+                        help="sqlite file remembering recognized line crops, so repeated lines skip recognition")
+    parser.add_argument('--tiered', action='store_true',
+                        help="write glossary drafts with each frame, then a 'refined' record per line when the backend answers")
+    parser.add_argument('--server', help="translation daemon URL, e.g. http://192.168.1.10:8765")
+    parser.add_argument('--rate-limit', type=float, metavar='PER_SECOND',
+                        help="cap upstream translation requests, newest lines first")
+    parser.add_argument('--memory-log', metavar='PATH',
+                        help="append periodic memory snapshots (RSS, threads, allocation growth) to this file")
+    parser.add_argument('--glossary', help="user glossary JSON merged over the bundled one")
+    parser.add_argument('--no-glossary', action='store_true', help="send every line to the translation backend")
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    image_parser = subparsers.add_parser('image', help="process a single image file")
+    image_parser.add_argument('path')
+
+    frames_parser = subparsers.add_parser('frames', help="process every image in a directory")
+    frames_parser.add_argument('path')
+
+    live_parser = subparsers.add_parser('live', help="capture a screen region continuously")
+    live_parser.add_argument('--region', type=parse_region, help="LEFT,TOP,WIDTH,HEIGHT (default: VALORANT chatbox)")
+    live_parser.add_argument('--monitor', type=int, default=1, help="mss monitor index for the default region")
+    live_parser.add_argument('--auto-region', action='store_true', help="detect the chat text extent before capturing")
+    live_parser.add_argument('--extra-region', type=parse_named_region, action='append', default=[],
+                             help="additional NAME=LEFT,TOP,WIDTH,HEIGHT region grabbed in the same capture (repeatable)")
+    live_parser.add_argument('--interval', type=float, default=1.0, help="seconds between captures")
+    live_parser.add_argument('--count', type=int, help="stop after this many captures")
+    live_parser.add_argument('--cpu-budget', type=float,
+                             help="percent of the machine's CPU to stay under; stretches the interval as needed")
+    live_parser.add_argument('--record', metavar='PATH', help="also save every captured frame to a recording for replay")
+
+    replay_parser = subparsers.add_parser('replay', help="run a recording made with live --record through the pipeline")
+    replay_parser.add_argument('path')
+    replay_parser.add_argument('--max-speed', action='store_true',
+                               help="process frames as fast as possible instead of at the recorded pace")
+
+    batch_parser = subparsers.add_parser('batch', help="translate chat from screenshot folders and video files offline")
+    batch_parser.add_argument('paths', nargs='+', help="image files, video files or directories")
+    batch_parser.add_argument('--output', '-o', required=True, help="transcript path (.jsonl for JSON lines, otherwise text)")
+    batch_parser.add_argument('--workers', type=int, help="OCR worker processes (default: half the cores, 1 on GPU)")
+    batch_parser.add_argument('--region', type=parse_region, help="chat area within each frame (default: VALORANT chatbox)")
+    batch_parser.add_argument('--full-frame', action='store_true', help="OCR whole frames instead of the chat area")
+    batch_parser.add_argument('--sample-fps', type=float, default=4.0, help="video frames per second checked for chat changes")
+    batch_parser.add_argument('--change-threshold', type=float, default=CHANGE_THRESHOLD,
+                              help="mean pixel difference that counts as a chat change")
+
+    serve_parser = subparsers.add_parser('serve', help="run the shared translation daemon")
+    serve_parser.add_argument('--host', default=DEFAULT_HOST, help="bind address (use 0.0.0.0 for LAN clients)")
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument('--cache-size', type=int, help="number of cached translations")
+    serve_parser.add_argument('--rate', type=float, help="upstream requests per second, shared by all clients")
+
+    return parser
+
+
+def build_source(args, ring=None):
+    if args.command == 'image':
+        return ImageFileSource(args.path), {}
+    if args.command == 'frames':
+        return DirectorySource(args.path), {}
+    if args.command == 'replay':
+        return ReplaySource(args.path, realtime=not args.max_speed, ring=ring), {}
+    if args.extra_region:
+        primary = args.region or default_chat_region(list_monitors()[args.monitor])
+        regions = {PRIMARY_REGION: primary, **dict(args.extra_region)}
+        source = build_capture_source(regions, monitor_index=args.monitor, ring=ring)
+    else:
+        source = ScreenCaptureSource(args.region, monitor_index=args.monitor, ring=ring)
+    if args.record:
+        source = RecordingCaptureSource(source, FrameRecorder(args.record))
+    return source, {'interval': args.interval, 'count': args.count}
+
+
+def build_rate_limiter(args):
+    return RateLimiter(args.rate_limit) if args.rate_limit else None
+
+
+def build_translator(args, limiter=None):
+    glossary = None if args.no_glossary else load_glossary(args.glossary)
+    return create_translator(args.server, glossary, limiter=limiter)
+
+
+def build_engine(args, sinks):
+    cuda_available, gpu_name = check_cuda()
+    if args.isolated_ocr:
+        ocr = IsolatedOCREngine(
+            tune=not args.no_tune,
+            on_status=lambda message, status: log(f"OCR worker: {message}"),
+            line_cache_path=args.line_cache
+        )
+        ocr.configure(languages=args.ocr_languages)
+        using_gpu = ocr.load(cuda_available and not args.cpu)
+        tuning = ocr.tuning
+    else:
+        ocr = OCREngine(args.ocr_languages, line_cache=LineCache(args.line_cache) if args.line_cache else None)
+        using_gpu = ocr.load(cuda_available and not args.cpu)
+        tuning = "defaults"
+        if not args.no_tune:
+            ocr.scheduler = OCRScheduler(ocr)
+            tuning = ocr.scheduler.calibrate()
+    log(f"OCR ready ({gpu_name if using_gpu else 'CPU'}, {tuning})")
+    # Consecutive frames show the same lines; follow them instead of re-translating
+    tracker = LineTracker() if args.command in ('live', 'replay') and not args.no_track else None
+    limiter = build_rate_limiter(args)
+    return TranslationEngine(
+        ocr, build_translator(args, limiter), sinks=sinks, targets=args.dest, min_confidence=args.min_confidence,
+        tracker=tracker, tiered=args.tiered, rate_limiter=limiter
+    )
+
+
+def run_pipeline(args):
+    engine = build_engine(args, [JsonLinesSink(sys.stdout)])
+    if args.command == 'live' and args.auto_region and not args.region:
+        args.region = localize_chat_region(engine.ocr, list_monitors()[args.monitor])
+        log(f"Detected chat region: {args.region}" if args.region else "No chat text found, using the default region")
+    # Screen grabs go straight into the isolated worker's shared frame ring
+    ring = engine.ocr.ring if isinstance(engine.ocr, IsolatedOCREngine) else None
+    source, frame_kwargs = build_source(args, ring)
+    monitor = None
+    if args.memory_log:
+        # Asking for a memory log is asking for diagnostics, allocation sites included
+        monitor = MemoryMonitor(
+            args.memory_log,
+            trace=True,
+            trim=lambda: trim_memory(engine),
+            restart=lambda: engine.ocr.restart("memory limit") if ring else None,
+            worker_pid=lambda: engine.ocr.pid if ring else None
+        )
+        monitor.start()
+
+    try:
+        status = run_frames(args, engine, source, frame_kwargs)
+        engine.wait_for_refinements()
+        return status
+    finally:
+        if monitor:
+            monitor.stop()
+        if isinstance(source, (RecordingCaptureSource, ReplaySource)):
+            source.close()
+        # Lets the line cache write its last entries
+        if isinstance(engine.ocr, IsolatedOCREngine):
+            engine.ocr.close()
+        elif engine.ocr.line_cache is not None:
+            engine.ocr.line_cache.close()
+
+
+def trim_memory(engine):
+    engine.ocr.trim_memory()
+    if hasattr(engine.translator, 'trim_memory'):
+        engine.translator.trim_memory()
+
+
+def run_frames(args, engine, source, frame_kwargs):
+    def process(frame):
+        try:
+            engine.process(frame)
+        except Exception as e:
+            sys.stdout.write(json.dumps({'source': frame.source, 'status': 'error', 'error': str(e)}) + "\n")
+            sys.stdout.flush()
+
+    if args.command == 'live' and args.cpu_budget:
+        governor = ResourceGovernor(args.cpu_budget, args.interval)
+        governor.apply_thread_cap(engine.ocr.scheduler)
+        if isinstance(engine.ocr, IsolatedOCREngine):
+            governor.cpu_sources.append(engine.ocr.cpu_time)
+        captured = []
+
+        def capture_once():
+            process(source.grab())
+            captured.append(1)
+
+        governor.run_governed(capture_once, lambda: args.count is None or len(captured) < args.count)
+        return 0
+
+    for frame in source.frames(**frame_kwargs):
+        process(frame)
+    return 0
+
+
+def run_batch(args):
+    cuda_available, _ = check_cuda()
+    processor = BatchProcessor(
+        workers=args.workers,
+        min_confidence=args.min_confidence,
+        languages=args.ocr_languages,
+        use_gpu=cuda_available and not args.cpu,
+        region=args.region,
+        full_frame=args.full_frame,
+        sample_fps=args.sample_fps,
+        change_threshold=args.change_threshold,
+        progress=log
+    )
+    log(f"Running OCR with {processor.workers} worker(s)")
+    transcript = processor.run(args.paths)
+
+    log(f"Translating {len(transcript.entries)} lines")
+    transcript.translate(build_translator(args, build_rate_limiter(args)), args.dest)
+    transcript.write(args.output)
+    log(f"Transcript written to {args.output}")
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == 'serve':
+            serve(args.host, args.port, args.cache_size, args.rate)
+            return 0
+        if args.command == 'batch':
+            return run_batch(args)
+        return run_pipeline(args)
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,284 @@
+import copy
+import json
+import os
+import sys
+import tempfile
+import threading
+
+from defaults import (
+    CHANGE_THRESHOLD, MIN_LINE_CONFIDENCE, STREAM_TRANSLATION_WORKERS, DEFAULT_CPU_BUDGET,
+    DEFAULT_CAPTURE_INTERVAL, LINE_CACHE_CAPACITY, MEMORY_INTERVAL, DEFAULT_TRIM_MB, DEFAULT_RESTART_MB,
+    DETECTION_WIDTH_THS, DETECTION_HEIGHT_THS, DEFAULT_RATE, DEFAULT_BURST, DEFAULT_LANGUAGES,
+    DEFAULT_MEMORY_BUDGET_MB, DEFAULT_CACHE_SIZE, DEFAULT_TARGET_LANGUAGE
+)
+
+CONFIG_VERSION = 2
+APP_DIR_NAME = 'ValorantChatTranslator'
+CONFIG_FILE = 'settings.json'
+LEGACY_SETTINGS_FILE = 'valorant_translator_settings.json'   # v1, in the temp dir
+SAVE_DELAY = 0.5   # seconds; bursts of changes are written once
+
+# Knobs that apply live, without a restart (isolated_ocr is read at startup)
+PERFORMANCE_DEFAULTS = {
+    'cpu_budget': DEFAULT_CPU_BUDGET,
+    'capture_interval': DEFAULT_CAPTURE_INTERVAL,
+    'change_threshold': CHANGE_THRESHOLD,
+    'max_ocr_threads': 0,
+    'min_confidence': MIN_LINE_CONFIDENCE,
+    'ocr_width_ths': DETECTION_WIDTH_THS,
+    'ocr_height_ths': DETECTION_HEIGHT_THS,
+    'line_cache_size': LINE_CACHE_CAPACITY,
+    'recognizer_memory_mb': DEFAULT_MEMORY_BUDGET_MB,
+    'translation_cache_size': DEFAULT_CACHE_SIZE,
+    'translation_workers': STREAM_TRANSLATION_WORKERS,
+    'translation_rate': DEFAULT_RATE,
+    'translation_burst': DEFAULT_BURST,
+    'isolated_ocr': False,
+    'memory_interval': MEMORY_INTERVAL,
+    'memory_trim_mb': DEFAULT_TRIM_MB,
+    'memory_restart_mb': DEFAULT_RESTART_MB,
+    'memory_tracemalloc': False,    # slows every allocation; opt-in from Diagnostics
+    'log_max_lines': 2000,
+}
+PERFORMANCE_LIMITS = {
+    'cpu_budget': (1, 100),
+    'capture_interval': (0.25, 30),
+    'change_threshold': (0, 255),
+    'max_ocr_threads': (0, os.cpu_count() or 64),
+    'min_confidence': (0.0, 1.0),
+    'ocr_width_ths': (0.1, 5.0),
+    'ocr_height_ths': (0.1, 5.0),
+    'line_cache_size': (0, 1_000_000),     # 0 turns the line crop cache off
+    'recognizer_memory_mb': (16, 8192),
+    'translation_cache_size': (16, 1_000_000),
+    'translation_workers': (1, 32),
+    'translation_rate': (0.1, 50.0),       # upstream translation requests per second
+    'translation_burst': (1, 100),
+    'memory_interval': (5.0, 3600.0),
+    'memory_trim_mb': (0, 65536),          # 0 never trims caches
+    'memory_restart_mb': (0, 65536),       # 0 never restarts the OCR worker
+    'log_max_lines': (100, 100_000),
+}
+
+DEFAULTS = {
+    'version': CONFIG_VERSION,
+    'capture_key': 'F9',
+    'profile_key': 'F10',
+    'box_coordinates': None,
+    'monitor_index': 1,
+    'region_profiles': {},
+    'translation_server': '',
+    'glossary_path': '',
+    'tiered_translation': True,
+    'overlay': False,
+    'ocr_languages': DEFAULT_LANGUAGES,
+    'target_languages': [DEFAULT_TARGET_LANGUAGE],
+    'performance': PERFORMANCE_DEFAULTS,
+}
+
+
+def config_dir():
+    """Per-user configuration directory for this app"""
+    if sys.platform == 'win32':
+        base = os.environ.get('APPDATA') or os.path.expanduser('~')
+        return os.path.join(base, APP_DIR_NAME)
+    if sys.platform == 'darwin':
+        return os.path.join(os.path.expanduser('~/Library/Application Support'), APP_DIR_NAME)
+    base = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+    return os.path.join(base, APP_DIR_NAME.lower())
+
+
+def legacy_settings_path():
+    return os.path.join(tempfile.gettempdir(), LEGACY_SETTINGS_FILE)
+
+
+def migrate(data):
+    """Bring settings of any older schema up to CONFIG_VERSION"""
+    version = data.get('version', 1)
+    if version < 2:
+        # v1 was flat and also dumped the color palette, which was never read back
+        data.pop('color_mode', None)
+        data['performance'] = {key: data.pop(key) for key in PERFORMANCE_DEFAULTS if key in data}
+        data['version'] = 2
+    return data
+
+
+def parse_bool(value):
+    """Boolean from a hand-edited value; 'false', 'no', 'off' and '0' are False"""
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ('true', 'yes', 'on', '1'):
+            return True
+        if lowered in ('false', 'no', 'off', '0', ''):
+            return False
+        raise ValueError(f"not a boolean: {value!r}")
+    if isinstance(value, (bool, int, float)):
+        return bool(value)
+    raise TypeError(f"not a boolean: {value!r}")
+
+
+def coerce_performance(values):
+    """Valid performance settings: known keys, default types, clamped ranges"""
+    performance = {}
+    for key, default in PERFORMANCE_DEFAULTS.items():
+        value = values.get(key, default)
+        try:
+            value = parse_bool(value) if isinstance(default, bool) else type(default)(value)
+        except (TypeError, ValueError):
+            value = default
+        if key in PERFORMANCE_LIMITS:
+            low, high = PERFORMANCE_LIMITS[key]
+            value = max(low, min(high, value))
+        performance[key] = value
+    return performance
+
+
+class Config:
+    """Versioned settings file with debounced, atomic saves
+
+    Changes are written SAVE_DELAY seconds after the last one by writing a
+    temporary file next to the real one and renaming it over it, so a crash
+    never leaves a half-written file. Performance settings notify listeners
+    when they change, including when the file is edited by hand
+    (see reload_if_changed).
+    """
+
+    def __init__(self, path=None, save_delay=SAVE_DELAY):
+        self.path = path or os.path.join(config_dir(), CONFIG_FILE)
+        self.save_delay = save_delay
+        self.data = copy.deepcopy(DEFAULTS)
+        self.listeners = []
+        self.lock = threading.RLock()
+        self.timer = None
+        self.mtime = None
+        self.error = None
+
+    def load(self):
+        """Read the config file, migrating the legacy temp-dir settings on first run"""
+        path = self.path if os.path.exists(self.path) else legacy_settings_path()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return self
+        except (OSError, ValueError) as e:
+            self.error = f"{path}: {e}"
+            return self
+
+        with self.lock:
+            self.apply(migrate(stored))
+            if path != self.path:
+                self.schedule_save()
+            else:
+                self.mtime = os.path.getmtime(self.path)
+        return self
+
+    def apply(self, stored):
+        for key in DEFAULTS:
+            if key in stored and key not in ('version', 'performance'):
+                self.data[key] = stored[key]
+        self.data['performance'] = coerce_performance(stored.get('performance', {}))
+
+    def get(self, key, default=None):
+        with self.lock:
+            return self.data.get(key, default)
+
+    @property
+    def performance(self):
+        with self.lock:
+            return dict(self.data['performance'])
+
+    def update(self, **values):
+        with self.lock:
+            self.data.update(values)
+            self.schedule_save()
+
+    def update_performance(self, **values):
+        """Change performance settings; listeners get the keys that changed"""
+        with self.lock:
+            current = self.data['performance']
+            updated = coerce_performance({**current, **values})
+            changed = {key for key in updated if updated[key] != current[key]}
+            self.data['performance'] = updated
+            self.schedule_save()
+        if changed:
+            self.notify(changed)
+        return changed
+
+    def on_performance_change(self, callback):
+        """callback(performance, changed_keys)"""
+        self.listeners.append(callback)
+
+    def notify(self, changed):
+        performance = self.performance
+        for callback in self.listeners:
+            callback(performance, changed)
+
+    def schedule_save(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = threading.Timer(self.save_delay, self.save)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def save(self):
+        """Write the file now: temporary file + rename"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            directory = os.path.dirname(self.path)
+            temp_path = None
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(prefix='.settings-', suffix='.tmp', dir=directory)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self.data, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+                temp_path = None
+                self.mtime = os.path.getmtime(self.path)
+                self.error = None
+            except (OSError, TypeError, ValueError) as e:
+                self.error = f"{self.path}: {e}"
+                return False
+            finally:
+                # Never leave a half-written temporary file behind
+                if temp_path is not None:
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+            return True
+
+    def flush(self):
+        """Write pending changes immediately (e.g. on exit)"""
+        with self.lock:
+            if self.timer is not None:
+                self.save()
+
+    def reload_if_changed(self):
+        """Pick up edits made to the file by hand; True if it was reloaded"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        with self.lock:
+            if self.mtime is None or mtime == self.mtime or self.timer is not None:
+                return False
+            previous = self.data['performance']
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.apply(migrate(json.load(f)))
+            except (OSError, ValueError) as e:
+                # Half-saved by an editor; try again on the next poll
+                self.error = f"{self.path}: {e}"
+                return False
+            self.mtime = mtime
+            self.error = None
+            changed = {key for key, value in self.data['performance'].items() if previous[key] != value}
+        if changed:
+            self.notify(changed)
+        return True
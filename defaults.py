@@ -0,0 +1,38 @@
+# Default values of the user-tunable settings. They live here, free of
+# heavy imports, so config can read them without loading OCR or torch;
+# the modules that use them import them from here.
+
+# capture
+CHANGE_THRESHOLD = 4.0       # mean absolute pixel difference on the thumbnail
+
+# engine
+MIN_LINE_CONFIDENCE = 0.45   # lines below this are re-read or held back
+STREAM_TRANSLATION_WORKERS = 4
+
+# governor
+DEFAULT_CPU_BUDGET = 15       # percent of the whole machine
+DEFAULT_CAPTURE_INTERVAL = 1.0
+
+# line_cache
+LINE_CACHE_CAPACITY = 5000
+
+# memory_monitor
+MEMORY_INTERVAL = 30.0        # seconds between snapshots
+DEFAULT_TRIM_MB = 1500        # own RSS at which caches are trimmed (0 = never)
+DEFAULT_RESTART_MB = 2500     # OCR worker RSS at which it is restarted (0 = never)
+
+# ocr
+DETECTION_WIDTH_THS = 0.7    # how eagerly detected boxes are merged horizontally
+DETECTION_HEIGHT_THS = 0.7
+
+# rate_limiter
+DEFAULT_RATE = 2.0          # upstream requests per second
+DEFAULT_BURST = 5
+
+# recognizer_router
+DEFAULT_LANGUAGES = ['en', 'ru']
+DEFAULT_MEMORY_BUDGET_MB = 128
+
+# translation
+DEFAULT_TARGET_LANGUAGE = 'en'
+DEFAULT_CACHE_SIZE = 4096
@@ -0,0 +1,521 @@
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from defaults import MIN_LINE_CONFIDENCE, STREAM_TRANSLATION_WORKERS
+from normalize import NearDuplicateIndex, cache_key, message_body, normalize_ocr_line, script_language
+from ocr import group_lines, rerecognize_line
+from rate_limiter import SharedTicket, Ticket
+from translation import DEFAULT_TARGET_LANGUAGE
+
+IGNORED_CHANNELS = ("(broadcast)", "(system)")
+HOLD_FRAMES = 5              # captures a doubtful line waits for confirmation
+
+
+def same_language(language, dest):
+    """True if a line detected as `language` needs no translation into `dest` (e.g. 'zh' and 'zh-cn')"""
+    return language is not None and dest.lower().split('-')[0] == language
+
+
+def is_chat_message(message):
+    """Filter out fragments and system/broadcast lines"""
+    if len(message.strip()) < 2:
+        return False
+    return not any(term in message.lower() for term in IGNORED_CHANNELS)
+
+
+class ConfidenceGate:
+    """Decides whether a doubtful OCR reading may be translated
+
+    A line under `threshold` passes once the same reading (up to OCR
+    jitter) shows up again within `hold_frames` captures, and from then on
+    passes immediately while it stays on screen.
+    """
+
+    def __init__(self, threshold=MIN_LINE_CONFIDENCE, hold_frames=HOLD_FRAMES):
+        self.threshold = threshold
+        self.hold_frames = hold_frames
+        self.frame_number = 0
+        self.held = {}                          # cache key -> frame it was first seen in
+        self.held_index = NearDuplicateIndex()
+        self.confirmed = NearDuplicateIndex()
+        self.lock = threading.Lock()
+
+    def next_frame(self):
+        """Start a new capture and forget readings that were never confirmed"""
+        with self.lock:
+            self.frame_number += 1
+            for key, seen in list(self.held.items()):
+                if self.frame_number - seen > self.hold_frames:
+                    del self.held[key]
+                    self.held_index.remove(key)
+
+    def accepts(self, confidence):
+        return confidence >= self.threshold
+
+    def confirm(self, text):
+        """True if a doubtful reading was already seen in an earlier capture"""
+        key = cache_key(text)
+        with self.lock:
+            if self.confirmed.find(key) is not None:
+                return True
+            match = self.held_index.find(key)
+            if match is None:
+                self.held[key] = self.frame_number
+                self.held_index.add(key)
+                return False
+            if self.held[match] == self.frame_number:
+                return False
+            del self.held[match]
+            self.held_index.remove(match)
+            self.confirmed.add(key)
+            return True
+
+
+class Sink:
+    """Receives pipeline output; override the hooks you need"""
+
+    def frame_started(self, frame):
+        pass
+
+    def lines_grouped(self, frame, messages):
+        pass
+
+    def message_provisional(self, frame, entry):
+        """Streaming only: a line was read, its translation is on the way"""
+        pass
+
+    def message_drafted(self, frame, entry):
+        """Tiered only: entry['draft'] holds a local translation (or None), the remote one follows"""
+        pass
+
+    def message_translated(self, frame, entry):
+        pass
+
+    def frame_finished(self, frame, result):
+        pass
+
+
+class CallbackSink(Sink):
+    """Call a function with every finished frame result"""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def frame_finished(self, frame, result):
+        self.callback(result)
+
+
+class JsonLinesSink(Sink):
+    """Write one JSON object per processed frame"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def message_translated(self, frame, entry):
+        # Refinements arrive after their frame was written
+        if entry.get('tier') == 'refined':
+            self.write({'source': frame.source, 'status': 'refined', 'message': entry})
+
+    def frame_finished(self, frame, result):
+        self.write(result)
+
+    def write(self, record):
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+
+class TranslationEngine:
+    """Headless OCR -> grouping -> translation pipeline"""
+
+    def __init__(self, ocr, translator, sinks=None, dest=DEFAULT_TARGET_LANGUAGE, min_confidence=MIN_LINE_CONFIDENCE,
+                 tracker=None, streaming=False, tiered=False, rate_limiter=None, targets=None):
+        self.ocr = ocr
+        self.translator = translator
+        self.sinks = list(sinks or [])
+        # Every line is translated into each target; the first one is the primary
+        # ('translated'), all of them are in entry['translations']
+        self.targets = list(targets or [dest])
+        self.confidence_gate = ConfidenceGate(min_confidence)
+        # Optional LineTracker for consecutive captures: lines are translated
+        # once, after their reading settles, instead of on every frame
+        self.tracker = tracker
+        # Read rows bottom-first and translate each as soon as it is read
+        self.streaming = streaming
+        self.translation_pool = None
+        self.translation_workers = STREAM_TRANSLATION_WORKERS
+        # Show a local draft at once and replace it with the backend's
+        # translation when it arrives, instead of waiting for it
+        self.tiered = tiered
+        self.refinements = {}    # line identity -> [(future, entry, ticket)] still being refined
+        self.refinement_lock = threading.Lock()
+        self.cancelled_refinements = 0
+        # The translator's RateLimiter, if any: queued lines are re-ranked through it
+        self.rate_limiter = rate_limiter
+        self.frame_number = 0
+
+    @property
+    def dest(self):
+        return self.targets[0]
+
+    @property
+    def ready(self):
+        return self.ocr.ready and self.translator is not None
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink):
+        if sink in self.sinks:
+            self.sinks.remove(sink)
+
+    def emit(self, hook, *args):
+        for sink in self.sinks:
+            getattr(sink, hook)(*args)
+
+    def gate_line(self, image, line, hold=True):
+        """The line (possibly re-read) if it is good enough to translate, else None
+
+        With hold=False doubtful lines are only re-read, never held; the
+        tracker's stability check takes the place of confirmation.
+        """
+        gate = self.confidence_gate
+        if gate.accepts(line.confidence):
+            return line
+        line = normalize_ocr_line(rerecognize_line(self.ocr, image, line))
+        if not is_chat_message(line.text):
+            return None
+        if not hold or gate.accepts(line.confidence) or gate.confirm(line.text):
+            return line
+        return None
+
+    def set_translation_workers(self, workers):
+        """Resize the streaming translation pool; running translations finish undisturbed"""
+        self.translation_workers = workers
+        pool, self.translation_pool = self.translation_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def pool(self):
+        if self.translation_pool is None:
+            self.translation_pool = ThreadPoolExecutor(self.translation_workers, thread_name_prefix='translate')
+        return self.translation_pool
+
+    def new_entry(self, index, region, line, line_id=None):
+        return {
+            'index': index,
+            'original': line.text,
+            'language': script_language(message_body(line.text)),
+            'translated': None,
+            'translations': {},
+            'error': None,
+            'confidence': round(line.confidence, 3),
+            'region': region,
+            'line_id': line_id
+        }
+
+    def ticket(self, entry):
+        """Rate limiter ticket: newer frames first, and lower (newer) rows first within a frame"""
+        return Ticket((self.frame_number, entry['index']), is_stale=lambda: entry.get('stale', False))
+
+    def translate_entry(self, entry, ticket=None):
+        """Translate one entry into every target language"""
+        errors = {}
+        for dest in self.targets:
+            if same_language(entry['language'], dest):
+                entry['translations'][dest] = entry['original']
+                continue
+            try:
+                entry['translations'][dest] = self.translator.translate(entry['original'], dest=dest, ticket=ticket)
+            except Exception as e:
+                errors[dest] = e
+        return self.finish_entry(entry, errors)
+
+    def translate_entries(self, entries):
+        """translate_entry for a whole frame: one batch of distinct lines per target language
+
+        Each distinct text carries the tickets of all its lines, so it is
+        ranked like its newest line.
+        """
+        errors = {id(entry): {} for entry in entries}
+        tickets = {id(entry): self.ticket(entry) for entry in entries}
+        for dest in self.targets:
+            pending = {}     # text -> entries
+            for entry in entries:
+                if same_language(entry['language'], dest):
+                    entry['translations'][dest] = entry['original']
+                else:
+                    pending.setdefault(entry['original'], []).append(entry)
+            if not pending:
+                continue
+            shared = [SharedTicket(tickets[id(entry)] for entry in group) for group in pending.values()]
+            translated = self.translator.translate_batch(list(pending), dest=dest, tickets=shared)
+            for group, result in zip(pending.values(), translated):
+                for entry in group:
+                    if isinstance(result, Exception):
+                        errors[id(entry)][dest] = result
+                    else:
+                        entry['translations'][dest] = result
+        return [self.finish_entry(entry, errors[id(entry)]) for entry in entries]
+
+    def finish_entry(self, entry, errors):
+        entry['translated'] = entry['translations'].get(self.dest)
+        if errors:
+            entry['error'] = "; ".join(
+                f"{dest}: {error}" if len(self.targets) > 1 else str(error) for dest, error in errors.items()
+            )
+        return entry
+
+    def translate_and_emit(self, frame, entry, ticket):
+        self.translate_entry(entry, ticket)
+        self.emit('message_translated', frame, entry)
+
+    def translate_tiered(self, frame, entry, identity):
+        """Emit a local draft now and queue the backend translation to replace it"""
+        drafts = {}
+        for dest in self.targets:
+            if same_language(entry['language'], dest):
+                drafts[dest] = (entry['original'], True)
+            elif hasattr(self.translator, 'draft'):
+                drafts[dest] = self.translator.draft(entry['original'], dest=dest)
+            else:
+                drafts[dest] = None
+        if all(drafted is not None and drafted[1] for drafted in drafts.values()):
+            entry['translations'] = {dest: drafted[0] for dest, drafted in drafts.items()}
+            entry['tier'] = 'final'
+            self.emit('message_translated', frame, self.finish_entry(entry, {}))
+            return
+        entry['drafts'] = {dest: drafted[0] if drafted else None for dest, drafted in drafts.items()}
+        entry['draft'] = entry['drafts'][self.dest]
+        entry['tier'] = 'draft'
+        self.emit('message_drafted', frame, entry)
+
+        ticket = self.ticket(entry)
+        future = self.pool().submit(self.refine, frame, entry, ticket)
+        with self.refinement_lock:
+            self.refinements.setdefault(identity, []).append((future, entry, ticket))
+        future.add_done_callback(lambda done: self.forget_refinement(identity, done))
+
+    def refine(self, frame, entry, ticket):
+        if entry.get('stale'):
+            return
+        self.translate_entry(entry, ticket)
+        # The line may have scrolled away while the backend was busy
+        if entry.get('stale'):
+            return
+        entry['tier'] = 'refined'
+        self.emit('message_translated', frame, entry)
+
+    def forget_refinement(self, identity, future):
+        with self.refinement_lock:
+            pending = self.refinements.get(identity)
+            if pending is None:
+                return
+            pending[:] = [item for item in pending if item[0] is not future]
+            if not pending:
+                del self.refinements[identity]
+
+    def drop_stale(self, visible):
+        """Cancel the refinements of lines that are no longer on screen
+
+        Untiered translations are finished before process() returns, so
+        only refinements can still be queued when their line leaves. Their
+        queued requests leave the rate limiter instead of being sent.
+        """
+        with self.refinement_lock:
+            stale = [identity for identity in self.refinements if identity not in visible]
+            dropped = [pending for identity in stale for pending in self.refinements.pop(identity)]
+        # Outside the lock: cancel() runs forget_refinement right away
+        for future, entry, ticket in dropped:
+            entry['stale'] = True
+            if future.cancel():
+                self.cancelled_refinements += 1
+        if dropped and self.rate_limiter is not None:
+            # Queued requests of those lines leave the limiter's queue
+            self.rate_limiter.wake()
+
+    def prioritize(self, entry):
+        """Move a drafted line's refinement to the front of the limiter's queue"""
+        with self.refinement_lock:
+            tickets = [
+                ticket for pending in self.refinements.values()
+                for future, other, ticket in pending if other is entry
+            ]
+        if not tickets or self.rate_limiter is None:
+            return False
+        for ticket in tickets:
+            self.rate_limiter.prioritize(ticket)
+        return True
+
+    def wait_for_refinements(self, timeout=None):
+        """Block until queued refinements are done (e.g. before exiting)"""
+        with self.refinement_lock:
+            futures = [item[0] for pending in self.refinements.values() for item in pending]
+        wait(futures, timeout)
+
+    def can_stream(self, frame):
+        # Tracked and multi-region frames need every line before deciding anything
+        return (self.streaming and self.tracker is None and not frame.regions
+                and hasattr(self.ocr, 'readtext_streaming'))
+
+    def process(self, frame):
+        """Run one frame through the pipeline and return its result dict"""
+        self.frame_number += 1
+        self.emit('frame_started', frame)
+        if self.can_stream(frame):
+            return self.process_streaming(frame)
+
+        result = {
+            'source': frame.source,
+            'timestamp': frame.timestamp,
+            'status': 'ok',
+            'messages': [],
+            'held': [],
+            'pending': []
+        }
+
+        self.confidence_gate.next_frame()
+        if frame.regions:
+            images = {name: crop for name, (crop, region) in frame.regions.items()}
+            region_results = self.ocr.readtext_regions(images)
+        else:
+            images = {None: frame.image}
+            region_results = {None: self.ocr.readtext(frame.image)}
+
+        ocr_results = [item for results in region_results.values() for item in results]
+        lines = [
+            (region, normalize_ocr_line(line))
+            for region, results in region_results.items()
+            for line in group_lines(results)
+        ]
+        lines = [(region, line) for region, line in lines if line.text]
+        messages = [line.text for region, line in lines]
+
+        # Only confident (or confirmed) lines are worth a translation call
+        tracker = self.tracker
+        accepted = []
+        for i, (region, line) in enumerate(lines, 1):
+            if not is_chat_message(line.text):
+                continue
+            gated = self.gate_line(images[region], line, hold=tracker is None)
+            if gated is None:
+                result['held'].append(line.text)
+            else:
+                accepted.append((i, region, gated))
+
+        visible = bool(accepted)
+        if tracker is not None and accepted:
+            committed, pending = tracker.update(accepted)
+            result['pending'] = [track.text for track in pending]
+            accepted = [(i, track.region, track.consensus_line(), track.id) for i, track in committed]
+        else:
+            if tracker is not None:
+                tracker.gap()
+            accepted = [(i, region, line, None) for i, region, line in accepted]
+
+        # Tracks only expire on frames that reached the tracker
+        if ocr_results and (tracker is None or visible):
+            if tracker is not None:
+                on_screen = tracker.track_ids()
+            else:
+                on_screen = {(region, cache_key(line.text)) for region, line in lines}
+            self.drop_stale(on_screen)
+
+        if not ocr_results:
+            result['status'] = 'no_text'
+        elif not messages:
+            result['status'] = 'no_messages'
+        elif not accepted and result['held']:
+            result['status'] = 'held'
+        elif not accepted and result['pending']:
+            result['status'] = 'pending'
+        elif not accepted and visible:
+            # Tracked lines on screen were all translated already
+            result['status'] = 'unchanged'
+        else:
+            self.emit('lines_grouped', frame, messages)
+
+            entries = [self.new_entry(i, region, line, line_id) for i, region, line, line_id in accepted]
+            result['messages'] = entries
+            if self.tiered:
+                for entry, (i, region, line, line_id) in zip(entries, accepted):
+                    identity = line_id if line_id is not None else (region, cache_key(line.text))
+                    self.translate_tiered(frame, entry, identity)
+            else:
+                for entry in self.translate_entries(entries):
+                    self.emit('message_translated', frame, entry)
+
+        self.emit('frame_finished', frame, result)
+        return result
+
+    def process_streaming(self, frame):
+        """process() that hands each row to translation as soon as OCR reads it
+
+        Rows arrive bottom (newest) first. Sinks get message_provisional for
+        a row right away and message_translated when its translation is done,
+        while OCR carries on with the rows above.
+        """
+        pool = self.pool()
+        result = {
+            'source': frame.source,
+            'timestamp': frame.timestamp,
+            'status': 'ok',
+            'messages': [],
+            'held': [],
+            'pending': []
+        }
+        self.confidence_gate.next_frame()
+
+        found_text = False
+        messages = []       # filled as rows are read
+        on_screen = set()
+        futures = []
+        entries = 0
+        for row, results in self.ocr.readtext_streaming(frame.image):
+            found_text = found_text or bool(results)
+            for line in group_lines(results):
+                line = normalize_ocr_line(line)
+                if not line.text:
+                    continue
+                messages.append(line.text)
+                on_screen.add((None, cache_key(line.text)))
+                if not is_chat_message(line.text):
+                    continue
+                gated = self.gate_line(frame.image, line)
+                if gated is None:
+                    result['held'].append(line.text)
+                    continue
+
+                if not entries:
+                    self.emit('lines_grouped', frame, messages)
+                entries += 1
+                entry = self.new_entry(row + 1, None, gated)
+                result['messages'].append(entry)
+                self.emit('message_provisional', frame, entry)
+                if self.tiered:
+                    self.translate_tiered(frame, entry, (None, cache_key(gated.text)))
+                else:
+                    futures.append(pool.submit(self.translate_and_emit, frame, entry, self.ticket(entry)))
+
+        # Tiered refinements are not waited for; they replace their drafts later
+        wait(futures)
+        if found_text:
+            self.drop_stale(on_screen)
+        result['messages'].sort(key=lambda entry: entry['index'])
+        if not found_text:
+            result['status'] = 'no_text'
+        elif not messages:
+            result['status'] = 'no_messages'
+        elif not entries and result['held']:
+            result['status'] = 'held'
+        elif not entries:
+            self.emit('lines_grouped', frame, messages)
+
+        self.emit('frame_finished', frame, result)
+        return result
+
+    def run(self, source, **kwargs):
+        """Process every frame from a capture source"""
+        for frame in source.frames(**kwargs):
+            yield self.process(frame)
@@ -0,0 +1,197 @@
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+DEFAULT_SLOTS = 4
+DEFAULT_SLOT_BYTES = 8 * 1024 * 1024   # a 1440p chat area needs well under 1 MB
+READ_POLL_INTERVAL = 0.002
+
+# Header: next sequence number, slot count, slot size, frames dropped by readers
+HEADER_FIELDS = 4
+# Per slot: sequence number, height, width, channels
+SLOT_FIELDS = 4
+
+
+class FrameRing:
+    """Fixed-size ring of frames in shared memory
+
+    Capture writes each frame once into the next slot; readers get numpy
+    views of the slot instead of copies, in the same process or in another
+    one that attached by name. Every frame carries a sequence number and a
+    timestamp, so a reader can tell when the writer lapped it (a dropped
+    frame) and whether a view it holds is still intact.
+    """
+
+    def __init__(self, slots=DEFAULT_SLOTS, slot_bytes=DEFAULT_SLOT_BYTES, name=None):
+        if name is None:
+            size = self.layout_size(slots, slot_bytes)
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+        if self.owner:
+            self.header[:] = (1, slots, slot_bytes, 0)
+        self.slots = int(self.header[1])
+        self.slot_bytes = int(self.header[2])
+
+        offset = self.header.nbytes
+        self.meta = np.ndarray((self.slots, SLOT_FIELDS), dtype=np.int64, buffer=self.shm.buf, offset=offset)
+        offset += self.meta.nbytes
+        self.stamps = np.ndarray((self.slots,), dtype=np.float64, buffer=self.shm.buf, offset=offset)
+        offset += self.stamps.nbytes
+        self.data_offset = offset
+        self.data = np.ndarray((self.slots * self.slot_bytes,), dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+        if self.owner:
+            self.meta[:] = 0
+        self.address = self.data.__array_interface__['data'][0]
+
+    @staticmethod
+    def layout_size(slots, slot_bytes):
+        return 8 * (HEADER_FIELDS + slots * SLOT_FIELDS + slots) + slots * slot_bytes
+
+    @classmethod
+    def attach(cls, name):
+        return cls(name=name)
+
+    def __reduce__(self):
+        # Processes receive an attached handle, never a copy of the frames
+        return (FrameRing.attach, (self.name,))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def latest_seq(self):
+        """Sequence number of the newest complete frame (0 before the first write)"""
+        return int(self.header[0]) - 1
+
+    @property
+    def dropped(self):
+        return int(self.header[3])
+
+    def fits(self, img):
+        return img.nbytes <= self.slot_bytes
+
+    def slot_view(self, slot, shape):
+        start = slot * self.slot_bytes
+        return self.data[start:start + int(np.prod(shape))].reshape(shape)
+
+    def write(self, img, timestamp=None):
+        """Copy a frame into the next slot; returns its sequence number"""
+        if not self.fits(img):
+            raise ValueError(f"Frame of {img.nbytes} bytes does not fit a {self.slot_bytes} byte slot")
+        seq = int(self.header[0])
+        slot = seq % self.slots
+        height, width = img.shape[:2]
+        channels = img.shape[2] if img.ndim == 3 else 1
+
+        # Invalidate the slot first so readers never trust a half-written frame
+        self.meta[slot, 0] = 0
+        np.copyto(self.slot_view(slot, img.shape), img)
+        self.meta[slot, 1:] = (height, width, channels)
+        self.stamps[slot] = time.time() if timestamp is None else timestamp
+        self.meta[slot, 0] = seq
+        self.header[0] = seq + 1
+        return seq
+
+    def is_valid(self, seq):
+        """True while frame `seq` has not been overwritten"""
+        return seq > 0 and int(self.meta[seq % self.slots, 0]) == seq
+
+    def read(self, seq):
+        """(image view, timestamp) of frame `seq`, or None once it was overwritten"""
+        slot = seq % self.slots
+        if not self.is_valid(seq):
+            return None
+        height, width, channels = (int(value) for value in self.meta[slot, 1:])
+        shape = (height, width, channels) if channels > 1 else (height, width)
+        image, timestamp = self.slot_view(slot, shape), float(self.stamps[slot])
+        # The writer may have lapped us while we were reading the metadata
+        if not self.is_valid(seq):
+            return None
+        return image, timestamp
+
+    def locate(self, img):
+        """(seq, byte offset into the slot area) if `img` is a view into this ring, else None"""
+        offset = img.__array_interface__['data'][0] - self.address
+        if not 0 <= offset < self.data.nbytes:
+            return None
+        seq = int(self.meta[offset // self.slot_bytes, 0])
+        return (seq, offset) if seq else None
+
+    def view(self, offset, shape, strides):
+        """Rebuild a view located with `locate` (possibly in another process)"""
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=self.data_offset + offset, strides=strides)
+
+    def count_dropped(self, frames):
+        self.header[3] += frames
+
+    def reader(self):
+        return RingReader(self)
+
+    def stats(self):
+        return {'written': self.latest_seq, 'dropped': self.dropped, 'slots': self.slots}
+
+    def close(self):
+        # Views must be gone before the buffer can be released
+        self.header = self.meta = self.stamps = self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class RingReader:
+    """Sequential consumer of a FrameRing that counts the frames it missed"""
+
+    def __init__(self, ring):
+        self.ring = ring
+        self.last_seq = ring.latest_seq
+        self.read_count = 0
+        self.dropped = 0
+
+    def take(self, seq):
+        frame = self.ring.read(seq)
+        if frame is None:
+            return None
+        missed = seq - self.last_seq - 1
+        if missed > 0:
+            self.dropped += missed
+            self.ring.count_dropped(missed)
+        self.last_seq = seq
+        self.read_count += 1
+        return (seq,) + frame
+
+    def next(self, timeout=None):
+        """Oldest unread frame still in the ring as (seq, image, timestamp), or None on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            latest = self.ring.latest_seq
+            if latest > self.last_seq:
+                # Skip what the writer already overwrote
+                seq = max(self.last_seq + 1, latest - self.ring.slots + 1)
+                frame = self.take(seq)
+                if frame is not None:
+                    return frame
+                continue
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(READ_POLL_INTERVAL)
+
+    def latest(self):
+        """Newest frame, skipping (and counting) anything older, or None if nothing new"""
+        while True:
+            latest = self.ring.latest_seq
+            if latest <= self.last_seq:
+                return None
+            frame = self.take(latest)
+            if frame is not None:
+                return frame
+
+    def backlog(self):
+        """Frames written but not read yet"""
+        return max(0, self.ring.latest_seq - self.last_seq)
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+from collections import defaultdict
+
+from normalize import message_body
+from paths import resource_path
+from translation import DEFAULT_TARGET_LANGUAGE
+
+DEFAULT_GLOSSARY_FILE = 'glossary.json'
+FUZZY_MIN_LENGTH = 5    # shorter tokens only match exactly (after folding)
+TOKEN_PATTERN = re.compile(r"[\w/']+|[^\w\s]+")
+STRETCHED = re.compile(r'(.)\1{2,}')
+
+
+def fold_token(token):
+    """Case/spelling-insensitive form of a token: 'GGGG' -> 'gg', 'Изиии' -> 'изии'
+
+    Runs of three or more letters shrink to two, so stretched spellings
+    match their dictionary form while 'f' and 'ff' stay different words.
+    """
+    token = token.casefold().replace('ё', 'е')
+    return STRETCHED.sub(r'\1\1', token)
+
+
+def squeeze(token):
+    """Every run of a repeated letter down to one: 'изии' -> 'изи'"""
+    return re.sub(r'(.)\1+', r'\1', token)
+
+
+def is_word(token):
+    return any(ch.isalnum() for ch in token)
+
+
+def deletion_variants(token):
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+class Glossary:
+    """Phrase dictionary consulted before the translation backend
+
+    Phrases are stored in a token trie so a line can be matched as a whole or
+    have known phrases substituted in-line (longest match wins). Tokens are
+    folded before lookup, and longer tokens also match with a single typo via
+    a hashed deletion index.
+    """
+
+    def __init__(self):
+        self.trie = {}
+        self.vocabulary = {}                # folded token -> canonical token
+        self.deletions = defaultdict(set)   # one-deletion variant -> canonical tokens
+        self.size = 0
+
+    def add(self, phrase, translation):
+        """Add a phrase; translation is a string (English) or {lang: text}"""
+        if isinstance(translation, str):
+            translation = {DEFAULT_TARGET_LANGUAGE: translation}
+
+        tokens = [fold_token(token) for token in TOKEN_PATTERN.findall(phrase) if is_word(token)]
+        if not tokens:
+            return
+
+        node = self.trie
+        for token in tokens:
+            self.index_token(token)
+            node = node.setdefault(token, {})
+        if '$' not in node:
+            self.size += 1
+        node['$'] = translation
+
+    def index_token(self, token):
+        self.vocabulary[token] = token
+        if len(token) >= FUZZY_MIN_LENGTH:
+            for variant in deletion_variants(token) | {token}:
+                self.deletions[variant].add(token)
+
+    def canonical_token(self, token):
+        """Map an input token onto a dictionary token, or None"""
+        folded = fold_token(token)
+        if folded in self.vocabulary:
+            return folded
+        # A stretched word may stretch a single letter ('изиии' is 'изи')
+        if STRETCHED.search(token.casefold()) and squeeze(folded) in self.vocabulary:
+            return squeeze(folded)
+        if len(folded) < FUZZY_MIN_LENGTH:
+            return None
+
+        candidates = set(self.deletions.get(folded, ()))
+        for variant in deletion_variants(folded):
+            candidates |= self.deletions.get(variant, set())
+        # Only accept unambiguous fuzzy matches
+        if len(candidates) == 1:
+            return candidates.pop()
+        return None
+
+    def longest_match(self, canonical, start):
+        """Longest phrase in the trie starting at canonical[start]"""
+        node = self.trie
+        best = None
+        for end in range(start, len(canonical)):
+            token = canonical[end]
+            if token is None or token not in node:
+                break
+            node = node[token]
+            if '$' in node:
+                best = (end + 1, node['$'])
+        return best
+
+    def substitute(self, text, dest=DEFAULT_TARGET_LANGUAGE):
+        """Replace known phrases in-line
+
+        Returns (text, fully_translated). The "Player: " prefix is kept as
+        it is; fully_translated is True when every word of the message after
+        it was covered by the glossary. Everything between matched phrases,
+        spacing and punctuation included, is copied from the input.
+        """
+        body = message_body(text)
+        prefix = text[:len(text) - len(body)]
+        words = [match for match in TOKEN_PATTERN.finditer(body) if is_word(match.group())]
+        if not words or not self.trie:
+            return text, False
+
+        canonical = [self.canonical_token(word.group()) for word in words]
+        output = []
+        covered = 0
+        copied = word = 0       # body[:copied] is in output
+        while word < len(words):
+            match = self.longest_match(canonical, word)
+            if match and dest in match[1]:
+                end, translation = match
+                output.append(body[copied:words[word].start()])
+                output.append(translation[dest])
+                copied = words[end - 1].end()
+                covered += end - word
+                word = end
+            else:
+                word += 1
+
+        if covered == 0:
+            return text, False
+        output.append(body[copied:])
+        return prefix + "".join(output), covered == len(words)
+
+    def lookup(self, text, dest=DEFAULT_TARGET_LANGUAGE):
+        """Full-line translation if the glossary covers the whole line"""
+        translated, complete = self.substitute(text, dest)
+        return translated if complete else None
+
+    def load(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for phrase, translation in data.get('phrases', {}).items():
+            self.add(phrase, translation)
+
+    def __len__(self):
+        return self.size
+
+
+def load_glossary(user_path=None):
+    """Bundled glossary plus the user's own entries (which take precedence)"""
+    glossary = Glossary()
+    bundled = resource_path(DEFAULT_GLOSSARY_FILE)
+    if os.path.exists(bundled):
+        glossary.load(bundled)
+    if user_path and os.path.exists(user_path):
+        glossary.load(user_path)
+    return glossary
+
@@ -0,0 +1,137 @@
+import os
+import sys
+import threading
+import time
+
+import torch
+
+from defaults import DEFAULT_CPU_BUDGET, DEFAULT_CAPTURE_INTERVAL
+
+MIN_CAPTURE_INTERVAL = 0.25
+EWMA_ALPHA = 0.3
+BELOW_NORMAL_NICE = 10
+THREAD_PRIORITY_BELOW_NORMAL = -1
+BELOW_NORMAL_PRIORITY_CLASS = 0x4000
+
+
+def lower_current_thread_priority():
+    """Drop the calling thread below normal priority; True on success"""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            return bool(kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_BELOW_NORMAL))
+        if sys.platform.startswith('linux'):
+            # Linux niceness is per thread; new threads (torch's pool) inherit it
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), BELOW_NORMAL_NICE)
+            return True
+        os.nice(BELOW_NORMAL_NICE)
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+def lower_process_priority():
+    """Drop the whole current process below normal priority; True on success"""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            return bool(kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), BELOW_NORMAL_PRIORITY_CLASS))
+        os.nice(BELOW_NORMAL_NICE)
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+class ResourceGovernor:
+    """Keeps the translator inside a CPU budget so the game keeps its frames
+
+    Caps OCR threads, lowers the priority of the threads doing OCR, measures
+    the process' own CPU time (plus any helper processes registered in
+    `cpu_sources`) and stretches the continuous capture interval
+    until average usage fits the budget.
+    """
+
+    def __init__(self, budget_percent=DEFAULT_CPU_BUDGET, interval=DEFAULT_CAPTURE_INTERVAL, max_threads=None):
+        self.budget_percent = budget_percent
+        self.interval = interval
+        self.cores = os.cpu_count() or 1
+        self.max_threads = max_threads or max(1, self.cores // 2)
+        self.capture_cpu = None       # EWMA of CPU seconds per capture
+        self.usage_percent = 0.0
+        self.current_interval = interval
+        self.throttled = False
+        self.local = threading.local()
+        self.cpu_sources = []         # callables returning CPU seconds used by helper processes
+        self.last_sample = (time.monotonic(), self.cpu_time())
+
+    def configure(self, budget_percent=None, interval=None, max_threads=None):
+        if budget_percent is not None:
+            self.budget_percent = budget_percent
+        if interval is not None:
+            self.interval = max(MIN_CAPTURE_INTERVAL, interval)
+        if max_threads is not None:
+            self.max_threads = max(1, max_threads)
+
+    def apply_thread_cap(self, scheduler=None):
+        """Limit torch intra-op threads (through the OCR scheduler when there is one)"""
+        if scheduler:
+            scheduler.max_threads = min(scheduler.max_threads, self.max_threads)
+            scheduler.set_threads(min(scheduler.threads, self.max_threads))
+        elif torch.get_num_threads() > self.max_threads:
+            torch.set_num_threads(self.max_threads)
+
+    def enter_worker(self):
+        """Call from a thread before it runs OCR; lowers its priority once"""
+        if not getattr(self.local, 'lowered', False):
+            self.local.lowered = lower_current_thread_priority()
+
+    def cpu_time(self):
+        """CPU seconds used by this process and its registered helpers"""
+        return time.process_time() + sum(source() for source in self.cpu_sources)
+
+    def measure(self):
+        """Process CPU usage since the last call, as percent of the machine"""
+        wall, cpu = time.monotonic(), self.cpu_time()
+        last_wall, last_cpu = self.last_sample
+        self.last_sample = (wall, cpu)
+        if wall > last_wall:
+            self.usage_percent = 100.0 * (cpu - last_cpu) / ((wall - last_wall) * self.cores)
+        return self.usage_percent
+
+    def record_capture(self, cpu_seconds):
+        self.capture_cpu = cpu_seconds if self.capture_cpu is None else (
+            EWMA_ALPHA * cpu_seconds + (1 - EWMA_ALPHA) * self.capture_cpu
+        )
+
+    def next_interval(self):
+        """Capture period that keeps the average CPU use inside the budget"""
+        interval = self.interval
+        if self.capture_cpu and self.budget_percent > 0:
+            # capture_cpu / (period * cores) <= budget
+            required = self.capture_cpu / (self.cores * self.budget_percent / 100.0)
+            interval = max(interval, required)
+        self.throttled = interval > self.interval * 1.05
+        self.current_interval = interval
+        return interval
+
+    def run_governed(self, task, should_continue):
+        """Run `task` repeatedly, paced to the budget, until should_continue() is False"""
+        self.enter_worker()
+        while should_continue():
+            started_wall, started_cpu = time.monotonic(), self.cpu_time()
+            task()
+            self.record_capture(self.cpu_time() - started_cpu)
+            remaining = self.next_interval() - (time.monotonic() - started_wall)
+            # Sleep in slices so stopping stays responsive
+            while remaining > 0 and should_continue():
+                time.sleep(min(remaining, 0.1))
+                remaining -= 0.1
+
+    def status(self):
+        """Short status text for the UI"""
+        text = f"{self.usage_percent:.0f}% / {self.budget_percent:.0f}%"
+        if self.throttled:
+            text += f" (every {self.current_interval:.1f}s)"
+        return text
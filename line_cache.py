@@ -0,0 +1,160 @@
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+from defaults import LINE_CACHE_CAPACITY as DEFAULT_CAPACITY
+
+DEFAULT_CACHE_FILE = 'line_cache.sqlite3'
+HASH_ROWS = 12
+COLUMN_STEP = 4              # hash widths are quantized so box jitter keeps the same grid
+MAX_HASH_COLUMNS = 160
+MIN_CACHE_CONFIDENCE = 0.7   # doubtful readings are not worth remembering
+EVICT_SHARE = 0.1
+TRIM_SHARE = 0.5             # share dropped when memory runs high
+COMMIT_EVERY = 50
+
+
+def line_hash(crop):
+    """Difference hash of a line crop: (columns, bits as int)
+
+    The crop is reduced to grayscale on a HASH_ROWS-high grid whose width
+    follows the crop's aspect ratio, so short and long lines both keep
+    enough detail to tell words apart. Comparing neighbouring cells makes
+    the hash independent of brightness and contrast.
+    """
+    gray = cv2.cvtColor(crop[:, :, :3], cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    height, width = gray.shape[:2]
+    columns = round(HASH_ROWS * width / max(height, 1) / COLUMN_STEP) * COLUMN_STEP
+    columns = max(COLUMN_STEP, min(MAX_HASH_COLUMNS, columns))
+    small = cv2.resize(gray, (columns + 1, HASH_ROWS), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return columns, int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+class LineCache:
+    """Persistent crop-hash -> (text, confidence) cache for recognized lines
+
+    Lookups only hit on the exact hash: one different glyph ("rush A" vs
+    "rush B", "2 enemies" vs "3 enemies") changes only about ten bits, so
+    any tolerance would hand out another line's text. The cache keeps at
+    most `capacity` entries in memory and in its sqlite file, evicting the
+    least recently used ones.
+    """
+
+    def __init__(self, path=None, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.buckets = defaultdict(dict)   # columns -> {hash: [text, confidence, last_used]}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.pending_writes = 0
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            self.open(path)
+
+    def open(self, path):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS lines ("
+            "columns INTEGER, hash TEXT, text TEXT, confidence REAL, last_used REAL, "
+            "PRIMARY KEY (columns, hash))"
+        )
+        rows = self.db.execute(
+            "SELECT columns, hash, text, confidence, last_used FROM lines ORDER BY last_used DESC LIMIT ?",
+            (self.capacity,)
+        )
+        for columns, hash_hex, text, confidence, last_used in rows:
+            self.buckets[columns][int(hash_hex, 16)] = [text, confidence, last_used]
+            self.size += 1
+
+    @property
+    def enabled(self):
+        return self.capacity > 0
+
+    def get(self, key):
+        """(text, confidence) for a line_hash key, or None"""
+        columns, bits = key
+        with self.lock:
+            entry = self.buckets.get(columns, {}).get(bits)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry[2] = time.time()
+            self.write("UPDATE lines SET last_used = ? WHERE columns = ? AND hash = ?",
+                       (entry[2], columns, format(bits, 'x')))
+            return entry[0], entry[1]
+
+    def put(self, key, text, confidence):
+        if not self.enabled or confidence < MIN_CACHE_CONFIDENCE or not text.strip():
+            return
+        columns, bits = key
+        now = time.time()
+        with self.lock:
+            bucket = self.buckets[columns]
+            if bits not in bucket:
+                self.size += 1
+            bucket[bits] = [text, confidence, now]
+            self.write("INSERT OR REPLACE INTO lines VALUES (?, ?, ?, ?, ?)",
+                       (columns, format(bits, 'x'), text, confidence, now))
+            if self.size > self.capacity:
+                self.evict(self.size - self.capacity + int(self.capacity * EVICT_SHARE))
+
+    def evict(self, count):
+        """Drop the `count` least recently used entries"""
+        entries = sorted(
+            (entry[2], columns, bits)
+            for columns, bucket in self.buckets.items()
+            for bits, entry in bucket.items()
+        )
+        for _, columns, bits in entries[:count]:
+            del self.buckets[columns][bits]
+            self.size -= 1
+            self.write("DELETE FROM lines WHERE columns = ? AND hash = ?", (columns, format(bits, 'x')))
+
+    def resize(self, capacity):
+        with self.lock:
+            self.capacity = capacity
+            if self.size > capacity:
+                self.evict(self.size - capacity)
+
+    def trim(self, share=TRIM_SHARE):
+        """Drop the least recently used `share` of the entries, keeping the capacity"""
+        with self.lock:
+            self.evict(int(self.size * share))
+
+    def write(self, sql, params):
+        if self.db is None:
+            return
+        self.db.execute(sql, params)
+        self.pending_writes += 1
+        # Batch commits; a lost tail only costs a few re-recognitions
+        if self.pending_writes >= COMMIT_EVERY:
+            self.db.commit()
+            self.pending_writes = 0
+
+    def flush(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.commit()
+                self.pending_writes = 0
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+    def stats(self):
+        return {'entries': self.size, 'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self):
+        return self.size
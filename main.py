@@ -1,31 +1,49 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
-import easyocr
-import numpy as np
-import torch
-from googletrans import Translator
-import mss
 import threading
 import time
-from collections import defaultdict
 import warnings
 from PIL import Image, ImageTk, ImageDraw
 import io
 import keyboard
-import json
+import itertools
+import multiprocessing
 import sys, os
-import tempfile
+import sqlite3
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 
-def resource_path(relative_path):
-    """ Get absolute path to resource (for PyInstaller) """
-    if hasattr(sys, '_MEIPASS'):
-        return os.path.join(sys._MEIPASS, relative_path)
-    return os.path.join(os.path.abspath("."), relative_path)
+from config import Config, PERFORMANCE_DEFAULTS, config_dir
+from capture import (
+    ChangeSampler, build_capture_source, default_chat_region, list_monitors, PRIMARY_REGION, REGION_NAMES
+)
+from engine import TranslationEngine, Sink
+from glossary import load_glossary
+from line_cache import LineCache, DEFAULT_CACHE_FILE
+from memory_monitor import MemoryMonitor
+from ocr import OCREngine, check_cuda
+from ocr_scheduler import OCRScheduler
+from ocr_worker import IsolatedOCREngine
+from overlay import ChatOverlay
+from governor import ResourceGovernor
+from profiler import SamplingProfiler, DEFAULT_CAPTURES as PROFILE_CAPTURES
+from rate_limiter import RateLimiter
+from recorder import FrameRecorder, RecordingCaptureSource, recording_path
+from recognizer_router import SUPPORTED_LANGUAGES
+from regions import RegionProfiles, localize_chat_region
+from tracker import LineTracker
+from translation import create_translator, parse_target_languages, DEFAULT_TARGET_LANGUAGE
 
 # Suppress warnings
 warnings.filterwarnings('ignore', category=UserWarning)
 
+CONFIG_POLL_MS = 2000  # How often hand edits of the config file are picked up
+MEMORY_POLL_MS = 2000
+MEMORY_LOG_FILE = 'memory.log'
+OCR_LANGUAGE_NAMES = {
+    'en': "English", 'ru': "Russian", 'tr': "Turkish", 'ja': "Japanese", 'ko': "Korean", 'zh': "Chinese",
+}
+
 dark_mode = {
     'bg_primary': '#0d1117',
     'bg_secondary': '#161b22', 
@@ -55,6 +73,90 @@ light_mode = {
 }
 
 
+class ChatLogSink(Sink):
+    """Render engine output into the UI log"""
+
+    def __init__(self, app):
+        self.app = app
+        self.marks = {}  # id(entry) -> text mark of its provisional translation line
+        self.mark_ids = itertools.count(1)
+
+    def lines_grouped(self, frame, messages):
+        self.app.log_message("─" * 60, "header")
+        self.app.log_message("📝 TRANSLATION RESULTS", "header")
+        self.app.log_message("─" * 60, "header")
+
+    def forget_marks(self, marks):
+        """Drop marks whose text was trimmed from the log"""
+        self.marks = {key: mark for key, mark in self.marks.items() if mark not in marks}
+
+    def message_header(self, entry):
+        region = f" [{entry['region']}]" if entry.get('region') and entry['region'] != PRIMARY_REGION else ""
+        self.app.log_message(f"\n💬 Message {entry['index']}{region}:", "header")
+        self.app.log_message(f"   Original: {entry['original']}", "original")
+
+    def translation_line(self, translations, suffix=""):
+        """One log line with every target language side by side"""
+        targets = self.app.target_languages
+        if len(targets) == 1:
+            label = OCR_LANGUAGE_NAMES.get(targets[0], targets[0].upper())
+            return f"   {label}:  {translations.get(targets[0]) or '…'}{suffix}"
+        return "   " + "  │  ".join(f"{dest.upper()}: {translations.get(dest) or '…'}" for dest in targets) + suffix
+
+    def message_provisional(self, frame, entry):
+        mark = f"provisional{next(self.mark_ids)}"
+        self.marks[id(entry)] = mark
+        self.message_header(entry)
+        self.app.log_message(self.translation_line({}), "info", mark=mark)
+
+    def message_drafted(self, frame, entry):
+        drafts = entry['drafts']
+        text = self.translation_line(drafts, "  (draft)" if any(drafts.values()) else "")
+        mark = self.marks.get(id(entry))
+        if mark:
+            self.app.replace_message(mark, text, "draft", final=False)
+        else:
+            mark = f"provisional{next(self.mark_ids)}"
+            self.marks[id(entry)] = mark
+            self.message_header(entry)
+            self.app.log_message(text, "draft", mark=mark)
+        # Clicking a draft moves its translation to the front of the queue
+        self.app.on_message_click(mark, lambda: self.app.prioritize_entry(entry))
+
+    def message_translated(self, frame, entry):
+        mark = self.marks.pop(id(entry), None)
+        if mark:
+            # Replace the provisional line in place
+            if entry['error'] and any(entry.get('drafts', {}).values()):
+                merged = {**entry['drafts'], **entry['translations']}
+                self.app.replace_message(mark, self.translation_line(merged, "  (draft, translation failed)"), "draft")
+            elif entry['error'] and not entry['translations']:
+                self.app.replace_message(mark, f"   ❌ Translation failed: {entry['error']}", "error")
+            else:
+                self.app.replace_message(mark, self.translation_line(entry['translations']), "translated")
+            return
+        
+        if entry['error'] and not entry['translations']:
+            self.app.log_message(f"❌ Translation failed for message {entry['index']}: {entry['error']}", "error")
+            self.app.log_message(f"   Original text: {entry['original']}", "original")
+            return
+
+        self.message_header(entry)
+        self.app.log_message(self.translation_line(entry['translations']), "translated")
+
+    def frame_finished(self, frame, result):
+        if result['held']:
+            self.app.log_message(
+                f"⏳ {len(result['held'])} unclear message(s) held until a later capture confirms them.", "info"
+            )
+        if result['status'] == 'ok':
+            self.app.log_message("─" * 60, "header")
+        elif result['status'] == 'no_messages':
+            self.app.log_message("🔍 No readable messages found.", "info")
+        elif result['status'] == 'no_text':
+            self.app.log_message("👀 No text detected in capture area.", "info")
+
+
 class ModernOCRTranslatorUI:
     def __init__(self, root):
         self.root = root
@@ -67,50 +169,118 @@ class ModernOCRTranslatorUI:
         self.colors = dark_mode
         
         # Initialize variables
-        self.reader = None
+        self.ocr = None
         self.translator = None
+        self.engine = None
+        self.capture_source = None
         self.using_gpu = False
         self.is_running = False
         self.capture_thread = None
         self.monitor_info = None
+        self.monitor_index = 1
         self.box_coordinates = None
+        self.area_source = "default"  # default, custom or auto
+        self.capture_regions = {}  # Region name -> screen region, grabbed together
+        self.edit_region = PRIMARY_REGION  # Region the area tools apply to
+        self.region_profiles = RegionProfiles()
         self.current_tab = "home"
         self.capture_key = "F9"
+        self.profile_key = "F10"  # Profiles the next captures
+        self.profiler = None
+        self.recorder = None  # Set while captures are being recorded
+        self.chat_log_sink = ChatLogSink(self)
+        self.capture_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='capture')
+        self.process_lock = threading.Lock()  # Manual and continuous captures share one engine
+        self.translation_server = ""  # Empty = translate directly
+        self.glossary_path = ""  # User glossary, merged over the bundled one
+        self.tiered_translation = True  # Local draft first, remote translation replaces it
+        self.target_languages = [DEFAULT_TARGET_LANGUAGE]  # Shown side by side, first one is the primary
+        self.glossary = None
         self.highlight_overlay = None  # Track the highlight overlay
+        self.overlay_enabled = False  # Translations drawn in-game beside the chat box
+        self.overlay = None
+        self.continuous = False  # Continuous capture mode
+        self.continuous_thread = None
+        self.change_sampler = None  # Continuous mode's change detector
+        self.config = Config()
+        self.performance = dict(PERFORMANCE_DEFAULTS)  # Live-applied knobs, see apply_performance_settings
         
         # Settings
         self.load_settings()
+        self.rate_limiter = RateLimiter(self.performance['translation_rate'], self.performance['translation_burst'])
+        self.governor = ResourceGovernor(
+            self.performance['cpu_budget'],
+            self.performance['capture_interval'],
+            self.performance['max_ocr_threads'] or None
+        )
+        line_cache_path = os.path.join(config_dir(), DEFAULT_CACHE_FILE)
+        self.line_cache_error = None
+        if self.performance['isolated_ocr']:
+            self.ocr = IsolatedOCREngine(
+                max_threads=self.governor.max_threads,
+                on_status=lambda message, status: self.update_status("ocr", message, status),
+                line_cache_path=line_cache_path
+            )
+            self.governor.cpu_sources.append(self.ocr.cpu_time)
+        else:
+            self.ocr = OCREngine(self.ocr_languages, line_cache=self.open_line_cache(line_cache_path))
+        self.configure_ocr(self.performance)
+        self.config.on_performance_change(self.apply_performance_settings)
+        self.memory_monitor = MemoryMonitor(
+            os.path.join(config_dir(), MEMORY_LOG_FILE),
+            interval=self.performance['memory_interval'],
+            trim_mb=self.performance['memory_trim_mb'],
+            restart_mb=self.performance['memory_restart_mb'],
+            trace=self.performance['memory_tracemalloc'],
+            trim=self.trim_memory,
+            restart=self.restart_ocr_worker,
+            worker_pid=lambda: getattr(self.ocr, 'pid', None)
+        )
+        self.memory_monitor.start()
         
         # Setup UI
         self.setup_ui()
+        self.root.after(CONFIG_POLL_MS, self.watch_config)
         
         # Initialize components
         self.initialize_components()
         
     def load_settings(self):
-        """Load settings from temp folder"""
-        try:
-            settings_path = os.path.join(tempfile.gettempdir(), 'valorant_translator_settings.json')
-            with open(settings_path, 'r') as f:
-                settings = json.load(f)
-                self.capture_key = settings.get('capture_key', 'F9')
-                self.box_coordinates = settings.get('box_coordinates', None)
-        except:
-            pass
+        """Load settings from the per-user config file"""
+        self.config.load()
+        self.capture_key = self.config.get('capture_key')
+        self.profile_key = self.config.get('profile_key')
+        self.box_coordinates = self.config.get('box_coordinates')
+        self.monitor_index = self.config.get('monitor_index')
+        self.region_profiles = RegionProfiles(self.config.get('region_profiles'))
+        self.translation_server = self.config.get('translation_server')
+        self.glossary_path = self.config.get('glossary_path')
+        self.tiered_translation = self.config.get('tiered_translation')
+        self.overlay_enabled = self.config.get('overlay')
+        self.ocr_languages = [code for code in self.config.get('ocr_languages') if code in SUPPORTED_LANGUAGES]
+        self.target_languages = self.config.get('target_languages') or [DEFAULT_TARGET_LANGUAGE]
+        self.performance = self.config.performance
             
     def save_settings(self):
-        """Save settings to temp folder"""
-        settings = {
-            'capture_key': self.capture_key,
-            'box_coordinates': self.box_coordinates,
-            'color_mode': self.colors
-        }
-        try:
-            settings_path = os.path.join(tempfile.gettempdir(), 'valorant_translator_settings.json')
-            with open(settings_path, 'w') as f:
-                json.dump(settings, f, indent=2)
-        except:
-            pass
+        """Queue a save of the current settings (written shortly after the last change)"""
+        self.config.update(
+            capture_key=self.capture_key,
+            profile_key=self.profile_key,
+            box_coordinates=self.box_coordinates if self.area_source != "default" else None,
+            monitor_index=self.monitor_index,
+            region_profiles=self.region_profiles.to_dict(),
+            translation_server=self.translation_server,
+            glossary_path=self.glossary_path,
+            tiered_translation=self.tiered_translation,
+            overlay=self.overlay_enabled,
+            ocr_languages=self.ocr_languages,
+            target_languages=self.target_languages
+        )
+        
+    def watch_config(self):
+        """Apply hand edits of the config file while running"""
+        self.config.reload_if_changed()
+        self.root.after(CONFIG_POLL_MS, self.watch_config)
         
     def setup_ui(self):
         """Setup the main UI components"""
@@ -231,7 +401,10 @@ class ModernOCRTranslatorUI:
             ('gpu', 'GPU'),
             ('ocr', 'OCR Engine'), 
             ('translator', 'Translator'),
-            ('screen', 'Screen Capture')
+            ('screen', 'Screen Capture'),
+            ('cpu', 'CPU Budget'),
+            ('queue', 'Translation Queue'),
+            ('memory', 'Memory')
         ]
         
         for key, label in indicators:
@@ -394,6 +567,20 @@ class ModernOCRTranslatorUI:
         )
         self.capture_btn.pack(side='left', padx=(0, 15))
         
+        # Continuous capture toggle
+        self.continuous_btn = self.create_rounded_button(
+            buttons_frame,
+            text="▶ Continuous",
+            command=self.toggle_auto_capture,
+            bg=self.colors['accent_secondary'],
+            fg='white',
+            font=('Segoe UI', 11),
+            padx=20,
+            pady=12,
+            state='disabled'
+        )
+        self.continuous_btn.pack(side='left', padx=(0, 15))
+        
         # Clear button
         clear_btn = self.create_rounded_button(
             buttons_frame,
@@ -465,8 +652,28 @@ class ModernOCRTranslatorUI:
         """Setup settings tab content"""
         self.settings_frame = tk.Frame(self.content_frame, bg=self.colors['bg_primary'])
         
+        # Scrollable body so sections can grow past the window height
+        settings_canvas = tk.Canvas(self.settings_frame, bg=self.colors['bg_primary'], highlightthickness=0)
+        settings_scrollbar = ttk.Scrollbar(self.settings_frame, orient='vertical', command=settings_canvas.yview)
+        self.settings_body = tk.Frame(settings_canvas, bg=self.colors['bg_primary'])
+        body_window = settings_canvas.create_window((0, 0), window=self.settings_body, anchor='nw')
+        
+        self.settings_body.bind(
+            '<Configure>', lambda e: settings_canvas.configure(scrollregion=settings_canvas.bbox('all'))
+        )
+        settings_canvas.bind('<Configure>', lambda e: settings_canvas.itemconfig(body_window, width=e.width))
+        settings_canvas.configure(yscrollcommand=settings_scrollbar.set)
+        settings_scrollbar.pack(side='right', fill='y')
+        settings_canvas.pack(side='left', fill='both', expand=True)
+        
+        def on_mousewheel(event):
+            settings_canvas.yview_scroll(int(-event.delta / 120) or (-1 if event.delta > 0 else 1), 'units')
+        
+        self.settings_frame.bind('<Enter>', lambda e: self.root.bind_all('<MouseWheel>', on_mousewheel))
+        self.settings_frame.bind('<Leave>', lambda e: self.root.unbind_all('<MouseWheel>'))
+        
         # Header
-        header_frame = tk.Frame(self.settings_frame, bg=self.colors['bg_primary'])
+        header_frame = tk.Frame(self.settings_body, bg=self.colors['bg_primary'])
         header_frame.pack(fill='x', padx=30, pady=(30, 20))
         
         title = tk.Label(
@@ -490,10 +697,14 @@ class ModernOCRTranslatorUI:
         # Settings sections
         self.setup_key_binding_settings()
         self.setup_capture_area_settings()
+        self.setup_chat_language_settings()
+        self.setup_translation_service_settings()
+        self.setup_performance_settings()
+        self.setup_diagnostics_settings()
         
     def setup_key_binding_settings(self):
         """Setup key binding settings"""
-        section_frame = tk.Frame(self.settings_frame, bg=self.colors['bg_secondary'])
+        section_frame = tk.Frame(self.settings_body, bg=self.colors['bg_secondary'])
         section_frame.pack(fill='x', padx=30, pady=(0, 20))
         
         inner_frame = tk.Frame(section_frame, bg=self.colors['bg_secondary'])
@@ -547,9 +758,58 @@ class ModernOCRTranslatorUI:
         )
         test_btn.pack(side='left')
         
+        # Profiling
+        profile_frame = tk.Frame(inner_frame, bg=self.colors['bg_secondary'])
+        profile_frame.pack(fill='x', pady=(15, 0))
+        
+        profile_label = tk.Label(
+            profile_frame,
+            text="Profile Key:",
+            font=('Segoe UI', 11),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        profile_label.pack(side='left', padx=(0, 10))
+        
+        self.profile_key_var = tk.StringVar(value=self.profile_key)
+        profile_combo = ttk.Combobox(
+            profile_frame,
+            textvariable=self.profile_key_var,
+            values=['F1', 'F2', 'F3', 'F4','F5', 'F6', 'F7', 'F8', 'F9', 'F10', 'F11', 'F12'],
+            state='readonly',
+            font=('Segoe UI', 11),
+            width=15
+        )
+        profile_combo.pack(side='left', padx=(0, 15))
+        profile_combo.bind('<<ComboboxSelected>>', self.update_profile_key)
+        
+        self.profile_btn = self.create_rounded_button(
+            profile_frame,
+            text=f"🔬 Profile next {PROFILE_CAPTURES} captures",
+            command=self.toggle_profiling,
+            bg=self.colors['bg_tertiary'],
+            fg=self.colors['text_primary'],
+            font=('Segoe UI', 10),
+            padx=15,
+            pady=8
+        )
+        self.profile_btn.pack(side='left', padx=(0, 10))
+        
+        self.record_btn = self.create_rounded_button(
+            profile_frame,
+            text="⏺ Record captures",
+            command=self.toggle_recording,
+            bg=self.colors['bg_tertiary'],
+            fg=self.colors['text_primary'],
+            font=('Segoe UI', 10),
+            padx=15,
+            pady=8
+        )
+        self.record_btn.pack(side='left')
+        
     def setup_capture_area_settings(self):
         """Setup capture area settings"""
-        section_frame = tk.Frame(self.settings_frame, bg=self.colors['bg_secondary'])
+        section_frame = tk.Frame(self.settings_body, bg=self.colors['bg_secondary'])
         section_frame.pack(fill='x', padx=30, pady=(0, 20))
         
         inner_frame = tk.Frame(section_frame, bg=self.colors['bg_secondary'])
@@ -575,10 +835,75 @@ class ModernOCRTranslatorUI:
         )
         self.area_info_label.pack(anchor='w', pady=(0, 15))
         
+        # Monitor selection
+        monitor_frame = tk.Frame(inner_frame, bg=self.colors['bg_secondary'])
+        monitor_frame.pack(fill='x', pady=(0, 15))
+        
+        monitor_label = tk.Label(
+            monitor_frame,
+            text="Monitor:",
+            font=('Segoe UI', 11),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        monitor_label.pack(side='left', padx=(0, 10))
+        
+        try:
+            monitors = list_monitors()[1:]
+        except Exception:
+            monitors = []
+        monitor_names = [f"{i}: {m['width']}×{m['height']}" for i, m in enumerate(monitors, 1)]
+        self.monitor_var = tk.StringVar(
+            value=monitor_names[self.monitor_index - 1] if 0 < self.monitor_index <= len(monitor_names) else ""
+        )
+        monitor_combo = ttk.Combobox(
+            monitor_frame,
+            textvariable=self.monitor_var,
+            values=monitor_names,
+            state='readonly',
+            font=('Segoe UI', 11),
+            width=15
+        )
+        monitor_combo.pack(side='left', padx=(0, 25))
+        monitor_combo.bind('<<ComboboxSelected>>', self.update_monitor)
+        
+        region_label = tk.Label(
+            monitor_frame,
+            text="Region:",
+            font=('Segoe UI', 11),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        region_label.pack(side='left', padx=(0, 10))
+        
+        self.region_var = tk.StringVar(value=self.edit_region)
+        region_combo = ttk.Combobox(
+            monitor_frame,
+            textvariable=self.region_var,
+            values=list(REGION_NAMES),
+            state='readonly',
+            font=('Segoe UI', 11),
+            width=15
+        )
+        region_combo.pack(side='left')
+        region_combo.bind('<<ComboboxSelected>>', self.update_edit_region)
+        
         # Buttons
         buttons_frame = tk.Frame(inner_frame, bg=self.colors['bg_secondary'])
         buttons_frame.pack(fill='x')
         
+        auto_area_btn = self.create_rounded_button(
+            buttons_frame,
+            text="🎯 Auto-detect",
+            command=self.auto_detect_capture_area,
+            bg=self.colors['accent_primary'],
+            fg='white',
+            font=('Segoe UI', 11),
+            padx=20,
+            pady=12
+        )
+        auto_area_btn.pack(side='left', padx=(0, 15))
+        
         select_area_btn = self.create_rounded_button(
             buttons_frame,
             text="📐 Select Custom Area",
@@ -616,6 +941,540 @@ class ModernOCRTranslatorUI:
         )
         reset_area_btn.pack(side='left')
         
+        self.overlay_var = tk.BooleanVar(value=self.overlay_enabled)
+        overlay_check = tk.Checkbutton(
+            inner_frame,
+            text="Show translations in-game, beside the chat box (click-through overlay)",
+            variable=self.overlay_var,
+            command=self.update_overlay,
+            font=('Segoe UI', 10),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary'],
+            selectcolor=self.colors['bg_tertiary'],
+            activebackground=self.colors['bg_secondary'],
+            activeforeground=self.colors['text_primary']
+        )
+        overlay_check.pack(anchor='w', pady=(15, 0))
+        
+    def update_overlay(self):
+        """Turn the in-game overlay on or off"""
+        self.overlay_enabled = self.overlay_var.get()
+        self.save_settings()
+        if self.overlay_enabled:
+            self.show_overlay()
+        else:
+            self.hide_overlay()
+        
+    def show_overlay(self):
+        """Draw translations beside the chat box from now on"""
+        if self.overlay or not self.engine or not self.box_coordinates:
+            return  # Shown once the engine is ready
+        self.overlay = ChatOverlay(self.root, self.box_coordinates)
+        self.engine.add_sink(self.overlay)
+        
+    def hide_overlay(self):
+        if not self.overlay:
+            return
+        if self.engine:
+            self.engine.remove_sink(self.overlay)
+        self.overlay.close()
+        self.overlay = None
+        
+    def setup_chat_language_settings(self):
+        """Setup the languages the OCR should read"""
+        section_frame = tk.Frame(self.settings_body, bg=self.colors['bg_secondary'])
+        section_frame.pack(fill='x', padx=30, pady=(0, 20))
+        
+        inner_frame = tk.Frame(section_frame, bg=self.colors['bg_secondary'])
+        inner_frame.pack(fill='x', padx=25, pady=20)
+        
+        # Title
+        section_title = tk.Label(
+            inner_frame,
+            text="Chat Languages",
+            font=('Segoe UI', 14, 'bold'),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        section_title.pack(anchor='w', pady=(0, 5))
+        
+        info_label = tk.Label(
+            inner_frame,
+            text="Scripts the OCR should read. Extra recognizers load the first time a line needs them.",
+            font=('Segoe UI', 10),
+            fg=self.colors['text_secondary'],
+            bg=self.colors['bg_secondary']
+        )
+        info_label.pack(anchor='w', pady=(0, 15))
+        
+        languages_frame = tk.Frame(inner_frame, bg=self.colors['bg_secondary'])
+        languages_frame.pack(fill='x')
+        
+        self.ocr_language_vars = {}
+        for code in SUPPORTED_LANGUAGES:
+            variable = tk.BooleanVar(value=code in self.ocr_languages)
+            check = tk.Checkbutton(
+                languages_frame,
+                text=OCR_LANGUAGE_NAMES[code],
+                variable=variable,
+                command=self.update_ocr_languages,
+                font=('Segoe UI', 10),
+                fg=self.colors['text_primary'],
+                bg=self.colors['bg_secondary'],
+                selectcolor=self.colors['bg_tertiary'],
+                activebackground=self.colors['bg_secondary'],
+                activeforeground=self.colors['text_primary']
+            )
+            check.pack(side='left', padx=(0, 15))
+            self.ocr_language_vars[code] = variable
+        
+    def update_ocr_languages(self):
+        """Route chat lines to the recognizers of the checked languages"""
+        self.ocr_languages = [code for code, variable in self.ocr_language_vars.items() if variable.get()]
+        self.save_settings()
+        self.ocr.configure(languages=self.ocr_languages)
+        
+    def setup_translation_service_settings(self):
+        """Setup shared translation service settings"""
+        section_frame = tk.Frame(self.settings_body, bg=self.colors['bg_secondary'])
+        section_frame.pack(fill='x', padx=30, pady=(0, 20))
+        
+        inner_frame = tk.Frame(section_frame, bg=self.colors['bg_secondary'])
+        inner_frame.pack(fill='x', padx=25, pady=20)
+        
+        # Title
+        section_title = tk.Label(
+            inner_frame,
+            text="Translation Service",
+            font=('Segoe UI', 14, 'bold'),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        section_title.pack(anchor='w', pady=(0, 5))
+        
+        info_label = tk.Label(
+            inner_frame,
+            text="Point at a shared translation daemon (python cli.py serve). Leave empty to translate directly.",
+            font=('Segoe UI', 10),
+            fg=self.colors['text_secondary'],
+            bg=self.colors['bg_secondary']
+        )
+        info_label.pack(anchor='w', pady=(0, 15))
+        
+        server_frame = tk.Frame(inner_frame, bg=self.colors['bg_secondary'])
+        server_frame.pack(fill='x')
+        
+        server_label = tk.Label(
+            server_frame,
+            text="Server URL:",
+            font=('Segoe UI', 11),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        server_label.pack(side='left', padx=(0, 10))
+        
+        self.server_var = tk.StringVar(value=self.translation_server)
+        server_entry = tk.Entry(
+            server_frame,
+            textvariable=self.server_var,
+            font=('Segoe UI', 11),
+            bg=self.colors['bg_tertiary'],
+            fg=self.colors['text_primary'],
+            insertbackground=self.colors['text_primary'],
+            relief='flat',
+            width=35
+        )
+        server_entry.pack(side='left', padx=(0, 15), ipady=4)
+        
+        apply_btn = self.create_rounded_button(
+            server_frame,
+            text="Apply",
+            command=self.update_translation_server,
+            bg=self.colors['accent_secondary'],
+            fg='white',
+            font=('Segoe UI', 10),
+            padx=15,
+            pady=8
+        )
+        apply_btn.pack(side='left')
+        
+        # Target languages
+        targets_frame = tk.Frame(inner_frame, bg=self.colors['bg_secondary'])
+        targets_frame.pack(fill='x', pady=(15, 0))
+        
+        targets_label = tk.Label(
+            targets_frame,
+            text="Translate to:",
+            font=('Segoe UI', 11),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        targets_label.pack(side='left', padx=(0, 10))
+        
+        self.targets_var = tk.StringVar(value=",".join(self.target_languages))
+        targets_entry = tk.Entry(
+            targets_frame,
+            textvariable=self.targets_var,
+            font=('Segoe UI', 11),
+            bg=self.colors['bg_tertiary'],
+            fg=self.colors['text_primary'],
+            insertbackground=self.colors['text_primary'],
+            relief='flat',
+            width=15
+        )
+        targets_entry.pack(side='left', padx=(0, 15), ipady=4)
+        
+        targets_btn = self.create_rounded_button(
+            targets_frame,
+            text="Apply",
+            command=self.update_target_languages,
+            bg=self.colors['accent_secondary'],
+            fg='white',
+            font=('Segoe UI', 10),
+            padx=15,
+            pady=8
+        )
+        targets_btn.pack(side='left', padx=(0, 15))
+        
+        targets_info = tk.Label(
+            targets_frame,
+            text="Comma separated codes, e.g. en,de,pt",
+            font=('Segoe UI', 10),
+            fg=self.colors['text_secondary'],
+            bg=self.colors['bg_secondary']
+        )
+        targets_info.pack(side='left')
+        
+        # Glossary
+        glossary_frame = tk.Frame(inner_frame, bg=self.colors['bg_secondary'])
+        glossary_frame.pack(fill='x', pady=(15, 0))
+        
+        self.glossary_info_label = tk.Label(
+            glossary_frame,
+            text=self.glossary_info_text(),
+            font=('Segoe UI', 10),
+            fg=self.colors['text_secondary'],
+            bg=self.colors['bg_secondary']
+        )
+        self.glossary_info_label.pack(side='left', padx=(0, 15))
+        
+        choose_glossary_btn = self.create_rounded_button(
+            glossary_frame,
+            text="📖 Choose Glossary",
+            command=self.choose_glossary,
+            bg=self.colors['bg_tertiary'],
+            fg=self.colors['text_primary'],
+            font=('Segoe UI', 10),
+            padx=15,
+            pady=8
+        )
+        choose_glossary_btn.pack(side='left', padx=(0, 10))
+        
+        reload_glossary_btn = self.create_rounded_button(
+            glossary_frame,
+            text="↻ Reload",
+            command=self.reload_glossary,
+            bg=self.colors['bg_tertiary'],
+            fg=self.colors['text_primary'],
+            font=('Segoe UI', 10),
+            padx=15,
+            pady=8
+        )
+        reload_glossary_btn.pack(side='left')
+        
+        self.tiered_var = tk.BooleanVar(value=self.tiered_translation)
+        tiered_check = tk.Checkbutton(
+            inner_frame,
+            text="Show a glossary draft at once and replace it when the full translation arrives",
+            variable=self.tiered_var,
+            command=self.update_tiered_translation,
+            font=('Segoe UI', 10),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary'],
+            selectcolor=self.colors['bg_tertiary'],
+            activebackground=self.colors['bg_secondary'],
+            activeforeground=self.colors['text_primary']
+        )
+        tiered_check.pack(anchor='w', pady=(15, 0))
+        
+    def update_target_languages(self):
+        """Translate each capture into the listed languages; OCR still runs once"""
+        targets = parse_target_languages(self.targets_var.get())
+        if not targets:
+            messagebox.showerror("Invalid Languages", "Enter at least one target language code, e.g. en")
+            return
+        self.target_languages = targets
+        self.targets_var.set(",".join(targets))
+        self.save_settings()
+        if self.engine:
+            self.engine.targets = list(targets)
+        
+    def update_tiered_translation(self):
+        """Switch between draft-then-refine and wait-for-translation output"""
+        self.tiered_translation = self.tiered_var.get()
+        self.save_settings()
+        if self.engine:
+            self.engine.tiered = self.tiered_translation
+        
+    def glossary_info_text(self):
+        """Describe the loaded glossary"""
+        source = os.path.basename(self.glossary_path) if self.glossary_path else "built-in"
+        count = len(self.glossary) if self.glossary else 0
+        return f"Glossary: {source} ({count} phrases)"
+        
+    def choose_glossary(self):
+        """Pick a user glossary file"""
+        path = filedialog.askopenfilename(
+            title="Choose glossary",
+            filetypes=[("Glossary", "*.json"), ("All files", "*.*")]
+        )
+        if path:
+            self.glossary_path = path
+            self.save_settings()
+            self.reload_glossary()
+        
+    def reload_glossary(self):
+        """Reload glossary files and rebuild the translator"""
+        try:
+            self.glossary = load_glossary(self.glossary_path)
+        except Exception as e:
+            messagebox.showerror("Glossary Error", f"Could not load glossary: {e}")
+            return
+        self.glossary_info_label.config(text=self.glossary_info_text())
+        if self.translator:
+            self.update_translation_server()
+        
+    def update_translation_server(self):
+        """Switch between direct translation and the shared daemon"""
+        self.translation_server = self.server_var.get().strip()
+        self.save_settings()
+        
+        self.translator = create_translator(
+            self.translation_server, self.glossary, self.performance['translation_cache_size'], self.rate_limiter
+        )
+        if self.engine:
+            self.engine.translator = self.translator
+        self.update_status("translator", self.translator_status_text(), "success")
+        
+    def translator_status_text(self):
+        """Describe the active translation backend"""
+        return "Ready (shared)" if self.translation_server else "Ready"
+        
+    def setup_performance_settings(self):
+        """Setup CPU budget settings"""
+        section_frame = tk.Frame(self.settings_body, bg=self.colors['bg_secondary'])
+        section_frame.pack(fill='x', padx=30, pady=(0, 20))
+        
+        inner_frame = tk.Frame(section_frame, bg=self.colors['bg_secondary'])
+        inner_frame.pack(fill='x', padx=25, pady=20)
+        
+        # Title
+        section_title = tk.Label(
+            inner_frame,
+            text="Performance",
+            font=('Segoe UI', 14, 'bold'),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        section_title.pack(anchor='w', pady=(0, 5))
+        
+        info_label = tk.Label(
+            inner_frame,
+            text="Keep the translator inside a CPU budget so the game keeps its frame rate.\n"
+                 f"More options are in {self.config.path}; edits there apply while running.",
+            font=('Segoe UI', 10),
+            justify='left',
+            fg=self.colors['text_secondary'],
+            bg=self.colors['bg_secondary']
+        )
+        info_label.pack(anchor='w', pady=(0, 15))
+        
+        fields_frame = tk.Frame(inner_frame, bg=self.colors['bg_secondary'])
+        fields_frame.pack(fill='x')
+        
+        self.cpu_budget_var = tk.StringVar(value=str(self.performance['cpu_budget']))
+        self.capture_interval_var = tk.StringVar(value=str(self.performance['capture_interval']))
+        self.max_threads_var = tk.StringVar(value=str(self.performance['max_ocr_threads']))
+        self.min_confidence_var = tk.StringVar(value=str(self.performance['min_confidence']))
+        self.translation_rate_var = tk.StringVar(value=str(self.performance['translation_rate']))
+        self.translation_burst_var = tk.StringVar(value=str(self.performance['translation_burst']))
+        
+        fields = [
+            ("CPU budget (%):", self.cpu_budget_var, 5, 100, 5),
+            ("Continuous interval (s):", self.capture_interval_var, 0.25, 30, 0.25),
+            ("OCR threads (0 = auto):", self.max_threads_var, 0, os.cpu_count() or 8, 1),
+            ("Min. confidence:", self.min_confidence_var, 0, 1, 0.05),
+            ("Translations per second:", self.translation_rate_var, 0.1, 50, 0.5),
+            ("Translation burst:", self.translation_burst_var, 1, 100, 1),
+        ]
+        for i, (label_text, variable, low, high, step) in enumerate(fields):
+            row, column = divmod(i, 2)
+            label = tk.Label(
+                fields_frame,
+                text=label_text,
+                font=('Segoe UI', 11),
+                fg=self.colors['text_primary'],
+                bg=self.colors['bg_secondary']
+            )
+            label.grid(row=row, column=column * 2, sticky='w', padx=(0, 8), pady=4)
+            
+            spinbox = tk.Spinbox(
+                fields_frame,
+                textvariable=variable,
+                from_=low,
+                to=high,
+                increment=step,
+                width=6,
+                font=('Segoe UI', 11),
+                bg=self.colors['bg_tertiary'],
+                fg=self.colors['text_primary'],
+                buttonbackground=self.colors['bg_tertiary'],
+                relief='flat'
+            )
+            spinbox.grid(row=row, column=column * 2 + 1, sticky='w', padx=(0, 20), pady=4)
+        
+        apply_btn = self.create_rounded_button(
+            fields_frame,
+            text="Apply",
+            command=self.update_performance_settings,
+            bg=self.colors['accent_secondary'],
+            fg='white',
+            font=('Segoe UI', 10),
+            padx=15,
+            pady=8
+        )
+        apply_btn.grid(row=0, column=4, rowspan=len(fields) // 2, sticky='w')
+        
+        self.isolated_ocr_var = tk.BooleanVar(value=self.performance['isolated_ocr'])
+        isolated_check = tk.Checkbutton(
+            inner_frame,
+            text="Run OCR in a separate process (takes effect after restart)",
+            variable=self.isolated_ocr_var,
+            command=self.update_performance_settings,
+            font=('Segoe UI', 10),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary'],
+            selectcolor=self.colors['bg_tertiary'],
+            activebackground=self.colors['bg_secondary'],
+            activeforeground=self.colors['text_primary']
+        )
+        isolated_check.pack(anchor='w', pady=(15, 0))
+        
+    def setup_diagnostics_settings(self):
+        """Setup the live memory report"""
+        section_frame = tk.Frame(self.settings_body, bg=self.colors['bg_secondary'])
+        section_frame.pack(fill='x', padx=30, pady=(0, 20))
+        
+        inner_frame = tk.Frame(section_frame, bg=self.colors['bg_secondary'])
+        inner_frame.pack(fill='x', padx=25, pady=20)
+        
+        # Title
+        section_title = tk.Label(
+            inner_frame,
+            text="Diagnostics",
+            font=('Segoe UI', 14, 'bold'),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        section_title.pack(anchor='w', pady=(0, 5))
+        
+        info_label = tk.Label(
+            inner_frame,
+            text=f"Memory snapshots are also written to {os.path.join(config_dir(), MEMORY_LOG_FILE)}.\n"
+                 "Soft limits (memory_trim_mb, memory_restart_mb) are set in the config file.",
+            font=('Segoe UI', 10),
+            justify='left',
+            fg=self.colors['text_secondary'],
+            bg=self.colors['bg_secondary']
+        )
+        info_label.pack(anchor='w', pady=(0, 15))
+        
+        self.diagnostics_label = tk.Label(
+            inner_frame,
+            text=self.diagnostics_text(None),
+            font=('Consolas', 9),
+            justify='left',
+            anchor='w',
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary']
+        )
+        self.diagnostics_label.pack(anchor='w', fill='x')
+        
+        self.tracemalloc_var = tk.BooleanVar(value=self.performance['memory_tracemalloc'])
+        tracemalloc_check = tk.Checkbutton(
+            inner_frame,
+            text="Trace Python allocations (shows which code grows; slows the app down)",
+            variable=self.tracemalloc_var,
+            command=lambda: self.config.update_performance(memory_tracemalloc=self.tracemalloc_var.get()),
+            font=('Segoe UI', 10),
+            fg=self.colors['text_primary'],
+            bg=self.colors['bg_secondary'],
+            selectcolor=self.colors['bg_tertiary'],
+            activebackground=self.colors['bg_secondary'],
+            activeforeground=self.colors['text_primary']
+        )
+        tracemalloc_check.pack(anchor='w', pady=(15, 0))
+        
+    def update_performance_settings(self):
+        """Store the Performance fields; apply_performance_settings puts them to work"""
+        try:
+            values = {
+                'cpu_budget': float(self.cpu_budget_var.get()),
+                'capture_interval': float(self.capture_interval_var.get()),
+                'max_ocr_threads': int(self.max_threads_var.get()),
+                'min_confidence': float(self.min_confidence_var.get()),
+                'translation_rate': float(self.translation_rate_var.get()),
+                'translation_burst': int(self.translation_burst_var.get()),
+                'isolated_ocr': self.isolated_ocr_var.get()
+            }
+        except ValueError:
+            messagebox.showwarning("Invalid Value", "Please enter numbers only.")
+            return
+        
+        self.config.update_performance(**values)
+        
+    def apply_performance_settings(self, performance, changed):
+        """Hot-apply changed performance settings to the running components"""
+        self.performance = performance
+        
+        if changed & {'cpu_budget', 'capture_interval', 'max_ocr_threads'}:
+            self.governor.configure(
+                performance['cpu_budget'], performance['capture_interval'], performance['max_ocr_threads'] or None
+            )
+            if performance['max_ocr_threads']:
+                self.governor.apply_thread_cap(self.ocr.scheduler)
+        if changed & {'ocr_width_ths', 'ocr_height_ths', 'line_cache_size', 'recognizer_memory_mb'}:
+            self.configure_ocr(performance)
+        if 'change_threshold' in changed and self.change_sampler:
+            self.change_sampler.threshold = performance['change_threshold']
+        if changed & {'translation_rate', 'translation_burst'}:
+            self.rate_limiter.configure(performance['translation_rate'], performance['translation_burst'])
+        if 'translation_cache_size' in changed and self.translator:
+            self.translator.set_cache_size(performance['translation_cache_size'])
+        if self.engine:
+            self.engine.confidence_gate.threshold = performance['min_confidence']
+            if 'translation_workers' in changed:
+                self.engine.set_translation_workers(performance['translation_workers'])
+        if changed & {'memory_interval', 'memory_trim_mb', 'memory_restart_mb', 'memory_tracemalloc'}:
+            self.memory_monitor.configure(
+                performance['memory_interval'], performance['memory_trim_mb'],
+                performance['memory_restart_mb'], performance['memory_tracemalloc']
+            )
+            self.root.after(0, lambda: self.tracemalloc_var.set(performance['memory_tracemalloc']))
+        if 'log_max_lines' in changed:
+            self.root.after(0, self.trim_log)
+        if 'isolated_ocr' in changed:
+            self.log_message("ℹ️ OCR process mode changes after a restart.", "info")
+        
+        # Reflect values that came from the file or were clamped
+        self.cpu_budget_var.set(str(performance['cpu_budget']))
+        self.capture_interval_var.set(str(performance['capture_interval']))
+        self.max_threads_var.set(str(performance['max_ocr_threads']))
+        self.min_confidence_var.set(str(performance['min_confidence']))
+        self.translation_rate_var.set(str(performance['translation_rate']))
+        self.translation_burst_var.set(str(performance['translation_burst']))
+        self.isolated_ocr_var.set(performance['isolated_ocr'])
+        
     def setup_footer(self, parent):
         """Setup footer with credits"""
         footer_frame = tk.Frame(parent, bg=self.colors['bg_secondary'], height=40)
@@ -685,7 +1544,7 @@ class ModernOCRTranslatorUI:
             self.show_area_btn.config(text="🔍 Show Current Area")
             return
             
-        if not self.box_coordinates:
+        if not self.capture_regions:
             messagebox.showwarning("No Capture Area", "Please set up screen capture first.")
             return
             
@@ -701,14 +1560,18 @@ class ModernOCRTranslatorUI:
         canvas = tk.Canvas(self.highlight_overlay, bg='black', highlightthickness=0)
         canvas.pack(fill='both', expand=True)
         
-        # Draw red rectangle for capture area
+        # Draw a red rectangle per capture region
+        for name, region in self.capture_regions.items():
+            rx, ry = region['left'], region['top']
+            canvas.create_rectangle(rx, ry, rx + region['width'], ry + region['height'], fill='red', outline='')
+            if name != PRIMARY_REGION:
+                canvas.create_text(rx + 6, ry + 6, text=name, anchor='nw', font=('Segoe UI', 11, 'bold'), fill='white')
+        
         x = self.box_coordinates['left']
         y = self.box_coordinates['top'] 
         w = self.box_coordinates['width']
         h = self.box_coordinates['height']
         
-        canvas.create_rectangle(x, y, x + w, y + h, fill='red', outline='')
-        
         # Instructions
         text_y = y + h + 20 if y + h + 60 < self.highlight_overlay.winfo_screenheight() else y - 40
         canvas.create_text(
@@ -742,6 +1605,7 @@ class ModernOCRTranslatorUI:
         self.output_text.tag_configure("translated", foreground=self.colors['success'])
         self.output_text.tag_configure("error", foreground=self.colors['error'])
         self.output_text.tag_configure("info", foreground=self.colors['text_secondary'])
+        self.output_text.tag_configure("draft", foreground=self.colors['text_secondary'], font=('Consolas', 11, 'italic'))
         
     def switch_tab(self, tab_name):
         """Switch between tabs"""
@@ -771,6 +1635,54 @@ class ModernOCRTranslatorUI:
         # Update button text
         self.capture_btn.config(text=f"📸 Capture & Translate ({self.capture_key})")
         
+    def update_profile_key(self, event=None):
+        """Update profiling key setting"""
+        self.profile_key = self.profile_key_var.get()
+        self.save_settings()
+        
+    def toggle_profiling(self):
+        """Sample the pipeline's threads over the next captures, or stop early"""
+        if not self.engine:
+            messagebox.showwarning("Not Ready", "System is still initializing. Please wait.")
+            return
+        if self.profiler and self.profiler.running:
+            paths = self.profiler.stop()
+            self.root.after(0, lambda: self.profiling_finished(paths))
+            return
+        self.profiler = SamplingProfiler(
+            os.path.join(config_dir(), 'profiles'),
+            on_finished=lambda paths: self.root.after(0, lambda: self.profiling_finished(paths))
+        )
+        self.engine.add_sink(self.profiler)
+        self.profiler.start()
+        self.root.after(0, lambda: self.profile_btn.config(text="⏹ Stop profiling"))
+        self.log_message(f"🔬 Profiling the next {PROFILE_CAPTURES} captures...", "info")
+        
+    def profiling_finished(self, paths):
+        """Detach the profiler and point at its report"""
+        if self.engine:
+            self.engine.remove_sink(self.profiler)
+        self.profile_btn.config(text=f"🔬 Profile next {PROFILE_CAPTURES} captures")
+        if paths:
+            self.log_message(f"🔬 Profile written: {paths[1]} (flamegraph stacks: {os.path.basename(paths[0])})", "info")
+        
+    def toggle_recording(self):
+        """Save every capture to a recording that `cli.py replay` can run again"""
+        if not self.capture_source:
+            messagebox.showwarning("Not Ready", "System is still initializing. Please wait.")
+            return
+        if self.recorder:
+            recorder, self.recorder = self.recorder, None
+            self.capture_source = self.build_screen_source()
+            recorder.close()
+            self.record_btn.config(text="⏺ Record captures")
+            self.log_message(f"⏺ Recording saved: {recorder.path} ({recorder.frames} frames)", "info")
+            return
+        self.recorder = FrameRecorder(recording_path(os.path.join(config_dir(), 'recordings')))
+        self.capture_source = self.build_screen_source()
+        self.record_btn.config(text="⏹ Stop recording")
+        self.log_message(f"⏺ Recording captures to {self.recorder.path}", "info")
+        
     def test_capture_key(self):
         """Test the capture key"""
         messagebox.showinfo("Test Key", f"Capture key is set to: {self.capture_key}")
@@ -869,7 +1781,7 @@ class ModernOCRTranslatorUI:
                     overlay.after(2000, lambda: self.finish_selection(overlay, None))
                     return
                 
-                self.box_coordinates = {
+                coordinates = {
                     "left": left,
                     "top": top,
                     "width": width,
@@ -884,7 +1796,7 @@ class ModernOCRTranslatorUI:
                     fill='#3fb950'
                 )
                 
-                overlay.after(1000, lambda: self.finish_selection(overlay, self.box_coordinates))
+                overlay.after(1000, lambda: self.finish_selection(overlay, coordinates))
                 
         def on_escape(event):
             self.finish_selection(overlay, None)
@@ -907,27 +1819,95 @@ class ModernOCRTranslatorUI:
         self.root.deiconify()
         
         if coordinates:
-            self.save_settings()
-            self.update_area_info()
+            self.apply_capture_area(coordinates, "custom", self.edit_region)
+        
+    def apply_capture_area(self, region, source, name=PRIMARY_REGION):
+        """Use a region and remember it for the current monitor and resolution"""
+        if not self.monitor_info:
+            self.setup_screen_capture()
+        self.region_profiles.set(self.monitor_index, self.monitor_info, region, name)
+        self.capture_regions[name] = region
+        if name == PRIMARY_REGION:
+            self.box_coordinates = region
+            self.area_source = source
+        self.capture_source = self.build_screen_source()
+        self.save_settings()
+        self.update_area_info()
+        
+    def update_edit_region(self, event=None):
+        """Choose which named region the area tools edit"""
+        self.edit_region = self.region_var.get()
+        
+    def auto_detect_capture_area(self):
+        """Find the chat text extent and tighten the capture area to it"""
+        if not self.ocr.ready:
+            messagebox.showwarning("Not Ready", "System is still initializing. Please wait.")
+            return
+        
+        def detect_thread():
+            self.log_message("🎯 Detecting chat area... keep some chat messages visible.", "info")
+            try:
+                if not self.monitor_info:
+                    self.setup_screen_capture()
+                previous = self.box_coordinates if self.area_source == "auto" else None
+                region = localize_chat_region(self.ocr, self.monitor_info, previous)
+            except Exception as e:
+                self.log_message(f"❌ Chat area detection failed: {e}", "error")
+                return
+            
+            if not region:
+                self.log_message("👀 No chat text found. Open the chat and try again.", "info")
+                return
+            
+            default = default_chat_region(self.monitor_info)
+            saved = 1 - (region['width'] * region['height']) / (default['width'] * default['height'])
+            self.root.after(0, lambda: self.apply_capture_area(region, "auto", PRIMARY_REGION))
+            message = f"✅ Chat area detected: {region['width']}×{region['height']}"
+            if saved > 0:
+                message += f" ({saved:.0%} fewer pixels than default)"
+            self.log_message(message, "info")
+        
+        threading.Thread(target=detect_thread, daemon=True).start()
+        
+    def update_monitor(self, event=None):
+        """Switch the monitor that is captured"""
+        self.monitor_index = int(self.monitor_var.get().split(':')[0])
+        self.box_coordinates = None
+        self.setup_screen_capture()
+        self.save_settings()
+        self.update_area_info()
         
     def reset_capture_area(self):
         """Reset capture area to default"""
-        self.box_coordinates = None
+        if self.monitor_info:
+            self.region_profiles.remove(self.monitor_index, self.monitor_info, self.edit_region)
+        if self.edit_region == PRIMARY_REGION:
+            self.box_coordinates = None
         self.save_settings()
         self.setup_screen_capture()  # Recalculate default area
         self.update_area_info()
         
     def update_area_info(self):
         """Update capture area info display"""
-        if self.box_coordinates:
-            info = f"Custom area: {self.box_coordinates['width']}×{self.box_coordinates['height']} at ({self.box_coordinates['left']}, {self.box_coordinates['top']})"
+        if self.box_coordinates and self.area_source != "default":
+            label = "Auto-detected area" if self.area_source == "auto" else "Custom area"
+            info = f"{label}: {self.box_coordinates['width']}×{self.box_coordinates['height']} at ({self.box_coordinates['left']}, {self.box_coordinates['top']})"
         else:
             info = "Using default VALORANT chat area"
+        extra = [name for name in self.capture_regions if name != PRIMARY_REGION]
+        if extra:
+            info += f" + {', '.join(extra)}"
         self.area_info_label.config(text=info)
+        if self.overlay and self.box_coordinates:
+            self.overlay.move_to(self.box_coordinates)
         
     def initialize_components(self):
         """Initialize OCR, translator, and screen capture components"""
         def init_thread():
+            if self.config.error:
+                self.log_message(f"⚠️ Settings could not be read, using defaults: {self.config.error}", "error")
+            if self.line_cache_error:
+                self.log_message(f"⚠️ Line cache unavailable, every line will be recognized: {self.line_cache_error}", "error")
             try:
                 # Check CUDA setup
                 self.update_status("gpu", "Checking...", "warning")
@@ -935,21 +1915,58 @@ class ModernOCRTranslatorUI:
                 
                 # Initialize OCR
                 self.update_status("ocr", "Loading...", "warning")
-                self.reader, self.using_gpu = self.initialize_ocr_reader(cuda_available)
-                self.update_status("ocr", f"Ready ({'GPU' if self.using_gpu else 'CPU'})", "success")
+                if self.performance['isolated_ocr']:
+                    # The worker loads and tunes its own reader
+                    self.using_gpu = self.ocr.load(cuda_available)
+                    tuning = f"{self.ocr.tuning}, isolated"
+                else:
+                    self.using_gpu = self.ocr.load(cuda_available)
+                    
+                    # Tune threads/batch sizes for this machine
+                    self.update_status("ocr", "Tuning...", "warning")
+                    try:
+                        scheduler = OCRScheduler(self.ocr, max_threads=self.governor.max_threads)
+                        tuning = scheduler.calibrate()
+                        self.ocr.scheduler = scheduler
+                    except Exception as e:
+                        tuning = "defaults"
+                        self.log_message(f"⚠️ OCR tuning skipped: {e}", "error")
+                    self.governor.apply_thread_cap(self.ocr.scheduler)
+                self.update_status("ocr", f"Ready ({'GPU' if self.using_gpu else 'CPU'}, {tuning})", "success")
                 
                 # Initialize translator
                 self.update_status("translator", "Connecting...", "warning")
-                self.translator = Translator()
-                self.update_status("translator", "Ready", "success")
+                try:
+                    self.glossary = load_glossary(self.glossary_path)
+                except Exception as e:
+                    self.log_message(f"⚠️ Glossary not loaded: {e}", "error")
+                self.translator = create_translator(
+                    self.translation_server, self.glossary, self.performance['translation_cache_size'], self.rate_limiter
+                )
+                self.root.after(0, lambda: self.glossary_info_label.config(text=self.glossary_info_text()))
+                self.update_status("translator", self.translator_status_text(), "success")
                 
                 # Setup screen capture
                 self.update_status("screen", "Configuring...", "warning")
                 self.setup_screen_capture()
+                self.root.after(0, self.update_area_info)
                 self.update_status("screen", "Ready", "success")
                 
+                self.engine = TranslationEngine(
+                    self.ocr, self.translator, sinks=[self.chat_log_sink],
+                    min_confidence=self.performance['min_confidence'], streaming=True,
+                    tiered=self.tiered_translation, rate_limiter=self.rate_limiter, targets=self.target_languages
+                )
+                self.engine.set_translation_workers(self.performance['translation_workers'])
+                
                 # Enable capture button and start key monitoring
                 self.root.after(0, lambda: self.capture_btn.config(state='normal'))
+                self.root.after(0, lambda: self.continuous_btn.config(state='normal'))
+                self.root.after(0, self.refresh_cpu_status)
+                self.root.after(0, self.refresh_queue_status)
+                self.root.after(0, self.refresh_memory_status)
+                if self.overlay_enabled:
+                    self.root.after(0, self.show_overlay)
                 self.start_key_monitoring()  # Always monitor for key presses
                 
                 self.log_message("✅ System initialized successfully!", "info")
@@ -979,69 +1996,55 @@ class ModernOCRTranslatorUI:
         
     def check_cuda_setup(self):
         """Check CUDA availability"""
-        cuda_available = torch.cuda.is_available()
+        cuda_available, gpu_name = check_cuda()
         if cuda_available:
-            gpu_name = torch.cuda.get_device_name(0)[:20] + "..."
-            self.update_status("gpu", gpu_name, "success")
+            self.update_status("gpu", gpu_name[:20] + "...", "success")
         else:
             self.update_status("gpu", "CPU mode", "warning")
         return cuda_available
         
-    def initialize_ocr_reader(self, cuda_available):
-        """Initialize OCR reader with fallback options"""
-        for attempt, use_gpu in enumerate([cuda_available, False], 1):
-            try:
-                reader = easyocr.Reader(
-                    ['en', 'ru'],
-                    gpu=use_gpu,
-                    model_storage_directory=resource_path('models'),
-                    download_enabled=True,
-                    verbose=False
-                )
-                return reader, use_gpu
-            except Exception as e:
-                if attempt == 1 and use_gpu:
-                    continue
-                else:
-                    raise e
-        raise Exception("Could not initialize OCR reader")
+    def build_screen_source(self):
+        """Capture source for the current regions, recording while a recorder is set"""
+        source = build_capture_source(self.capture_regions, self.monitor_index, self.frame_ring())
+        return RecordingCaptureSource(source, self.recorder) if self.recorder else source
         
     def setup_screen_capture(self):
         """Setup screen capture area"""
-        if self.box_coordinates:
-            return  # Use custom area
-            
-        with mss.mss() as sct:
-            monitor = sct.monitors[1]
-            
-            screen_width = monitor["width"]
-            screen_height = monitor["height"]
-            
-            # Calculate chatbox dimensions
-            chatbox_width = round(screen_width * 0.236)
-            chatbox_height = round(screen_height * 0.21)
-            chatbox_top = round(screen_height * 0.79)
-            
-            self.box_coordinates = {
-                "left": 0,
-                "top": chatbox_top,
-                "width": chatbox_width,
-                "height": chatbox_height
-            }
-            
-            self.monitor_info = monitor
+        monitors = list_monitors()
+        if not 0 < self.monitor_index < len(monitors):
+            self.monitor_index = 1
+        self.monitor_info = monitors[self.monitor_index]
+        
+        # Per-resolution profile first, then a legacy custom area, then the default
+        profile = self.region_profiles.get(self.monitor_index, self.monitor_info)
+        self.area_source = "custom" if profile or self.box_coordinates else "default"
+        self.capture_regions = self.region_profiles.resolve(
+            self.monitor_index, self.monitor_info, fallback=self.box_coordinates
+        )
+        self.box_coordinates = self.capture_regions[PRIMARY_REGION]
+        
+        self.capture_source = self.build_screen_source()
             
-    def log_message(self, message, msg_type="info"):
-        """Add message to output text with auto-scroll"""
+    def log_message(self, message, msg_type="info", mark=None):
+        """Add message to output text with auto-scroll
+        
+        `mark` names a text mark at the start of the message so it can be
+        replaced later with replace_message. The message also gets a tag of
+        the same name, for on_message_click.
+        """
         def add_message():
             # Store current scroll position
             was_at_bottom = self.output_text.yview()[1] == 1.0
             
             timestamp = time.strftime("%H:%M:%S")
             self.output_text.insert('end', f"[{timestamp}] ", "header")
-            self.output_text.insert('end', f"{message}\n", msg_type)
+            if mark:
+                self.output_text.mark_set(mark, 'end-1c')
+                self.output_text.mark_gravity(mark, 'left')
+            self.output_text.insert('end', f"{message}\n", (msg_type, mark) if mark else msg_type)
             
             # Auto-scroll to bottom if user was already at bottom, or always for new messages
+            self.trim_log()
             if was_at_bottom or msg_type in ["info", "header"]:
                 self.output_text.see('end')
             
@@ -1050,17 +2053,43 @@ class ModernOCRTranslatorUI:
         
         self.root.after(0, add_message)
         
+    def replace_message(self, mark, message, msg_type="info", final=True):
+        """Swap the text of a message logged with a mark; keep the mark unless final"""
+        def replace():
+            if mark not in self.output_text.mark_names():
+                return  # Output was cleared meanwhile
+            self.output_text.delete(mark, f"{mark} lineend")
+            if final:
+                self.output_text.insert(mark, message, msg_type)
+                self.output_text.mark_unset(mark)
+                self.output_text.tag_delete(mark)
+            else:
+                self.output_text.insert(mark, message, (msg_type, mark))
+        
+        self.root.after(0, replace)
+        
+    def on_message_click(self, mark, callback):
+        """Call `callback` when the message logged with `mark` is clicked"""
+        def bind():
+            self.output_text.tag_bind(mark, '<Button-1>', lambda event: callback())
+            self.output_text.tag_bind(mark, '<Enter>', lambda event: self.output_text.config(cursor='hand2'))
+            self.output_text.tag_bind(mark, '<Leave>', lambda event: self.output_text.config(cursor=''))
+        
+        self.root.after(0, bind)
+        
+    def prioritize_entry(self, entry):
+        """Translate a clicked draft before anything else in the queue"""
+        if self.engine and self.engine.prioritize(entry):
+            self.log_message(f"⏫ Translating message {entry['index']} next.", "info")
+        
     def manual_capture(self):
         """Manually trigger capture and translation"""
-        if not self.reader or not self.translator:
+        if not self.engine or not self.engine.ready:
             messagebox.showwarning("Not Ready", "System is still initializing. Please wait.")
             return
             
-        def capture_thread():
-            self.capture_and_translate()
-            
-        thread = threading.Thread(target=capture_thread, daemon=True)
-        thread.start()
+        # One long-lived capture thread; clicks queue up behind a running capture
+        self.capture_executor.submit(self.capture_and_translate)
         
     def start_key_monitoring(self):
         """Start monitoring for capture key press in background"""
@@ -1072,9 +2101,15 @@ class ModernOCRTranslatorUI:
         def monitor_keys():
             try:
                 while self.is_running:
+                    if keyboard.is_pressed(self.profile_key.lower()):
+                        if self.engine and self.engine.ready:
+                            self.toggle_profiling()
+                        while keyboard.is_pressed(self.profile_key.lower()) and self.is_running:
+                            time.sleep(0.05)
                     if keyboard.is_pressed(self.capture_key.lower()):
-                        if self.reader and self.translator:
-                            self.capture_and_translate()
+                        if self.engine and self.engine.ready:
+                            # OCR runs on the capture thread, never on the keyboard thread
+                            self.capture_executor.submit(self.capture_and_translate)
                         # Debounce
                         while keyboard.is_pressed(self.capture_key.lower()) and self.is_running:
                             time.sleep(0.05)
@@ -1087,8 +2122,156 @@ class ModernOCRTranslatorUI:
         self.capture_thread.start()
         
     def toggle_auto_capture(self):
-        """This method is no longer needed but kept for compatibility"""
-        pass
+        """Start or stop continuous capture, paced by the CPU governor"""
+        if self.continuous:
+            self.continuous = False
+            self.engine.tracker = None
+            self.continuous_btn.config(text="▶ Continuous")
+            self.log_message("⏸ Continuous capture stopped.", "info")
+            return
+        
+        if not self.engine or not self.engine.ready:
+            messagebox.showwarning("Not Ready", "System is still initializing. Please wait.")
+            return
+        
+        self.continuous = True
+        self.continuous_btn.config(text="⏸ Stop")
+        self.log_message("▶ Continuous capture started.", "info")
+        sampler = ChangeSampler(self.performance['change_threshold'])
+        self.change_sampler = sampler
+        # Follow lines across captures so each one is translated once, after it settles
+        tracker = LineTracker()
+        self.engine.tracker = tracker
+        
+        def capture_if_changed():
+            try:
+                frame = self.capture_source.grab()
+            except Exception as e:
+                self.log_message(f"❌ Capture failed: {e}", "error")
+                return
+            # Only run OCR when the chat changed or a new line still needs a confirming read
+            if sampler.should_sample(frame.image) or tracker.has_pending():
+                self.process_frame(frame)
+        
+        self.continuous_thread = threading.Thread(
+            target=self.governor.run_governed,
+            args=(capture_if_changed, lambda: self.continuous and self.is_running),
+            daemon=True
+        )
+        self.continuous_thread.start()
+        
+    def configure_ocr(self, performance):
+        """Pass the OCR-side settings to the (possibly isolated) engine"""
+        self.ocr.configure(
+            width_ths=performance['ocr_width_ths'],
+            height_ths=performance['ocr_height_ths'],
+            line_cache_size=performance['line_cache_size'],
+            languages=self.ocr_languages,
+            recognizer_memory_mb=performance['recognizer_memory_mb']
+        )
+        
+    def open_line_cache(self, path):
+        """Line crop cache shared across sessions; OCR simply runs uncached if the file is unusable"""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            return LineCache(path)
+        except (OSError, sqlite3.Error) as e:
+            self.line_cache_error = f"{path}: {e}"
+            return None
+        
+    def frame_ring(self):
+        """Shared frame ring of the isolated OCR worker, if OCR runs in one"""
+        if isinstance(self.ocr, IsolatedOCREngine):
+            return self.ocr.ring
+        return None
+        
+    def refresh_cpu_status(self):
+        """Show measured CPU use against the budget"""
+        self.governor.measure()
+        status = self.governor.status()
+        ring = self.frame_ring()
+        dropped = ring.dropped if ring else 0
+        if dropped:
+            status += f", {dropped} dropped"
+        self.update_status("cpu", status, "warning" if self.governor.throttled or dropped else "success")
+        self.root.after(1000, self.refresh_cpu_status)
+        
+    def refresh_queue_status(self):
+        """Show the translation rate limiter's queue and throttling"""
+        stats = self.rate_limiter.stats()
+        if stats['blocked']:
+            status, state = f"Backing off {stats['blocked']:.0f}s", "error"
+        elif stats['queued']:
+            status, state = f"{stats['queued']} queued", "warning"
+        else:
+            status, state = "Idle", "success"
+        if stats['throttled']:
+            status += f", {stats['throttled']} throttled"
+        self.update_status("queue", status, state)
+        self.root.after(1000, self.refresh_queue_status)
+        
+    def refresh_memory_status(self):
+        """Show the memory monitor's latest snapshot"""
+        snapshot = self.memory_monitor.latest
+        limit = self.performance['memory_trim_mb']
+        state = "warning" if snapshot and limit and (snapshot['rss_mb'] or 0) > limit * 0.9 else "success"
+        self.update_status("memory", self.memory_monitor.summary(), state)
+        self.diagnostics_label.config(text=self.diagnostics_text(snapshot))
+        self.root.after(MEMORY_POLL_MS, self.refresh_memory_status)
+        
+    def diagnostics_text(self, snapshot):
+        """Multi-line memory report for the Diagnostics section"""
+        if not snapshot:
+            return "Waiting for the first memory snapshot..."
+        lines = [f"Process: {self.memory_monitor.summary(snapshot)}, +{snapshot['rss_growth_mb'] or 0:.0f} MB since start"]
+        if snapshot['traced_mb'] is not None:
+            lines.append(f"Python allocations: {snapshot['traced_mb']:.1f} MB, {snapshot['gc_objects']} objects")
+        lines.append("Threads: " + ", ".join(f"{name} ×{count}" for name, count in sorted(snapshot['threads'].items())))
+        lines.append("Torch: " + ", ".join(f"{key} {value}" for key, value in snapshot['torch'].items()))
+        caches = []
+        line_cache = getattr(self.ocr, 'line_cache', None)
+        if line_cache is not None:
+            caches.append(f"line cache {len(line_cache)}")
+        if self.translator and hasattr(self.translator, 'stats'):
+            caches.append(f"translations {self.translator.stats().get('cache_size', 0)}")
+        caches.append(f"log {int(self.output_text.index('end-1c').split('.')[0])} lines")
+        lines.append("Caches: " + ", ".join(caches))
+        if snapshot['top_growth']:
+            lines.append("Growth since last snapshot:")
+            lines += [f"   +{item['growth_kb']:.0f} KB  {item['site']}" for item in snapshot['top_growth'][:5]]
+        if self.memory_monitor.trims or self.memory_monitor.restarts:
+            lines.append(f"Soft limits hit: {self.memory_monitor.trims} trims, {self.memory_monitor.restarts} worker restarts")
+        return "\n".join(lines)
+        
+    def trim_memory(self):
+        """Memory soft limit reached: shrink caches and the log"""
+        self.ocr.trim_memory()
+        if self.translator and hasattr(self.translator, 'trim_memory'):
+            self.translator.trim_memory()
+        self.root.after(0, self.trim_log)
+        self.log_message("🧹 Memory limit reached, caches trimmed.", "info")
+        
+    def restart_ocr_worker(self):
+        """OCR worker memory limit reached: replace the process"""
+        if isinstance(self.ocr, IsolatedOCREngine):
+            self.ocr.restart("memory limit")
+        
+    def trim_log(self):
+        """Keep the output log under log_max_lines, dropping the oldest lines"""
+        max_lines = self.performance['log_max_lines']
+        lines = int(self.output_text.index('end-1c').split('.')[0])
+        if lines <= max_lines:
+            return
+        # Cut a little more than needed so trimming doesn't run on every message
+        cut = f"{lines - max_lines + max_lines // 10}.0"
+        trimmed = set()
+        for mark in self.output_text.mark_names():
+            if mark.startswith('provisional') and self.output_text.compare(mark, '<', cut):
+                self.output_text.mark_unset(mark)
+                self.output_text.tag_delete(mark)
+                trimmed.add(mark)
+        self.output_text.delete('1.0', cut)
+        self.chat_log_sink.forget_marks(trimmed)
         
     def stop_key_monitoring(self):
         """Stop monitoring for capture key press"""
@@ -1099,115 +2282,28 @@ class ModernOCRTranslatorUI:
         try:
             self.log_message("📸 Capturing screen...", "info")
             
-            with mss.mss() as sct:
-                screenshot = sct.grab(self.box_coordinates)
-                img = np.array(screenshot)
-                
-                if img.shape[2] == 4:
-                    img = img[:, :, :3]  # Remove alpha channel
-                    
-                # OCR processing
-                ocr_params = {
-                    'paragraph': False,
-                    'detail': 1,
-                    'width_ths': 0.7,
-                    'height_ths': 0.7
-                }
-                
-                if self.using_gpu:
-                    ocr_params.update({
-                        'batch_size': 4,
-                        'workers': 0
-                    })
-                
-                results = self.reader.readtext(img, **ocr_params)
-                
-                if results:
-                    messages = self.group_text_by_lines(results)
-                    
-                    if messages:
-                        self.log_message("─" * 60, "header")
-                        self.log_message("📝 TRANSLATION RESULTS", "header")
-                        self.log_message("─" * 60, "header")
-                        
-                        for i, message in enumerate(messages, 1):
-                            if len(message.strip()) < 2:
-                                continue
-                            if any(term in message.lower() for term in ["(broadcast)", "(system)"]):
-                                continue
-                                
-                            try:
-                                translated = self.translator.translate(message, dest='en').text
-                                
-                                self.log_message(f"\n💬 Message {i}:", "header")
-                                self.log_message(f"   Original: {message}", "original")
-                                self.log_message(f"   English:  {translated}", "translated")
-                                
-                            except Exception as e:
-                                self.log_message(f"❌ Translation failed for message {i}: {e}", "error")
-                                self.log_message(f"   Original text: {message}", "original")
-                        
-                        self.log_message("─" * 60, "header")
-                    else:
-                        self.log_message("🔍 No readable messages found.", "info")
-                else:
-                    self.log_message("👀 No text detected in capture area.", "info")
+            frame = self.capture_source.grab()
+            self.process_frame(frame)
                     
         except Exception as e:
             self.log_message(f"❌ Capture failed: {e}", "error")
             
-    def group_text_by_lines(self, results):
-        """Group detected text by vertical position to separate messages"""
-        if not results:
-            return []
-        
-        groups = defaultdict(list)
-        MESSAGE_SEPARATION_THRESHOLD = 15
-        
-        for item in results:
-            try:
-                if len(item) == 3:
-                    bbox, text, prob = item
-                else:
-                    continue
-                    
-                if isinstance(bbox, list) and len(bbox) >= 4:
-                    y_center = (bbox[0][1] + bbox[2][1]) / 2
-                else:
-                    continue
-                
-                found_group = None
-                for y_pos in groups:
-                    if abs(y_pos - y_center) < MESSAGE_SEPARATION_THRESHOLD:
-                        found_group = y_pos
-                        break
-                
-                if found_group is None:
-                    found_group = y_center
-                
-                groups[found_group].append((bbox, text, prob))
-                
-            except Exception as e:
-                continue
-        
-        # Sort groups by vertical position and combine text
-        sorted_groups = sorted(groups.items(), key=lambda x: x[0])
-        messages = []
-        
-        for y_pos, group in sorted_groups:
-            try:
-                group.sort(key=lambda x: x[0][0][0])
-                combined_text = " ".join([item[1] for item in group if item[1].strip()])
-                if combined_text.strip():
-                    messages.append(combined_text.strip())
-            except Exception:
-                continue
-        
-        return messages
-        
+    def process_frame(self, frame):
+        """Run a captured frame through the engine on a low-priority thread"""
+        self.governor.enter_worker()
+        try:
+            with self.process_lock:
+                self.engine.process(frame)
+        except Exception as e:
+            self.log_message(f"❌ Processing failed: {e}", "error")
+            
     def clear_output(self):
         """Clear the output text area"""
         self.output_text.delete(1.0, 'end')
+        for mark in self.output_text.mark_names():
+            if mark.startswith('provisional'):
+                self.output_text.mark_unset(mark)
+                self.output_text.tag_delete(mark)
         self.log_message("🗑️ Output cleared.", "info")
         
     def on_closing(self):
@@ -1215,7 +2311,17 @@ class ModernOCRTranslatorUI:
         self.stop_key_monitoring()
         if self.highlight_overlay:
             self.highlight_overlay.destroy()
+        self.hide_overlay()
         self.save_settings()
+        self.config.flush()
+        if self.recorder:
+            self.recorder.close()
+        self.capture_executor.shutdown(wait=False)
+        self.memory_monitor.stop()
+        if isinstance(self.ocr, IsolatedOCREngine):
+            self.ocr.close()
+        elif self.ocr.line_cache is not None:
+            self.ocr.line_cache.close()
         self.root.destroy()
 
 def main():
@@ -1241,4 +2347,5 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,255 @@
+import gc
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+import torch
+
+from defaults import MEMORY_INTERVAL as DEFAULT_INTERVAL, DEFAULT_TRIM_MB, DEFAULT_RESTART_MB
+
+TRACEMALLOC_FRAMES = 1        # allocation sites by line; deeper traces cost more on every allocation
+TOP_ALLOCATIONS = 10
+TRIM_REARM_MB = 100          # growth past the last trim before trimming again
+MAX_LOG_BYTES = 5 * 1024 * 1024
+MB = 1024 * 1024
+
+
+def process_rss(pid=None):
+    """Resident set size of a process in bytes, or None where it can't be read"""
+    pid = pid or os.getpid()
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t),
+                ]
+
+            PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+            PROCESS_VM_READ = 0x0010
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION | PROCESS_VM_READ, False, pid)
+            if not handle:
+                return None
+            try:
+                counters = PROCESS_MEMORY_COUNTERS()
+                counters.cb = ctypes.sizeof(counters)
+                if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                    return None
+                return counters.WorkingSetSize
+            finally:
+                kernel32.CloseHandle(handle)
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def torch_stats():
+    """Torch allocator numbers in MB (CUDA caching allocator when on GPU)"""
+    stats = {'threads': torch.get_num_threads()}
+    if torch.cuda.is_available():
+        stats.update({
+            'cuda_allocated_mb': round(torch.cuda.memory_allocated() / MB, 1),
+            'cuda_reserved_mb': round(torch.cuda.memory_reserved() / MB, 1),
+            'cuda_peak_mb': round(torch.cuda.max_memory_allocated() / MB, 1),
+        })
+    return stats
+
+
+def thread_counts():
+    """Live threads by name, counters stripped so pools group together"""
+    return Counter(thread.name.rstrip('0123456789_-') or thread.name for thread in threading.enumerate())
+
+
+class MemoryMonitor:
+    """Periodic memory snapshots with soft limits for long sessions
+
+    Every `interval` seconds it records the process' RSS (and the OCR
+    worker's, via `worker_pid`), live threads, torch allocator stats and,
+    with `trace` on, the allocation sites that grew most since the
+    previous snapshot. tracemalloc slows down every allocation, so tracing
+    is off unless asked for, and the monitor only ever stops tracing it
+    started itself. Snapshots go to `log_path` as JSON lines and to
+    `on_sample`.
+
+    Past `trim_mb` of own RSS `trim` is called to shrink caches; past
+    `restart_mb` of worker RSS `restart` replaces the OCR worker. Both
+    limits are soft and checked once per snapshot; a trim only repeats
+    after another TRIM_REARM_MB of growth. 0 turns a limit off.
+    """
+
+    def __init__(self, log_path=None, interval=DEFAULT_INTERVAL, trim_mb=DEFAULT_TRIM_MB,
+                 restart_mb=DEFAULT_RESTART_MB, trace=False, trim=None, restart=None, worker_pid=None,
+                 on_sample=None):
+        self.log_path = log_path
+        self.interval = interval
+        self.trim_mb = trim_mb
+        self.restart_mb = restart_mb
+        self.trace = trace
+        self.tracing = False        # tracemalloc was started by this monitor
+        self.trim = trim
+        self.restart = restart
+        self.worker_pid = worker_pid or (lambda: None)
+        self.on_sample = on_sample or (lambda snapshot: None)
+        self.latest = None
+        self.baseline_rss = None
+        self.previous_trace = None
+        self.trims = 0
+        self.trimmed_at_mb = None
+        self.restarts = 0
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = False
+        self.thread = None
+
+    def start(self):
+        if self.trace:
+            self.start_tracing()
+        self.thread = threading.Thread(target=self.run, name='memory-monitor', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopping = True
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.stop_tracing()
+
+    def start_tracing(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self.tracing = True
+
+    def stop_tracing(self):
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+
+    def configure(self, interval=None, trim_mb=None, restart_mb=None, trace=None):
+        with self.lock:
+            if interval is not None:
+                self.interval = interval
+            if trim_mb is not None:
+                self.trim_mb = trim_mb
+            if restart_mb is not None:
+                self.restart_mb = restart_mb
+            if trace is not None and trace != self.trace:
+                self.trace = trace
+                self.previous_trace = None
+                if trace:
+                    self.start_tracing()
+                else:
+                    self.stop_tracing()
+        self.wakeup.set()
+
+    def run(self):
+        while not self.stopping:
+            try:
+                self.sample()
+            except Exception as e:
+                self.write({'time': time.time(), 'error': str(e)})
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+
+    def allocation_growth(self):
+        """Allocation sites that grew most since the previous snapshot"""
+        if not self.trace or not tracemalloc.is_tracing():
+            return [], None
+        trace = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        traced = sum(stat.size for stat in trace.statistics('filename')) / MB
+        previous, self.previous_trace = self.previous_trace, trace
+        if previous is None:
+            return [], traced
+        top = []
+        for stat in trace.compare_to(previous, 'lineno')[:TOP_ALLOCATIONS]:
+            if stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            top.append({
+                'site': f"{os.path.basename(frame.filename)}:{frame.lineno}",
+                'growth_kb': round(stat.size_diff / 1024, 1),
+                'size_kb': round(stat.size / 1024, 1),
+                'count': stat.count,
+            })
+        return top, traced
+
+    def sample(self):
+        """Take one snapshot and act on the soft limits"""
+        with self.lock:
+            rss = process_rss()
+            worker_pid = self.worker_pid()
+            worker_rss = process_rss(worker_pid) if worker_pid else None
+            if self.baseline_rss is None and rss is not None:
+                self.baseline_rss = rss
+            top, traced = self.allocation_growth()
+            snapshot = {
+                'time': time.time(),
+                'rss_mb': round(rss / MB, 1) if rss is not None else None,
+                'rss_growth_mb': round((rss - self.baseline_rss) / MB, 1) if rss is not None else None,
+                'worker_rss_mb': round(worker_rss / MB, 1) if worker_rss is not None else None,
+                'traced_mb': round(traced, 1) if traced is not None else None,
+                'threads': dict(thread_counts()),
+                'thread_count': threading.active_count(),
+                'gc_objects': len(gc.get_objects()),
+                'torch': torch_stats(),
+                'top_growth': top,
+                'actions': [],
+            }
+            trim_mb, restart_mb = self.trim_mb, self.restart_mb
+
+        rss_mb = rss / MB if rss is not None else None
+        if rss_mb is not None and trim_mb and rss_mb <= trim_mb:
+            self.trimmed_at_mb = None
+        elif rss_mb is not None and trim_mb and self.trim:
+            # Memory that trimming could not give back shouldn't trigger it over and over
+            if self.trimmed_at_mb is None or rss_mb > self.trimmed_at_mb + TRIM_REARM_MB:
+                self.trim()
+                self.trims += 1
+                self.trimmed_at_mb = rss_mb
+                snapshot['actions'].append(f"trimmed caches at {rss_mb:.0f} MB")
+        if restart_mb and worker_rss is not None and worker_rss / MB > restart_mb and self.restart:
+            self.restart()
+            self.restarts += 1
+            snapshot['actions'].append(f"restarted OCR worker at {worker_rss / MB:.0f} MB")
+
+        self.latest = snapshot
+        self.write(snapshot)
+        self.on_sample(snapshot)
+        return snapshot
+
+    def write(self, record):
+        if not self.log_path:
+            return
+        try:
+            # Keep one previous log around instead of growing forever
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > MAX_LOG_BYTES:
+                os.replace(self.log_path, self.log_path + '.1')
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
+
+    def summary(self, snapshot=None):
+        """Short status text, e.g. '512 MB, 23 threads'"""
+        snapshot = snapshot or self.latest
+        if not snapshot:
+            return "Measuring..."
+        parts = [f"{snapshot['rss_mb']:.0f} MB" if snapshot['rss_mb'] is not None else "RSS n/a"]
+        if snapshot['worker_rss_mb'] is not None:
+            parts.append(f"worker {snapshot['worker_rss_mb']:.0f} MB")
+        parts.append(f"{snapshot['thread_count']} threads")
+        return ", ".join(parts)
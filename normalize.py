@@ -0,0 +1,270 @@
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+
+# Letters that look identical in the Latin and Cyrillic alphabets; the
+# ['en','ru'] reader freely swaps them between captures
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'в': 'b', 'е': 'e', 'ё': 'e', 'к': 'k', 'м': 'm', 'н': 'h',
+    'о': 'o', 'р': 'p', 'с': 'c', 'т': 't', 'у': 'y', 'х': 'x',
+    'А': 'A', 'В': 'B', 'Е': 'E', 'Ё': 'E', 'К': 'K', 'М': 'M', 'Н': 'H',
+    'О': 'O', 'Р': 'P', 'С': 'C', 'Т': 'T', 'У': 'Y', 'Х': 'X',
+}
+LATIN_TO_CYRILLIC = {
+    'a': 'а', 'e': 'е', 'k': 'к', 'o': 'о', 'p': 'р', 'c': 'с', 'y': 'у', 'x': 'х',
+    'A': 'А', 'B': 'В', 'E': 'Е', 'K': 'К', 'M': 'М', 'H': 'Н', 'O': 'О',
+    'P': 'Р', 'C': 'С', 'T': 'Т', 'X': 'Х', 'Y': 'У',
+}
+
+PUNCTUATION_MAP = str.maketrans({
+    '‘': "'", '’': "'", '`': "'", '´': "'",
+    '“': '"', '”': '"', '«': '"', '»': '"',
+    '–': '-', '—': '-', '…': '...',
+})
+# Characters the recognizer hallucinates on chat box edges and backgrounds
+EDGE_NOISE = '_~^*°•·¦|\\'
+
+NEAR_DUPLICATE_CAPACITY = 512
+
+
+def letter_script(ch):
+    """'cyrillic', 'latin' or None for a single character"""
+    if not ch.isalpha():
+        return None
+    name = unicodedata.name(ch, '')
+    if name.startswith('CYRILLIC'):
+        return 'cyrillic'
+    if name.startswith('LATIN'):
+        return 'latin'
+    return None
+
+
+def script_evidence(text):
+    """Return (cyrillic, latin) counts of letters that are unambiguous"""
+    cyrillic = latin = 0
+    for ch in text:
+        script = letter_script(ch)
+        if script == 'cyrillic' and ch not in CYRILLIC_TO_LATIN:
+            cyrillic += 1
+        elif script == 'latin' and ch not in LATIN_TO_CYRILLIC:
+            latin += 1
+    return cyrillic, latin
+
+
+def script_language(text):
+    """Language a line's script pins down ('ru', 'ko', 'ja', 'zh'), or None for Latin text"""
+    counts = Counter()
+    for ch in text:
+        if not ch.isalpha():
+            continue
+        name = unicodedata.name(ch, '')
+        if name.startswith('HANGUL'):
+            counts['ko'] += 1
+        elif name.startswith(('HIRAGANA', 'KATAKANA')):
+            counts['ja'] += 1
+        elif name.startswith('CJK'):
+            counts['zh'] += 1
+    cyrillic, latin = script_evidence(text)
+    counts['ru'] += cyrillic
+    if not counts or latin >= max(counts.values()):
+        return None
+    # Japanese mixes kanji with kana; kana decide
+    if counts['ja'] and counts['zh']:
+        counts['ja'] += counts.pop('zh')
+    return counts.most_common(1)[0][0]
+
+
+def cyrillic_share(text, default=0.5):
+    cyrillic, latin = script_evidence(text)
+    if cyrillic + latin == 0:
+        return default
+    return cyrillic / (cyrillic + latin)
+
+
+def fold_to_script(text, script):
+    table = LATIN_TO_CYRILLIC if script == 'cyrillic' else CYRILLIC_TO_LATIN
+    return "".join(table.get(ch, ch) for ch in text)
+
+
+def message_body(text):
+    """Chat line without its "Player: " prefix, whose name is neither language nor glossary material"""
+    name, separator, body = text.partition(': ')
+    return body if separator and body else text
+
+
+def canonicalize(text):
+    """Unicode, whitespace and punctuation canonicalization"""
+    text = unicodedata.normalize('NFKC', text).translate(PUNCTUATION_MAP)
+    text = re.sub(r'\s+', ' ', text).strip(EDGE_NOISE + ' ')
+    # "word ," -> "word,"  and  "!!!" -> "!"
+    text = re.sub(r'\s+([,.!?:;])', r'\1', text)
+    text = re.sub(r'([,!?:;])\1+', r'\1', text)
+    return text
+
+
+def normalize_words(words):
+    """Confidence-weighted homoglyph folding of a line's OCR words
+
+    `words` is a list of (text, confidence). Each word is folded into one
+    script. A confident word decides from its own letters; a doubtful word
+    leans on the script of the rest of the message body, weighted by how
+    confident the body is. The "Player: " prefix only ever decides from its
+    own letters, so a Latin name never drags a Russian message to Latin.
+    """
+    joined = " ".join(text for text, _ in words)
+    body_start = len(joined) - len(message_body(joined))
+    in_body, offset = [], 0
+    for text, _ in words:
+        in_body.append(offset >= body_start)
+        offset += len(text) + 1
+
+    body_cyrillic = body_latin = 0.0
+    for (text, confidence), body in zip(words, in_body):
+        if body:
+            cyrillic, latin = script_evidence(text)
+            body_cyrillic += cyrillic * confidence
+            body_latin += latin * confidence
+    body_share = body_cyrillic / (body_cyrillic + body_latin) if body_cyrillic + body_latin else 0.5
+
+    folded = []
+    for (text, confidence), body in zip(words, in_body):
+        if not body:
+            share = cyrillic_share(text)
+        else:
+            # A word without script evidence of its own follows the body's majority
+            own_share = cyrillic_share(text, default=body_share)
+            weight = max(0.0, min(1.0, confidence))
+            share = weight * own_share + (1 - weight) * body_share
+        if share == 0.5:
+            folded.append(text)
+        else:
+            folded.append(fold_to_script(text, 'cyrillic' if share > 0.5 else 'latin'))
+    return folded
+
+
+def normalize_line(words):
+    """Canonical display text for a line of (text, confidence) words"""
+    words = [(text, confidence) for text, confidence in words if text.strip()]
+    return canonicalize(" ".join(normalize_words(words)))
+
+
+def normalize_ocr_line(line):
+    """Copy of an OCRLine with its text normalized from the word readings"""
+    return line._replace(text=normalize_line([(text, prob) for _, text, prob in line.words]))
+
+
+def cache_key(text):
+    """Identity for a line: case-, spacing- and punctuation-blind
+
+    Letters keep their script, so homoglyph folding never decides which
+    lines share a translation ('вот' and 'bot' are different lines).
+    """
+    text = canonicalize(text).casefold()
+    text = re.sub(r'[^\w\s]', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def edit_distance(a, b, limit=None):
+    """Levenshtein distance; stops early once it must exceed `limit`"""
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def default_tolerance(key):
+    """Edits allowed for a key to still count as the same line"""
+    return len(key) // 10
+
+
+def trigrams(key):
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NearDuplicateIndex:
+    """Hashed trigram index over cache keys so near-identical OCR readings find each other
+
+    Candidates sharing enough trigrams with the query are verified with a
+    bounded edit distance. OCR jitter happens between nearby captures, so
+    only the most recent `capacity` keys are kept.
+    """
+
+    def __init__(self, capacity=NEAR_DUPLICATE_CAPACITY, tolerance=default_tolerance):
+        self.capacity = capacity
+        self.tolerance = tolerance
+        self.postings = defaultdict(set)
+        self.recent = OrderedDict()
+        self.lock = threading.Lock()
+
+    def add(self, key):
+        with self.lock:
+            if key in self.recent:
+                self.recent.move_to_end(key)
+                return
+            self.recent[key] = None
+            for gram in trigrams(key):
+                self.postings[gram].add(key)
+            while len(self.recent) > self.capacity:
+                self.remove_locked(next(iter(self.recent)))
+
+    def remove(self, key):
+        with self.lock:
+            self.remove_locked(key)
+
+    def remove_locked(self, key):
+        if self.recent.pop(key, False) is False:
+            return
+        for gram in trigrams(key):
+            keys = self.postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[gram]
+
+    def find(self, key):
+        """Closest stored key within tolerance, or None"""
+        limit = self.tolerance(key)
+        with self.lock:
+            if key in self.recent:
+                return key
+            if limit == 0:
+                return None
+
+            grams = trigrams(key)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self.postings.get(gram, ()))
+
+            # One edit destroys at most three trigrams
+            needed = len(grams) - 3 * limit
+            best, best_distance = None, limit + 1
+            for candidate, count in shared.items():
+                if count < needed or abs(len(candidate) - len(key)) > limit:
+                    continue
+                distance = edit_distance(key, candidate, limit)
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+            return best
+
+    def clear(self):
+        with self.lock:
+            self.postings.clear()
+            self.recent.clear()
+
+    def __len__(self):
+        return len(self.recent)
@@ -0,0 +1,350 @@
+import gc
+import warnings
+from collections import defaultdict, namedtuple
+
+import cv2
+import easyocr
+import numpy as np
+import torch
+
+from defaults import DETECTION_WIDTH_THS, DETECTION_HEIGHT_THS
+from line_cache import line_hash
+from paths import resource_path
+from recognizer_router import RecognizerRouter, RECOGNIZER_GROUPS, PRIMARY_GROUP, DEFAULT_MEMORY_BUDGET_MB
+
+# Suppress warnings
+warnings.filterwarnings('ignore', category=UserWarning)
+
+OCR_LANGUAGES = RECOGNIZER_GROUPS[PRIMARY_GROUP]
+MESSAGE_SEPARATION_THRESHOLD = 15
+MONTAGE_GAP = 32  # Blank rows between stacked crops, well above the line threshold
+RERECOGNIZE_SCALE = 2.0
+LINE_CROP_PADDING = 4
+
+
+def check_cuda():
+    """Return (cuda_available, device_name)"""
+    if torch.cuda.is_available():
+        return True, torch.cuda.get_device_name(0)
+    return False, None
+
+
+class OCREngine:
+    """easyocr wrapper that owns the Reader and its inference parameters"""
+
+    def __init__(self, languages=None, model_dir=None, line_cache=None, recognizer_memory_mb=DEFAULT_MEMORY_BUDGET_MB):
+        self.languages = OCR_LANGUAGES  # The detector's Reader; other scripts go through the router
+        self.model_dir = model_dir or resource_path('models')
+        self.router = RecognizerRouter(languages, self.model_dir, recognizer_memory_mb)
+        self.reader = None
+        self.using_gpu = False
+        self.scheduler = None  # Optional OCRScheduler that picks batch sizes/threads
+        self.line_cache = line_cache  # Optional LineCache consulted before recognition
+        self.width_ths = DETECTION_WIDTH_THS
+        self.height_ths = DETECTION_HEIGHT_THS
+
+    def load(self, prefer_gpu=True):
+        """Initialize OCR reader with fallback options"""
+        for attempt, use_gpu in enumerate([prefer_gpu, False], 1):
+            try:
+                self.reader = easyocr.Reader(
+                    self.languages,
+                    gpu=use_gpu,
+                    model_storage_directory=self.model_dir,
+                    download_enabled=True,
+                    verbose=False
+                )
+                self.using_gpu = use_gpu
+                self.router.attach_primary(self.reader, use_gpu)
+                return use_gpu
+            except Exception as e:
+                if attempt == 1 and use_gpu:
+                    continue
+                else:
+                    raise e
+        raise Exception("Could not initialize OCR reader")
+
+    @property
+    def ready(self):
+        return self.reader is not None
+
+    def configure(self, width_ths=None, height_ths=None, line_cache_size=None, languages=None,
+                  recognizer_memory_mb=None):
+        """Change thresholds, cache size and lobby languages; applies from the next capture"""
+        if width_ths is not None:
+            self.width_ths = width_ths
+        if height_ths is not None:
+            self.height_ths = height_ths
+        if line_cache_size is not None and self.line_cache is not None:
+            self.line_cache.resize(line_cache_size)
+        if languages is not None:
+            self.router.set_languages(languages)
+        if recognizer_memory_mb is not None:
+            self.router.set_memory_budget(recognizer_memory_mb)
+
+    def trim_memory(self):
+        """Shrink caches and release unused model and allocator memory"""
+        if self.line_cache is not None:
+            self.line_cache.trim()
+        self.router.trim()
+        gc.collect()
+        if self.using_gpu:
+            torch.cuda.empty_cache()
+
+    def ocr_params(self):
+        """readtext keyword arguments for the current device"""
+        params = {
+            'paragraph': False,
+            'detail': 1,
+            'width_ths': self.width_ths,
+            'height_ths': self.height_ths
+        }
+
+        if self.using_gpu:
+            params.update({
+                'batch_size': 4,
+                'workers': 0
+            })
+        return params
+
+    def readtext(self, img):
+        """Run detection + recognition on a BGR image"""
+        if self.scheduler:
+            return self.scheduler.readtext(img)
+        return self.readtext_unscheduled(img)
+
+    def readtext_unscheduled(self, img):
+        if self.line_cache is not None and self.line_cache.enabled or self.router.active:
+            # Split detection from recognition so known lines skip the recognizer
+            # and the others reach the one for their script
+            horizontal_list, free_list = self.detect(img)
+            return self.recognize(img, horizontal_list, free_list, self.ocr_params().get('batch_size', 1))
+        return self.reader.readtext(img, **self.ocr_params())
+
+    def detect(self, img):
+        """Text detection: (horizontal_list, free_list) for a single image"""
+        horizontal_list, free_list = self.reader.detect(img, width_ths=self.width_ths, height_ths=self.height_ths)
+        return horizontal_list[0], free_list[0]
+
+    def recognize(self, img, horizontal_list, free_list, batch_size=1):
+        """Recognition of already detected boxes, readtext-style results
+
+        With a line cache, horizontal boxes whose crop was recognized before
+        are answered from the cache and only the rest reach the recognizer.
+        """
+        if self.line_cache is None or not self.line_cache.enabled or not horizontal_list:
+            return self.recognize_boxes(img, horizontal_list, free_list, batch_size)
+
+        found = []
+        missing = {}  # clipped (x_min, y_min) -> (box, hash key)
+        for box in horizontal_list:
+            x_min, x_max, y_min, y_max = (int(value) for value in box)
+            crop = img[max(0, y_min):y_max, max(0, x_min):x_max]
+            key = line_hash(crop) if crop.size else None
+            hit = self.line_cache.get(key) if key else None
+            if hit:
+                found.append((box_points(box, img), hit[0], hit[1]))
+            else:
+                missing[(max(0, x_min), max(0, y_min))] = (box, key)
+
+        if missing or free_list:
+            boxes = [box for box, key in missing.values()]
+            for bbox, text, prob in self.recognize_boxes(img, boxes, free_list, batch_size):
+                found.append((bbox, text, prob))
+                box, key = missing.pop((int(bbox[0][0]), int(bbox[0][1])), (None, None))
+                if key:
+                    self.line_cache.put(key, text, prob)
+        # Same order easyocr uses: top to bottom
+        found.sort(key=lambda item: item[0][0][1])
+        return found
+
+    def recognize_boxes(self, img, horizontal_list, free_list, batch_size=1):
+        params = {'batch_size': batch_size, 'workers': 0, 'detail': 1, 'paragraph': False}
+        if self.router.active:
+            return self.router.recognize(img, horizontal_list, free_list, **params)
+        return self.reader.recognize(img, horizontal_list, free_list, **params)
+
+    def readtext_regions(self, crops):
+        """OCR several named crops in one inference call
+
+        The crops are stacked into a single montage, read once and the
+        results are split back per crop with crop-relative coordinates.
+        """
+        montage, offsets = build_montage(crops)
+        results = {name: [] for name in crops}
+        for bbox, text, prob in self.readtext(montage):
+            y_center = (bbox[0][1] + bbox[2][1]) / 2
+            for name, top, height in offsets:
+                if top <= y_center < top + height:
+                    results[name].append(([[x, y - top] for x, y in bbox], text, prob))
+                    break
+        return results
+
+    def readtext_streaming(self, img):
+        """Yield (row, results) per chat row, bottom row (the newest message) first
+
+        Detection runs once over the whole image; recognition then runs row
+        by row so callers can act on the first line before the rest is read.
+        `row` counts from the top.
+        """
+        horizontal_list, free_list = self.detect(img)
+        rows = group_boxes(horizontal_list, free_list)
+        for row in range(len(rows) - 1, -1, -1):
+            row_horizontal, row_free = rows[row]
+            yield row, self.recognize(img, row_horizontal, row_free)
+
+    def detect_boxes(self, img):
+        """Text detection only: list of (x_min, x_max, y_min, y_max) boxes"""
+        horizontal_list, free_list = self.detect(img)
+        boxes = [tuple(box) for box in horizontal_list]
+        for points in free_list:
+            xs = [point[0] for point in points]
+            ys = [point[1] for point in points]
+            boxes.append((min(xs), max(xs), min(ys), max(ys)))
+        return boxes
+
+
+def box_points(box, img):
+    """Corner points of a horizontal (x_min, x_max, y_min, y_max) box, clipped like easyocr does"""
+    height, width = img.shape[:2]
+    x_min, x_max = max(0, int(box[0])), min(int(box[1]), width)
+    y_min, y_max = max(0, int(box[2])), min(int(box[3]), height)
+    return [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+
+
+def build_montage(crops):
+    """Stack crops vertically; returns (image, [(name, top, height)])"""
+    width = max(crop.shape[1] for crop in crops.values())
+    height = sum(crop.shape[0] for crop in crops.values()) + MONTAGE_GAP * (len(crops) - 1)
+    montage = np.zeros((height, width, 3), dtype=np.uint8)
+
+    offsets = []
+    top = 0
+    for name, crop in crops.items():
+        montage[top:top + crop.shape[0], :crop.shape[1]] = crop[:, :, :3]
+        offsets.append((name, top, crop.shape[0]))
+        top += crop.shape[0] + MONTAGE_GAP
+    return montage, offsets
+
+
+def group_boxes(horizontal_list, free_list):
+    """Split detection boxes into rows, top to bottom: [(horizontal_list, free_list)]"""
+    boxes = [((box[2] + box[3]) / 2, box, True) for box in horizontal_list]
+    boxes += [(sum(point[1] for point in points) / len(points), points, False) for points in free_list]
+    boxes.sort(key=lambda item: item[0])
+
+    rows = []
+    last_center = None
+    for center, box, horizontal in boxes:
+        if last_center is None or center - last_center >= MESSAGE_SEPARATION_THRESHOLD:
+            rows.append(([], []))
+            last_center = center
+        rows[-1][0 if horizontal else 1].append(box)
+    return rows
+
+
+# One chat row: combined text, its (bbox, text, prob) words, mean confidence
+# and the (left, top, right, bottom) box around all words
+OCRLine = namedtuple('OCRLine', ['text', 'words', 'confidence', 'box'])
+
+
+def line_confidence(words):
+    """Character-weighted mean of the word confidences"""
+    total = sum(len(text) for _, text, _ in words)
+    if not total:
+        return 0.0
+    return sum(prob * len(text) for _, text, prob in words) / total
+
+
+def line_box(words):
+    xs = [point[0] for bbox, _, _ in words for point in bbox]
+    ys = [point[1] for bbox, _, _ in words for point in bbox]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def group_lines(results):
+    """Group detected text by vertical position into OCRLine rows, top to bottom"""
+    if not results:
+        return []
+
+    groups = defaultdict(list)
+
+    for item in results:
+        try:
+            if len(item) == 3:
+                bbox, text, prob = item
+            else:
+                continue
+
+            if isinstance(bbox, list) and len(bbox) >= 4:
+                y_center = (bbox[0][1] + bbox[2][1]) / 2
+            else:
+                continue
+
+            found_group = None
+            for y_pos in groups:
+                if abs(y_pos - y_center) < MESSAGE_SEPARATION_THRESHOLD:
+                    found_group = y_pos
+                    break
+
+            if found_group is None:
+                found_group = y_center
+
+            groups[found_group].append((bbox, text, prob))
+
+        except Exception:
+            continue
+
+    # Sort groups by vertical position and combine text
+    sorted_groups = sorted(groups.items(), key=lambda x: x[0])
+    lines = []
+
+    for y_pos, group in sorted_groups:
+        try:
+            group.sort(key=lambda x: x[0][0][0])
+            words = [item for item in group if item[1].strip()]
+            combined_text = " ".join([item[1] for item in words])
+            if combined_text.strip():
+                lines.append(OCRLine(combined_text.strip(), words, line_confidence(words), line_box(words)))
+        except Exception:
+            continue
+
+    return lines
+
+
+def line_crop(img, box, padding=LINE_CROP_PADDING):
+    """(crop view, left, top) around a line box, clipped to the image"""
+    left, top, right, bottom = (int(round(value)) for value in box)
+    height, width = img.shape[:2]
+    left, top = max(0, left - padding), max(0, top - padding)
+    right, bottom = min(width, right + padding), min(height, bottom + padding)
+    return img[top:bottom, left:right], left, top
+
+
+def rerecognize_line(ocr, img, line, scale=RERECOGNIZE_SCALE):
+    """Read a doubtful line again from an upscaled crop
+
+    Returns whichever of the two readings has the higher confidence, with
+    word boxes in the coordinates of `img`.
+    """
+    crop, left, top = line_crop(img, line.box)
+    if crop.size == 0:
+        return line
+    upscaled = cv2.resize(crop[:, :, :3], None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+    words = [
+        ([[x / scale + left, y / scale + top] for x, y in bbox], text, prob)
+        for bbox, text, prob in ocr.readtext(upscaled)
+        if text.strip()
+    ]
+    if not words:
+        return line
+    words.sort(key=lambda item: item[0][0][0])
+    confidence = line_confidence(words)
+    if confidence <= line.confidence:
+        return line
+    return OCRLine(" ".join(text for _, text, _ in words), words, confidence, line_box(words))
+
+
+def group_text_by_lines(results):
+    """Group detected text by vertical position to separate messages"""
+    return [line.text for line in group_lines(results)]
@@ -0,0 +1,184 @@
+import os
+import time
+
+import cv2
+import numpy as np
+import torch
+
+BENCHMARK_RUNS = 2
+BENCHMARK_LINES = ["PlayerOne: go B rush now", "Игрок: го мид, эко раунд", "(Team) Jett: one low A main",
+                   "PlayerTwo: nice shot", "Сейдж: у меня ульта", "gg wp"]
+# Prefer fewer threads when they are within this share of the fastest time
+THREAD_EFFICIENCY = 1.10
+GPU_BATCH_SIZES = (1, 4, 8, 16)
+CPU_MAX_BATCH = 8
+# Fallback when a capture takes this much longer than the calibrated baseline
+REGRESSION_FACTOR = 2.0
+# Real captures that replace the synthetic baseline before regressions are checked
+REBASELINE_CAPTURES = 5
+REGRESSION_STRIKES = 3
+FALLBACK_CAPTURES = 20
+EWMA_ALPHA = 0.3
+
+
+def benchmark_image(width=450, height=220):
+    """Synthetic chatbox with a handful of lines of mixed-script text"""
+    img = np.full((height, width, 3), 24, dtype=np.uint8)
+    line_height = height // len(BENCHMARK_LINES)
+    for i, line in enumerate(BENCHMARK_LINES):
+        # Hershey fonts are ASCII-only; Cyrillic renders as '?' which still exercises the recognizer
+        cv2.putText(img, line, (8, line_height * (i + 1) - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (230, 230, 230), 1)
+    return img
+
+
+def cpu_thread_cap():
+    """Never use more than half the logical cores, so the game keeps the rest"""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+class OCRScheduler:
+    """Chooses OCR threads and recognizer batch sizes for this host
+
+    calibrate() microbenchmarks the host once at startup. readtext() splits
+    OCR into detection and recognition so the recognizer batch can follow the
+    number of detected lines, and falls back to easyocr's defaults for a while
+    when latency regresses well past the calibrated baseline: one plain
+    reader.readtext call at the thread count torch started with, bypassing
+    the line cache and the per-script recognizers.
+
+    Latency is compared per unit of work: a capture with more pixels or
+    more lines than the benchmark image (a multi-region montage, an
+    upscaled re-read) is expected to take proportionally longer. The
+    synthetic baseline is replaced by the median of the first
+    REBASELINE_CAPTURES real captures that contained text, so real chat
+    text is measured against real chat text rather than against
+    detection-only captures of an empty chat box.
+    """
+
+    def __init__(self, ocr, max_threads=None):
+        self.ocr = ocr
+        self.max_threads = max_threads or cpu_thread_cap()
+        self.threads = torch.get_num_threads()
+        self.default_threads = self.threads
+        self.max_batch = CPU_MAX_BATCH
+        self.baseline = None        # seconds per benchmark-sized capture after calibration
+        self.baseline_pixels = None
+        self.baseline_lines = len(BENCHMARK_LINES)
+        self.rebaseline = []        # normalized latencies of the first real captures
+        self.latency = None         # EWMA of recent captures, normalized
+        self.strikes = 0
+        self.fallback_remaining = 0
+        self.fallbacks = 0
+
+    def set_threads(self, threads):
+        self.threads = max(1, min(threads, self.max_threads))
+        torch.set_num_threads(self.threads)
+
+    def time_readtext(self, img, batch_size):
+        # Warm-up run so allocator and kernel selection don't skew the timing
+        self.run(img, batch_size)
+        started = time.perf_counter()
+        for _ in range(BENCHMARK_RUNS):
+            self.run(img, batch_size)
+        return (time.perf_counter() - started) / BENCHMARK_RUNS
+
+    def calibrate(self):
+        """Microbenchmark thread count (CPU) or batch size (GPU) for this host"""
+        try:
+            # Inter-op parallelism only adds contention for single-image inference;
+            # torch only allows setting it before any parallel work has run
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass
+
+        img = benchmark_image()
+        self.baseline_pixels = img.shape[0] * img.shape[1]
+        if self.ocr.using_gpu:
+            timings = {batch: self.time_readtext(img, batch) for batch in GPU_BATCH_SIZES}
+            self.max_batch = min(timings, key=timings.get)
+            self.baseline = timings[self.max_batch]
+        else:
+            candidates = sorted({1, 2, 4, self.max_threads} & set(range(1, self.max_threads + 1)))
+            timings = {}
+            for threads in candidates:
+                self.set_threads(threads)
+                timings[threads] = self.time_readtext(img, CPU_MAX_BATCH)
+            best = min(timings.values())
+            self.set_threads(min(t for t, elapsed in timings.items() if elapsed <= best * THREAD_EFFICIENCY))
+            self.baseline = timings[self.threads]
+        self.latency = self.baseline
+        self.rebaseline = []
+        return self.describe()
+
+    def batch_size_for(self, line_count):
+        """Recognizer batch that fits the detected lines without padding waste"""
+        if line_count <= 1:
+            return 1
+        batch = 1
+        while batch < line_count and batch < self.max_batch:
+            batch *= 2
+        return min(batch, self.max_batch)
+
+    def run(self, img, batch_size=None):
+        horizontal_list, free_list = self.ocr.detect(img)
+        line_count = len(horizontal_list) + len(free_list)
+        if not line_count:
+            return []
+        batch = batch_size or self.batch_size_for(line_count)
+        return self.ocr.recognize(img, horizontal_list, free_list, batch_size=batch)
+
+    def readtext(self, img):
+        if self.fallback_remaining > 0:
+            self.fallback_remaining -= 1
+            return self.readtext_fallback(img)
+
+        started = time.perf_counter()
+        results = self.run(img)
+        self.record(time.perf_counter() - started, img.shape[0] * img.shape[1], len(results))
+        return results
+
+    def readtext_fallback(self, img):
+        """easyocr's own readtext at the thread count torch started with, still within the cap"""
+        torch.set_num_threads(max(1, min(self.default_threads, self.max_threads)))
+        try:
+            return self.ocr.reader.readtext(img, **self.ocr.ocr_params())
+        finally:
+            torch.set_num_threads(self.threads)
+
+    def workload(self, pixels, lines):
+        """Work in a capture relative to the benchmark image; smaller captures count as one"""
+        if not self.baseline_pixels:
+            return 1.0
+        return max(1.0, pixels / self.baseline_pixels, lines / self.baseline_lines)
+
+    def record(self, elapsed, pixels=0, lines=0):
+        """Track latency and switch to the fallback path when it regresses"""
+        elapsed /= self.workload(pixels, lines)
+        self.latency = elapsed if self.latency is None else EWMA_ALPHA * elapsed + (1 - EWMA_ALPHA) * self.latency
+        if self.baseline is None:
+            return
+        if len(self.rebaseline) < REBASELINE_CAPTURES:
+            # Detection-only captures of an empty chat box would make the baseline tiny
+            if lines > 0:
+                self.rebaseline.append(elapsed)
+            if len(self.rebaseline) == REBASELINE_CAPTURES:
+                self.baseline = sorted(self.rebaseline)[REBASELINE_CAPTURES // 2]
+                self.latency = self.baseline
+            return
+        if self.latency > self.baseline * REGRESSION_FACTOR:
+            self.strikes += 1
+        else:
+            self.strikes = 0
+        if self.strikes >= REGRESSION_STRIKES:
+            self.strikes = 0
+            self.latency = self.baseline
+            self.fallback_remaining = FALLBACK_CAPTURES
+            self.fallbacks += 1
+
+    def describe(self):
+        """Short status text for the UI"""
+        if self.fallback_remaining:
+            return "fallback"
+        if self.ocr.using_gpu:
+            return f"batch ≤{self.max_batch}"
+        return f"{self.threads} threads"
@@ -0,0 +1,304 @@
+import itertools
+import multiprocessing
+import threading
+import time
+from frame_ring import FrameRing
+
+STARTUP_TIMEOUT = 180                 # model loading + calibration
+REQUEST_TIMEOUT = 30
+HEALTH_INTERVAL = 2.0
+HEALTH_TIMEOUT = 5.0
+STOP_TIMEOUT = 2.0                    # time to flush the line cache before being terminated
+
+
+def _worker_main(conn, prefer_gpu, max_threads, tune, line_cache_path):
+    """Entry point of the OCR process: owns the easyocr Reader"""
+    from governor import lower_process_priority
+    from line_cache import LineCache
+    from ocr import OCREngine
+    from ocr_scheduler import OCRScheduler
+
+    lower_process_priority()
+    ocr = OCREngine(line_cache=LineCache(line_cache_path) if line_cache_path else None)
+    using_gpu = ocr.load(prefer_gpu)
+    tuning = "defaults"
+    if tune:
+        ocr.scheduler = OCRScheduler(ocr, max_threads=max_threads)
+        tuning = ocr.scheduler.calibrate()
+    conn.send(('ready', using_gpu, tuning))
+
+    ring = None
+    while True:
+        message = conn.recv()
+        kind = message[0]
+        if kind == 'stop':
+            break
+        if kind == 'ping':
+            conn.send(('pong', message[1], time.process_time()))
+            continue
+        if kind == 'configure':
+            ocr.configure(**message[1])
+            continue
+        if kind == 'trim':
+            ocr.trim_memory()
+            continue
+        if kind == 'attach':
+            if ring:
+                ring.close()
+            ring = message[1]   # Unpickles as a handle attached to the parent's ring
+            continue
+
+        # ('ocr', request_id, operation, layout): layout is a list of
+        # (name, seq, offset, shape, strides) locating each image in the ring
+        _, request_id, operation, layout = message
+        images = None
+        try:
+            if not all(ring.is_valid(seq) for _, seq, _, _, _ in layout):
+                ring.count_dropped(1)
+                raise RuntimeError("frame was overwritten before OCR reached it")
+            images = {
+                name: ring.view(offset, shape, strides)
+                for name, seq, offset, shape, strides in layout
+            }
+            if operation == 'detect':
+                results = [tuple(int(v) for v in box) for box in ocr.detect_boxes(images[None])]
+            else:
+                if operation == 'regions':
+                    results = ocr.readtext_regions(images)
+                else:
+                    results = {None: ocr.readtext(images[None])}
+                # Plain Python types only; numpy scalars pickle much larger
+                results = {
+                    name: [([[float(x), float(y)] for x, y in bbox], text, float(prob)) for bbox, text, prob in items]
+                    for name, items in results.items()
+                }
+            conn.send(('result', request_id, results, None, time.process_time()))
+        except Exception as e:
+            conn.send(('result', request_id, None, str(e), time.process_time()))
+        finally:
+            # Drop views into the ring before it can be replaced
+            images = None
+
+    if ring:
+        ring.close()
+    if ocr.line_cache is not None:
+        ocr.line_cache.close()
+
+
+class OCRWorkerError(Exception):
+    pass
+
+
+class IsolatedOCREngine:
+    """OCREngine-compatible proxy that runs easyocr in a separate process
+
+    Frames travel through a shared FrameRing (never pickled): images that a
+    capture source already wrote into `ring` are passed by reference, others
+    are copied into a free slot. Only the small result lists come back over
+    a pipe. A monitor thread pings the worker and restarts it when it dies
+    or stops answering.
+    """
+
+    def __init__(self, max_threads=None, tune=True, on_status=None, line_cache_path=None):
+        self.max_threads = max_threads
+        self.tune = tune
+        self.line_cache_path = line_cache_path   # The worker opens its own LineCache on this file
+        self.on_status = on_status or (lambda message, status: None)
+        self.prefer_gpu = False
+        self.using_gpu = False
+        self.tuning = None
+        self.scheduler = None     # Scheduling happens inside the worker
+        self.process = None
+        self.conn = None
+        self.ring = FrameRing()
+        self.retired_rings = []   # Outgrown rings capture sources may still write into
+        self.params = {}          # OCREngine.configure arguments, replayed after restarts
+        self.lock = threading.RLock()
+        self.request_ids = itertools.count(1)
+        self.restarts = 0
+        self.child_cpu = 0.0      # CPU seconds used by previous worker processes
+        self.worker_cpu = 0.0     # CPU seconds used by the current worker
+        self.monitor_thread = None
+        self.stopping = False
+
+    @property
+    def ready(self):
+        return self.process is not None and self.process.is_alive()
+
+    def load(self, prefer_gpu=True):
+        """Start the worker and wait until its Reader is loaded"""
+        self.prefer_gpu = prefer_gpu
+        with self.lock:
+            self.start_worker()
+        if self.monitor_thread is None:
+            self.monitor_thread = threading.Thread(target=self.monitor, name='ocr-worker-monitor', daemon=True)
+            self.monitor_thread.start()
+        return self.using_gpu
+
+    def start_worker(self):
+        context = multiprocessing.get_context('spawn')
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, self.prefer_gpu, self.max_threads, self.tune, self.line_cache_path),
+            name='ocr-worker',
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        if not self.conn.poll(STARTUP_TIMEOUT):
+            self.kill_worker()
+            raise OCRWorkerError("OCR worker did not start")
+        try:
+            _, self.using_gpu, self.tuning = self.conn.recv()
+        except EOFError:
+            self.kill_worker()
+            raise OCRWorkerError("OCR worker exited during startup")
+
+        self.worker_cpu = 0.0
+        self.conn.send(('attach', self.ring))
+        if self.params:
+            self.conn.send(('configure', self.params))
+
+    def kill_worker(self):
+        self.child_cpu += self.worker_cpu
+        self.worker_cpu = 0.0
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(2)
+        self.process = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def restart(self, reason):
+        with self.lock:
+            self.on_status(f"Restarting ({reason})", "warning")
+            self.kill_worker()
+            self.restarts += 1
+            self.start_worker()
+            self.on_status("Ready (isolated)", "success")
+
+    def grow_ring(self, nbytes):
+        self.retired_rings.append(self.ring)
+        self.ring = FrameRing(self.ring.slots, max(nbytes, 2 * self.ring.slot_bytes))
+        self.conn.send(('attach', self.ring))
+
+    def place(self, img):
+        """(seq, offset, shape, strides) of an image in the ring, writing it there if needed"""
+        img = img[:, :, :3]
+        located = self.ring.locate(img)
+        if located and self.ring.is_valid(located[0]):
+            seq, offset = located
+            return seq, offset, img.shape, img.strides
+        if not self.ring.fits(img):
+            self.grow_ring(img.nbytes)
+        seq = self.ring.write(img)
+        view = self.ring.read(seq)[0]
+        return (seq,) + self.ring.locate(view)[1:] + (view.shape, view.strides)
+
+    def submit(self, operation, images):
+        """Hand images to the worker through the ring, run OCR, wait for results"""
+        with self.lock:
+            if not self.ready:
+                self.restart("worker not running")
+
+            layout = [(name,) + self.place(img) for name, img in images.items()]
+
+            request_id = next(self.request_ids)
+            self.conn.send(('ocr', request_id, operation, layout))
+            while True:
+                if not self.conn.poll(REQUEST_TIMEOUT):
+                    self.restart("OCR timed out")
+                    raise OCRWorkerError("OCR request timed out")
+                try:
+                    message = self.conn.recv()
+                except EOFError:
+                    self.restart("worker crashed")
+                    raise OCRWorkerError("OCR worker crashed")
+                if message[0] == 'result' and message[1] == request_id:
+                    _, _, results, error, cpu = message
+                    self.worker_cpu = cpu
+                    if error:
+                        raise OCRWorkerError(error)
+                    return results
+
+    def configure(self, **params):
+        """Forward OCREngine.configure to the worker (and to its restarts)"""
+        with self.lock:
+            self.params.update({key: value for key, value in params.items() if value is not None})
+            if self.ready:
+                self.conn.send(('configure', self.params))
+
+    def trim_memory(self):
+        """Ask the worker to shrink its caches"""
+        with self.lock:
+            if self.ready:
+                self.conn.send(('trim',))
+
+    @property
+    def pid(self):
+        return self.process.pid if self.ready else None
+
+    def readtext(self, img):
+        return self.submit('readtext', {None: img})[None]
+
+    def readtext_regions(self, crops):
+        return self.submit('regions', crops)
+
+    def detect_boxes(self, img):
+        return self.submit('detect', {None: img})
+
+    def ping(self):
+        """True if the worker answers within HEALTH_TIMEOUT"""
+        with self.lock:
+            if not self.ready:
+                return False
+            request_id = next(self.request_ids)
+            try:
+                self.conn.send(('ping', request_id))
+                if not self.conn.poll(HEALTH_TIMEOUT):
+                    return False
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                return False
+            if message[0] == 'pong':
+                self.worker_cpu = message[2]
+            return message[0] == 'pong'
+
+    def monitor(self):
+        """Health-check loop; restarts a dead or hung worker"""
+        while not self.stopping:
+            time.sleep(HEALTH_INTERVAL)
+            if self.stopping:
+                break
+            # A running OCR request holds the lock; that's healthy, skip this round
+            if not self.lock.acquire(blocking=False):
+                continue
+            try:
+                if not self.ping():
+                    try:
+                        self.restart("health check failed")
+                    except OCRWorkerError as e:
+                        self.on_status(f"Failed: {e}", "error")
+            finally:
+                self.lock.release()
+
+    def cpu_time(self):
+        """CPU seconds used by all OCR worker processes so far"""
+        return self.child_cpu + self.worker_cpu
+
+    def close(self):
+        self.stopping = True
+        with self.lock:
+            if self.conn is not None and self.ready:
+                try:
+                    self.conn.send(('stop',))
+                    self.process.join(STOP_TIMEOUT)
+                except OSError:
+                    pass
+            self.kill_worker()
+            for ring in self.retired_rings + [self.ring]:
+                ring.close()
+            self.retired_rings = []
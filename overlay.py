@@ -0,0 +1,267 @@
+import sys
+import threading
+import time
+import tkinter as tk
+
+from engine import Sink
+from normalize import cache_key
+
+OVERLAY_WIDTH = 420
+OVERLAY_MARGIN = 12
+MAX_LINES = 12
+LINE_TTL = 30.0               # seconds a line stays after its last update, like the game's chat fade
+LINE_SPACING = 4
+FLUSH_INTERVAL_MS = 100       # at most 10 overlay updates per second
+FRAME_BUDGET_MS = 4.0         # Tk work per update; the rest waits for the next one
+TRANSPARENT_COLOR = '#010203' # color key: pixels of this color are see-through
+FONT = ('Segoe UI', 12, 'bold')
+COLORS = {
+    'provisional': '#9da5b4',
+    'draft': '#c8ccd4',
+    'translated': '#ffffff',
+    'error': '#ff7b72',
+}
+SHADOW_COLOR = '#000000'
+STATE_RANKS = {'provisional': 0, 'draft': 1, 'translated': 2, 'error': 2}
+
+GWL_EXSTYLE = -20
+WS_EX_LAYERED = 0x00080000
+WS_EX_TRANSPARENT = 0x00000020
+WS_EX_TOOLWINDOW = 0x00000080
+WS_EX_NOACTIVATE = 0x08000000
+
+
+def make_click_through(window):
+    """Let mouse input pass through a window to the game below (Windows only); True on success"""
+    if sys.platform != 'win32':
+        return False
+    try:
+        import ctypes
+        user32 = ctypes.windll.user32
+        window.update_idletasks()
+        hwnd = user32.GetParent(window.winfo_id()) or window.winfo_id()
+        style = user32.GetWindowLongW(hwnd, GWL_EXSTYLE)
+        style |= WS_EX_LAYERED | WS_EX_TRANSPARENT | WS_EX_TOOLWINDOW | WS_EX_NOACTIVATE
+        return bool(user32.SetWindowLongW(hwnd, GWL_EXSTYLE, style))
+    except (OSError, AttributeError):
+        return False
+
+
+def overlay_geometry(chat_region, screen_width, width=OVERLAY_WIDTH, margin=OVERLAY_MARGIN):
+    """(x, y, width, height) beside the chat box: to its right, or to its left if the screen ends"""
+    x = chat_region['left'] + chat_region['width'] + margin
+    if x + width > screen_width:
+        x = max(0, chat_region['left'] - margin - width)
+    return x, chat_region['top'], width, chat_region['height']
+
+
+def entry_key(entry):
+    """Overlay line ID: the tracker's line ID, else the line's region and text"""
+    if entry.get('line_id') is not None:
+        return entry['line_id']
+    return entry.get('region'), cache_key(entry['original'])
+
+
+def entry_text(entry, state):
+    name, separator, _ = entry['original'].partition(': ')
+    prefix = f"{name}: " if separator else ""
+    if state == 'draft':
+        drafts = [text for text in entry.get('drafts', {}).values() if text]
+        return prefix + " │ ".join(strip_prefix(text, name) for text in drafts) if drafts else entry['original']
+    if state == 'translated':
+        translations = [text for text in entry['translations'].values() if text]
+        if translations:
+            return prefix + " │ ".join(strip_prefix(text, name) for text in translations)
+        return entry['original']
+    return entry['original']
+
+
+def strip_prefix(text, name):
+    """Translations keep the "Player: " prefix; it is shown once"""
+    return text.split(': ', 1)[1] if text.startswith(f"{name}: ") else text
+
+
+class OverlayLine:
+    def __init__(self, text_item, shadow_item, height, state):
+        self.text_item = text_item
+        self.shadow_item = shadow_item
+        self.height = height
+        self.state = state
+        self.y = None            # top edge on the canvas
+        self.updated = time.monotonic()
+
+
+class ChatOverlay(Sink):
+    """Topmost, click-through window drawing translations beside the chat box
+
+    Engine threads only queue changes, keyed by line ID; repeated updates
+    of a line before the next flush collapse into one. Every
+    FLUSH_INTERVAL_MS the Tk thread applies queued changes until
+    FRAME_BUDGET_MS is spent: a changed line has its canvas items
+    reconfigured, lines above it are moved only if its height changed,
+    and nothing else is touched. There is no full repaint, so drawing
+    stays cheap even while the game renders.
+    """
+
+    def __init__(self, root, chat_region, max_lines=MAX_LINES, line_ttl=LINE_TTL):
+        self.root = root
+        self.max_lines = max_lines
+        self.line_ttl = line_ttl
+        self.lines = {}              # key -> OverlayLine, Tk thread only
+        self.order = []              # keys, oldest first
+        self.pending = {}            # key -> (text, state), filled by engine threads
+        self.states = {}             # key -> latest state queued, so a re-read line never falls back
+        self.lock = threading.Lock()
+        self.redraws = 0
+        self.deferred = 0            # flushes that ran out of budget
+        self.closed = False
+
+        self.window = tk.Toplevel(root)
+        self.window.overrideredirect(True)
+        self.window.attributes('-topmost', True)
+        self.window.configure(bg=TRANSPARENT_COLOR)
+        try:
+            self.window.attributes('-transparentcolor', TRANSPARENT_COLOR)
+        except tk.TclError:
+            # No color keying outside Windows; fall back to a see-through window
+            self.window.attributes('-alpha', 0.85)
+        self.canvas = tk.Canvas(self.window, bg=TRANSPARENT_COLOR, highlightthickness=0)
+        self.canvas.pack(fill='both', expand=True)
+        self.move_to(chat_region)
+        self.click_through = make_click_through(self.window)
+        self.root.after(FLUSH_INTERVAL_MS, self.flush)
+
+    def move_to(self, chat_region):
+        x, y, width, height = overlay_geometry(chat_region, self.window.winfo_screenwidth())
+        self.width, self.height = width, height
+        self.window.geometry(f"{width}x{height}+{x}+{y}")
+        # Anchor the stack to the new bottom edge
+        for line in self.lines.values():
+            line.y = None
+        self.layout()
+
+    def queue(self, entry, state):
+        key = entry_key(entry)
+        with self.lock:
+            # Without a tracker every capture reports visible lines as provisional again
+            if STATE_RANKS[state] < STATE_RANKS[self.states.get(key, 'provisional')]:
+                self.pending.setdefault(key, None)
+                return
+            self.states[key] = state
+            self.pending[key] = (entry_text(entry, state), state)
+
+    # Sink hooks, called from engine threads
+
+    def message_provisional(self, frame, entry):
+        self.queue(entry, 'provisional')
+
+    def message_drafted(self, frame, entry):
+        self.queue(entry, 'draft')
+
+    def message_translated(self, frame, entry):
+        self.queue(entry, 'error' if entry['error'] and not entry['translations'] else 'translated')
+
+    # Tk thread
+
+    def flush(self):
+        if self.closed:
+            return
+        started = time.perf_counter()
+        budget = FRAME_BUDGET_MS / 1000
+        moved = False
+        while time.perf_counter() - started < budget:
+            with self.lock:
+                if not self.pending:
+                    break
+                key = next(iter(self.pending))
+                update = self.pending.pop(key)
+            if update is None:
+                # Seen again, nothing new to show: just keep it on screen
+                if key in self.lines:
+                    self.lines[key].updated = time.monotonic()
+                continue
+            moved = self.apply(key, *update) or moved
+        else:
+            self.deferred += 1
+
+        moved = self.expire() or moved
+        if moved:
+            self.layout()
+        self.root.after(FLUSH_INTERVAL_MS, self.flush)
+
+    def apply(self, key, text, state):
+        """Create or update one line's items; True if the stack needs laying out"""
+        line = self.lines.get(key)
+        if line is None:
+            shadow = self.canvas.create_text(
+                1, 1, text=text, anchor='nw', width=self.width - 2, font=FONT, fill=SHADOW_COLOR
+            )
+            item = self.canvas.create_text(
+                0, 0, text=text, anchor='nw', width=self.width - 2, font=FONT, fill=COLORS[state]
+            )
+            line = OverlayLine(item, shadow, self.item_height(item), state)
+            self.lines[key] = line
+            self.order.append(key)
+            self.redraws += 1
+            return True
+
+        line.updated = time.monotonic()
+        if self.canvas.itemcget(line.text_item, 'text') == text and line.state == state:
+            return False
+        self.canvas.itemconfigure(line.text_item, text=text, fill=COLORS[state])
+        self.canvas.itemconfigure(line.shadow_item, text=text)
+        line.state = state
+        self.redraws += 1
+        height = self.item_height(line.text_item)
+        if height != line.height:
+            line.height = height
+            return True
+        return False
+
+    def item_height(self, item):
+        bbox = self.canvas.bbox(item)
+        return bbox[3] - bbox[1] if bbox else 0
+
+    def expire(self):
+        """Drop lines past their time or beyond max_lines; True if any were dropped"""
+        now = time.monotonic()
+        expired = [key for key in self.order if now - self.lines[key].updated > self.line_ttl]
+        expired += self.order[:max(0, len(self.order) - self.max_lines)]
+        for key in dict.fromkeys(expired):
+            line = self.lines.pop(key)
+            self.canvas.delete(line.text_item, line.shadow_item)
+            self.order.remove(key)
+        with self.lock:
+            # Also forgets lines that were queued but never drawn
+            for key in [key for key in self.states if key not in self.lines and key not in self.pending]:
+                del self.states[key]
+        return bool(expired)
+
+    def layout(self):
+        """Stack lines upwards from the bottom edge, moving only the ones whose place changed"""
+        y = self.height
+        for key in reversed(self.order):
+            line = self.lines[key]
+            y -= line.height + LINE_SPACING
+            if line.y is None:
+                self.canvas.coords(line.text_item, 0, y)
+                self.canvas.coords(line.shadow_item, 1, y + 1)
+            elif line.y != y:
+                self.canvas.move(line.text_item, 0, y - line.y)
+                self.canvas.move(line.shadow_item, 0, y - line.y)
+            line.y = y
+
+    def clear(self):
+        with self.lock:
+            self.pending.clear()
+            self.states.clear()
+        self.canvas.delete('all')
+        self.lines.clear()
+        self.order.clear()
+
+    def stats(self):
+        return {'lines': len(self.lines), 'redraws': self.redraws, 'deferred': self.deferred}
+
+    def close(self):
+        self.closed = True
+        self.window.destroy()
@@ -0,0 +1,7 @@
+import sys, os
+
+def resource_path(relative_path):
+    """ Get absolute path to resource (for PyInstaller) """
+    if hasattr(sys, '_MEIPASS'):
+        return os.path.join(sys._MEIPASS, relative_path)
+    return os.path.join(os.path.abspath("."), relative_path)
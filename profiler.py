@@ -0,0 +1,185 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from engine import Sink
+
+SAMPLE_INTERVAL = 0.005     # seconds between stack samples
+DEFAULT_CAPTURES = 5
+MAX_STACK_DEPTH = 64
+TOP_FUNCTIONS = 15
+
+# Module -> pipeline stage; a sample belongs to the innermost frame found here
+STAGE_MODULES = {
+    'capture': 'capture', 'frame_ring': 'capture', 'mss': 'capture',
+    'ocr': 'ocr', 'ocr_scheduler': 'ocr', 'ocr_worker': 'ocr', 'recognizer_router': 'ocr',
+    'line_cache': 'ocr', 'easyocr': 'ocr', 'torch': 'ocr',
+    'translation': 'translation', 'translation_server': 'translation', 'rate_limiter': 'translation',
+    'glossary': 'translation', 'googletrans': 'translation', 'httpx': 'translation',
+    'engine': 'engine', 'normalize': 'engine', 'tracker': 'engine', 'regions': 'engine',
+}
+STAGES = ('capture', 'ocr', 'translation', 'engine', 'other')
+# Innermost frames of threads that are only waiting for work
+IDLE_MODULES = ('threading', 'queue', 'selectors', 'tkinter')
+IDLE_FUNCTIONS = (('thread', '_worker'), ('main', 'monitor_keys'))   # blocked in C: SimpleQueue.get, sleep
+
+
+def module_parts(filename):
+    """Path components of a code object's file, without extension ('site-packages/easyocr/...')"""
+    return re.split(r'[\\/]', os.path.splitext(filename)[0])
+
+
+def frame_stage(frames):
+    """Stage of a sample: innermost frame from a known module, walking outwards"""
+    for code in frames:
+        for part in reversed(module_parts(code.co_filename)):
+            stage = STAGE_MODULES.get(part)
+            if stage:
+                return stage
+    return 'other'
+
+
+def is_idle(code):
+    parts = module_parts(code.co_filename)
+    return any(part in IDLE_MODULES for part in parts[-2:]) or (parts[-1], code.co_name) in IDLE_FUNCTIONS
+
+
+def frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def thread_label(name):
+    """Thread name without its counter, so repeated capture threads fold together"""
+    return re.sub(r'[-_]\d+', '', name).replace(';', ',')
+
+
+class SamplingProfiler(Sink):
+    """Samples the stacks of every thread while the next `captures` captures run
+
+    A background thread reads sys._current_frames() every `interval`
+    seconds; nothing is instrumented, so the pipeline runs at full speed
+    and the profiler works in the frozen build. Attach it to the engine as
+    a sink: it counts captures through frame_started/frame_finished and
+    writes its report once the last one finished.
+
+    Output is a collapsed-stack file (one "thread;outer;...;inner count"
+    line per stack, readable by flamegraph.pl and speedscope) and a text
+    summary of time per pipeline stage.
+    """
+
+    def __init__(self, output_dir, captures=DEFAULT_CAPTURES, interval=SAMPLE_INTERVAL, on_finished=None):
+        self.output_dir = output_dir
+        self.captures = captures
+        self.interval = interval
+        self.on_finished = on_finished or (lambda paths: None)
+        self.stacks = Counter()              # collapsed stack -> samples
+        self.stage_samples = Counter()
+        self.self_samples = Counter()        # innermost function -> samples
+        self.idle_samples = 0
+        self.samples = 0
+        self.ticks = 0
+        self.capture_times = []
+        self.started_frames = {}
+        self.finished = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.started = None
+        self.elapsed = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self.run, name='profiler', daemon=True)
+        self.thread.start()
+
+    @property
+    def running(self):
+        return self.thread is not None and not self.finished.is_set()
+
+    def run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self.finished.wait(self.interval):
+            for thread in threading.enumerate():
+                names.setdefault(thread.ident, thread.name)
+            self.ticks += 1
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self.sample(names.get(ident, 'thread'), frame)
+
+    def sample(self, thread_name, frame):
+        codes = []
+        while frame is not None and len(codes) < MAX_STACK_DEPTH:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        if not codes:
+            return
+        with self.lock:
+            self.samples += 1
+            if is_idle(codes[0]):
+                self.idle_samples += 1
+                return
+            self.stage_samples[frame_stage(codes)] += 1
+            self.self_samples[frame_label(codes[0])] += 1
+            stack = ";".join([thread_label(thread_name)] + [frame_label(code) for code in reversed(codes)])
+            self.stacks[stack] += 1
+
+    def frame_started(self, frame):
+        self.started_frames[id(frame)] = time.perf_counter()
+
+    def frame_finished(self, frame, result):
+        started = self.started_frames.pop(id(frame), None)
+        if started is None or not self.running:
+            return
+        self.capture_times.append(time.perf_counter() - started)
+        if len(self.capture_times) >= self.captures:
+            self.on_finished(self.stop())
+
+    def stop(self):
+        """Stop sampling and write the report; returns (collapsed path, summary path)"""
+        if self.finished.is_set():
+            return None
+        self.finished.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.elapsed = time.perf_counter() - self.started if self.started else 0.0
+        return self.write()
+
+    def write(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, time.strftime("profile-%Y%m%d-%H%M%S"))
+        with self.lock:
+            with open(base + '.folded', 'w', encoding='utf-8') as f:
+                for stack, count in sorted(self.stacks.items()):
+                    f.write(f"{stack} {count}\n")
+            with open(base + '.txt', 'w', encoding='utf-8') as f:
+                f.write(self.summary())
+        return base + '.folded', base + '.txt'
+
+    def summary(self):
+        """Per-stage breakdown of the busy samples, plus capture timings"""
+        busy = sum(self.stage_samples.values())
+        # Every thread is sampled once per tick
+        seconds_per_sample = self.elapsed / self.ticks if self.ticks else self.interval
+        lines = [
+            f"Captures profiled: {len(self.capture_times)}",
+            f"Sampling: {self.samples} samples over {self.elapsed:.2f}s, {self.idle_samples} idle",
+        ]
+        if self.capture_times:
+            times = sorted(self.capture_times)
+            lines.append(
+                f"Capture time: mean {sum(times) / len(times) * 1000:.0f} ms, "
+                f"median {times[len(times) // 2] * 1000:.0f} ms, max {times[-1] * 1000:.0f} ms"
+            )
+        lines += ["", "Stage          samples   share   ~thread time"]
+        for stage in STAGES:
+            count = self.stage_samples[stage]
+            share = count / busy * 100 if busy else 0.0
+            lines.append(f"{stage:<14}{count:>8}  {share:>5.1f}%  {count * seconds_per_sample:>8.2f}s")
+        lines += ["", f"Top {TOP_FUNCTIONS} functions (innermost frame)"]
+        for label, count in self.self_samples.most_common(TOP_FUNCTIONS):
+            lines.append(f"{count:>8}  {label}")
+        return "\n".join(lines) + "\n"
+
@@ -0,0 +1,240 @@
+import itertools
+import threading
+import time
+
+from defaults import DEFAULT_RATE, DEFAULT_BURST
+
+BACKOFF_SECONDS = 30.0      # pause after the backend turned a request away
+THROTTLE_MARKERS = ('429', 'too many requests', 'rate limit')
+# Priorities are (frame, row) tuples; requests without one rank below every line
+NO_PRIORITY = (0, 0)
+
+
+class StaleRequest(Exception):
+    """The line scrolled away while its request was queued"""
+
+
+class Ticket:
+    """A request's place in the queue
+
+    Higher `priority` goes first; clicked tickets go before all others.
+    Priorities are tuples, so tickets of any origin compare.
+    `is_stale` is polled while the ticket waits, and stale tickets are
+    dropped instead of being sent.
+    """
+
+    def __init__(self, priority=NO_PRIORITY, is_stale=None):
+        self.priority = priority
+        self.clicked = False
+        self.is_stale = is_stale or (lambda: False)
+        self.seq = None
+
+    def order(self):
+        # Equal priority: first come, first served
+        return (self.clicked, self.priority, -self.seq)
+
+
+class SharedTicket(Ticket):
+    """Ticket of one request made on behalf of several lines (coalesced or repeated)
+
+    It ranks as its most urgent member and is only stale once every
+    member is; a member without a ticket never goes stale. Members can
+    join while the request waits.
+    """
+
+    def __init__(self, tickets=()):
+        self.tickets = []
+        self.untracked = False
+        self.seq = None
+        for ticket in tickets:
+            self.add(ticket)
+
+    def add(self, ticket):
+        if ticket is None:
+            self.untracked = True
+        else:
+            self.tickets.append(ticket)
+
+    @property
+    def priority(self):
+        return max((ticket.priority for ticket in self.tickets), default=NO_PRIORITY)
+
+    @property
+    def clicked(self):
+        return any(ticket.clicked for ticket in self.tickets)
+
+    def is_stale(self):
+        return not self.untracked and all(ticket.is_stale() for ticket in self.tickets)
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is)"""
+        self.refill(now)
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def block(self, now, seconds):
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class RateLimiter:
+    """Token bucket that releases queued requests in priority order
+
+    Requests that find the bucket empty wait; whenever a token frees up the
+    waiting ticket with the highest order() gets it. Stale tickets leave
+    the queue with StaleRequest.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.bucket = TokenBucket(rate, burst)
+        self.waiting = []
+        self.seqs = itertools.count()
+        self.condition = threading.Condition()
+        self.throttled = 0       # requests that had to wait for a token
+        self.rejections = 0      # backend refusals that triggered a backoff
+        self.dropped = 0         # stale requests never sent
+        self.sent = 0
+
+    def configure(self, rate=None, burst=None):
+        with self.condition:
+            now = time.monotonic()
+            self.bucket.refill(now)
+            if rate is not None:
+                self.bucket.rate = rate
+            if burst is not None:
+                self.bucket.burst = burst
+                self.bucket.tokens = min(self.bucket.tokens, burst)
+            self.condition.notify_all()
+
+    def acquire(self, ticket=None):
+        """Block until `ticket` may call the backend; raises StaleRequest"""
+        ticket = ticket or Ticket()
+        with self.condition:
+            ticket.seq = next(self.seqs)
+            self.waiting.append(ticket)
+            waited = False
+            try:
+                while True:
+                    self.drop_stale()
+                    if ticket not in self.waiting:
+                        raise StaleRequest("the line left the screen before it was translated")
+                    delay = self.bucket.wait_time(time.monotonic())
+                    if not delay and max(self.waiting, key=Ticket.order) is ticket:
+                        self.bucket.take()
+                        self.sent += 1
+                        return
+                    if delay and not waited:
+                        waited = True
+                        self.throttled += 1
+                    # Wake up for the next token, or when the queue changes
+                    self.condition.wait(delay or None)
+            finally:
+                if ticket in self.waiting:
+                    self.waiting.remove(ticket)
+                self.condition.notify_all()
+
+    def drop_stale(self):
+        fresh = [ticket for ticket in self.waiting if not ticket.is_stale()]
+        self.dropped += len(self.waiting) - len(fresh)
+        self.waiting = fresh
+
+    def prioritize(self, ticket):
+        """Move a ticket ahead of everything that was not clicked"""
+        with self.condition:
+            ticket.clicked = True
+            self.condition.notify_all()
+
+    def wake(self):
+        """Re-check queued tickets, e.g. after some of them went stale"""
+        with self.condition:
+            self.condition.notify_all()
+
+    def backoff(self, seconds=BACKOFF_SECONDS):
+        """Hold all requests back after the backend refused one"""
+        with self.condition:
+            self.rejections += 1
+            self.bucket.block(time.monotonic(), seconds)
+
+    @property
+    def depth(self):
+        return len(self.waiting)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'queued': len(self.waiting),
+                'throttled': self.throttled,
+                'rejections': self.rejections,
+                'dropped': self.dropped,
+                'sent': self.sent,
+                'blocked': max(0.0, self.bucket.blocked_until - time.monotonic()),
+            }
+
+
+def is_throttling_error(error):
+    message = str(error).lower()
+    return any(marker in message for marker in THROTTLE_MARKERS)
+
+
+class RateLimitedTranslator:
+    """Backend wrapper: every upstream call waits for a token from the limiter"""
+
+    def __init__(self, backend, limiter):
+        self.backend = backend
+        self.limiter = limiter
+        self.name = backend.name
+
+    def translate(self, text, dest, ticket=None):
+        self.limiter.acquire(ticket)
+        try:
+            return self.backend.translate(text, dest=dest, ticket=ticket)
+        except Exception as e:
+            if is_throttling_error(e):
+                self.limiter.backoff()
+            raise
+
+    def translate_batch(self, texts, dest, tickets=None):
+        """One token per line, then a single backend batch of the lines that did not go stale meanwhile"""
+        tickets = tickets or [None] * len(texts)
+        translated = [None] * len(texts)
+        sending = []
+        for i, ticket in enumerate(tickets):
+            try:
+                self.limiter.acquire(ticket)
+                sending.append(i)
+            except StaleRequest as e:
+                translated[i] = e
+        if not sending:
+            return translated
+        try:
+            results = self.backend.translate_batch(
+                [texts[i] for i in sending], dest=dest, tickets=[tickets[i] for i in sending]
+            )
+        except Exception as e:
+            results = [e] * len(sending)
+        for i, result in zip(sending, results):
+            translated[i] = result
+        if any(isinstance(result, Exception) and is_throttling_error(result) for result in results):
+            self.limiter.backoff()
+        return translated
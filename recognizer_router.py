@@ -0,0 +1,248 @@
+import gc
+import threading
+from collections import OrderedDict
+
+import cv2
+import easyocr
+import numpy as np
+import torch
+
+from defaults import DEFAULT_LANGUAGES, DEFAULT_MEMORY_BUDGET_MB
+
+# easyocr recognition models, one per script; every one of them also reads English
+RECOGNIZER_GROUPS = {
+    'cyrillic': ['en', 'ru'],
+    'latin': ['en', 'tr'],
+    'japanese': ['en', 'ja'],
+    'korean': ['en', 'ko'],
+    'chinese': ['en', 'ch_sim'],
+}
+PRIMARY_GROUP = 'cyrillic'   # loaded with the detector at startup
+LANGUAGE_GROUPS = {
+    'en': 'cyrillic',
+    'ru': 'cyrillic',
+    'tr': 'latin',
+    'ja': 'japanese',
+    'ko': 'korean',
+    'zh': 'chinese',
+}
+SUPPORTED_LANGUAGES = list(LANGUAGE_GROUPS)
+# Scripts written in square, evenly sized glyphs
+SQUARE_SCRIPT_GROUPS = ('japanese', 'korean', 'chinese')
+
+SQUARE_GLYPH_ASPECT = 0.8      # median glyph width / ink height from which a line looks CJK
+MIN_GLYPH_SHARE = 0.15         # narrower ink runs are punctuation or stray strokes
+SECOND_OPINION_CONFIDENCE = 0.5
+
+
+def glyph_aspect(crop):
+    """Median glyph width relative to the ink height of a line crop, or None
+
+    Latin and Cyrillic letters are about half as wide as the line is tall;
+    hangul, kana and hanzi fill a square. Glyphs are approximated by runs
+    of columns containing ink, which is cheap and needs no model.
+    """
+    gray = cv2.cvtColor(crop[:, :, :3], cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    _, mask = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # Text is the minority of the pixels, whatever its color
+    if np.count_nonzero(mask) > mask.size / 2:
+        mask = 1 - mask
+    rows = np.flatnonzero(mask.any(axis=1))
+    if len(rows) < 2:
+        return None
+    height = rows[-1] - rows[0] + 1
+
+    edges = np.diff(np.concatenate(([0], mask.any(axis=0).astype(np.int8), [0])))
+    widths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    widths = widths[widths >= height * MIN_GLYPH_SHARE]
+    if not len(widths):
+        return None
+    return float(np.median(widths)) / height
+
+
+def model_megabytes(module):
+    """Size of a torch module's weights, including dynamically quantized ones"""
+    total = 0
+    stack = list(module.state_dict().values())
+    while stack:
+        value = stack.pop()
+        if isinstance(value, torch.Tensor):
+            total += value.numel() * value.element_size()
+        elif isinstance(value, (tuple, list)):
+            stack.extend(value)
+    return total / (1024 * 1024)
+
+
+def horizontal_key(box):
+    """Top-left corner of an (x_min, x_max, y_min, y_max) box as easyocr reports it"""
+    return max(0, int(box[0])), max(0, int(box[2]))
+
+
+def result_key(result):
+    return int(result[0][0][0]), int(result[0][0][1])
+
+
+class RecognizerRouter:
+    """Sends each detected line to the recognizer for its script
+
+    Only the primary en/ru recognizer, which shares its Reader with the
+    detector, is loaded up front. The other recognizers are loaded the
+    first time a line needs them, and the least recently used ones are
+    unloaded once their weights exceed the memory budget. The script
+    guess only decides which recognizer reads a line first: lines read
+    with low confidence get a second opinion from the other enabled
+    recognizers and keep the best reading.
+    """
+
+    def __init__(self, languages=None, model_dir=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+        self.model_dir = model_dir
+        self.memory_budget_mb = memory_budget_mb
+        self.use_gpu = False
+        self.readers = OrderedDict()   # group -> Reader, least recently used first
+        self.sizes = {}                # group -> MB of weights
+        self.lock = threading.RLock()
+        self.loads = 0
+        self.evictions = 0
+        self.set_languages(languages or DEFAULT_LANGUAGES)
+
+    def set_languages(self, languages):
+        """Enable recognizers for these language codes (see SUPPORTED_LANGUAGES)"""
+        groups = []
+        for language in languages:
+            group = LANGUAGE_GROUPS.get(language)
+            if group and group not in groups:
+                groups.append(group)
+        with self.lock:
+            self.groups = groups or [PRIMARY_GROUP]
+            for group in list(self.readers):
+                if group not in self.groups and group != PRIMARY_GROUP:
+                    self.unload(group)
+
+    def set_memory_budget(self, memory_budget_mb):
+        with self.lock:
+            self.memory_budget_mb = memory_budget_mb
+            self.evict()
+
+    def attach_primary(self, reader, use_gpu):
+        """Register the Reader OCREngine loaded with the detector"""
+        with self.lock:
+            self.use_gpu = use_gpu
+            self.readers[PRIMARY_GROUP] = reader
+            self.sizes[PRIMARY_GROUP] = model_megabytes(reader.recognizer)
+
+    @property
+    def active(self):
+        """True when lines may need a recognizer other than the primary one"""
+        return self.groups != [PRIMARY_GROUP]
+
+    def reader(self, group):
+        """Recognizer for a script group, loading it on first use"""
+        with self.lock:
+            if group in self.readers:
+                self.readers.move_to_end(group)
+                return self.readers[group]
+            reader = easyocr.Reader(
+                RECOGNIZER_GROUPS[group],
+                gpu=self.use_gpu,
+                model_storage_directory=self.model_dir,
+                download_enabled=True,
+                detector=False,
+                verbose=False
+            )
+            self.readers[group] = reader
+            self.sizes[group] = model_megabytes(reader.recognizer)
+            self.loads += 1
+            self.evict(keep=group)
+            return reader
+
+    def used_mb(self):
+        return sum(self.sizes.values())
+
+    def evict(self, keep=None):
+        """Unload least recently used recognizers until the budget holds"""
+        with self.lock:
+            while self.used_mb() > self.memory_budget_mb:
+                victims = [group for group in self.readers if group not in (PRIMARY_GROUP, keep)]
+                if not victims:
+                    break
+                self.unload(victims[0])
+                self.evictions += 1
+
+    def trim(self):
+        """Unload every recognizer but the primary one; they reload on demand"""
+        with self.lock:
+            for group in list(self.readers):
+                if group != PRIMARY_GROUP:
+                    self.unload(group)
+
+    def unload(self, group):
+        del self.readers[group]
+        del self.sizes[group]
+        gc.collect()
+        if self.use_gpu:
+            torch.cuda.empty_cache()
+
+    def route(self, img, box):
+        """Group to read a horizontal box with first"""
+        square = [group for group in self.groups if group in SQUARE_SCRIPT_GROUPS]
+        alphabetic = [group for group in self.groups if group not in SQUARE_SCRIPT_GROUPS]
+        if not square:
+            return alphabetic[0]
+        if not alphabetic:
+            return square[0]
+        x_min, x_max, y_min, y_max = (int(value) for value in box)
+        crop = img[max(0, y_min):y_max, max(0, x_min):x_max]
+        aspect = glyph_aspect(crop) if crop.size else None
+        return square[0] if aspect is not None and aspect >= SQUARE_GLYPH_ASPECT else alphabetic[0]
+
+    def recognize(self, img, horizontal_list, free_list, **params):
+        """reader.recognize over the routed recognizers, readtext-style results"""
+        routed = OrderedDict()
+        for box in horizontal_list:
+            routed.setdefault(self.route(img, box), []).append(box)
+        # Rotated boxes are rare in chat; they go to the first alphabetic recognizer
+        free_group = next((group for group in self.groups if group not in SQUARE_SCRIPT_GROUPS), self.groups[0])
+        if free_list:
+            routed.setdefault(free_group, [])
+
+        results = []
+        best = {}   # box key -> (box, result, groups tried)
+        for group, boxes in routed.items():
+            keys = {horizontal_key(box): box for box in boxes}
+            free = free_list if group == free_group else []
+            for result in self.reader(group).recognize(img, boxes, free, **params):
+                box = keys.get(result_key(result))
+                if box is None:
+                    results.append(result)
+                else:
+                    best[result_key(result)] = (box, result, {group})
+
+        for group in self.groups:
+            doubtful = [
+                box for box, result, tried in best.values()
+                if result[2] < SECOND_OPINION_CONFIDENCE and group not in tried
+            ]
+            if not doubtful:
+                continue
+            for result in self.reader(group).recognize(img, doubtful, [], **params):
+                key = result_key(result)
+                if key not in best:
+                    continue
+                box, previous, tried = best[key]
+                tried.add(group)
+                if result[2] > previous[2]:
+                    best[key] = (box, result, tried)
+
+        results.extend(result for _, result, _ in best.values())
+        # Same order easyocr uses: top to bottom
+        results.sort(key=lambda item: item[0][0][1])
+        return results
+
+    def stats(self):
+        with self.lock:
+            return {
+                'loaded': list(self.readers),
+                'memory_mb': round(self.used_mb(), 1),
+                'loads': self.loads,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,247 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from capture import Frame, ScreenCaptureSource, slice_region
+
+FILE_MAGIC = b'VCTREC01'
+CHUNK_MAGIC = b'CHNK'
+INDEX_MAGIC = b'VCTRIDX1'
+CHUNK_HEADER = struct.Struct('<4sII')    # magic, metadata length, compressed data length
+FOOTER = struct.Struct('<Q8s')           # index offset, magic
+
+RECORDING_EXTENSION = '.vctrec'
+CHUNK_FRAMES = 16
+CHUNK_BYTES = 16 * 1024 * 1024           # raw pixels per chunk, whichever limit comes first
+COMPRESSION_LEVEL = 1                    # deltas of a mostly static chat box compress well even at 1
+
+
+class RecordingError(Exception):
+    """The file is not a frame recording"""
+
+
+class FrameRecorder:
+    """Write captured frames with their timestamps to a chunked, compressed archive
+
+    Frames are grouped into chunks of up to CHUNK_FRAMES. Within a chunk,
+    each frame is stored as the XOR with the previous one, so the unchanged
+    parts of the chat box compress to almost nothing. Every chunk starts
+    with a full frame and carries its own metadata, so it decodes on its
+    own. close() appends an index of the chunks; a recording cut short
+    without one is still readable, it is just scanned on open.
+    """
+
+    def __init__(self, path, chunk_frames=CHUNK_FRAMES, level=COMPRESSION_LEVEL):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.level = level
+        self.file = open(path, 'wb')
+        self.file.write(FILE_MAGIC)
+        self.chunks = []            # [offset, frame count, first timestamp]
+        self.meta = []
+        self.data = []
+        self.data_bytes = 0
+        self.previous = None
+        self.frames = 0
+        self.lock = threading.Lock()
+
+    def record(self, frame, region=None, regions=None):
+        """Append a frame; `region` is the screen region it shows, `regions` the named regions inside it"""
+        img = np.ascontiguousarray(frame.image)
+        with self.lock:
+            if self.file is None:
+                return
+            delta = self.previous is not None and self.previous.shape == img.shape
+            payload = np.bitwise_xor(img, self.previous) if delta else img
+            self.previous = img.copy()
+            meta = {'timestamp': frame.timestamp, 'shape': list(img.shape), 'delta': delta}
+            if region:
+                meta['region'] = region
+            if regions:
+                meta['regions'] = regions
+            self.meta.append(meta)
+            self.data.append(payload.tobytes())
+            self.data_bytes += img.nbytes
+            self.frames += 1
+            if len(self.meta) >= self.chunk_frames or self.data_bytes >= CHUNK_BYTES:
+                self.write_chunk()
+
+    def write_chunk(self):
+        if not self.meta:
+            return
+        meta = json.dumps(self.meta).encode('utf-8')
+        compressed = zlib.compress(b''.join(self.data), self.level)
+        self.chunks.append([self.file.tell(), len(self.meta), self.meta[0]['timestamp']])
+        self.file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, len(meta), len(compressed)))
+        self.file.write(meta)
+        self.file.write(compressed)
+        self.meta, self.data, self.data_bytes = [], [], 0
+        # The next chunk starts with a full frame
+        self.previous = None
+
+    def close(self):
+        with self.lock:
+            if self.file is None:
+                return
+            self.write_chunk()
+            index_offset = self.file.tell()
+            self.file.write(json.dumps({'frames': self.frames, 'chunks': self.chunks}).encode('utf-8'))
+            self.file.write(FOOTER.pack(index_offset, INDEX_MAGIC))
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordingCaptureSource:
+    """Screen capture source that also records every grab"""
+
+    def __init__(self, source, recorder):
+        self.source = source
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self.source, name)
+
+    def grab(self):
+        frame = self.source.grab()
+        regions = getattr(self.source, 'named_regions', None)
+        self.recorder.record(frame, self.source.region, regions if frame.regions else None)
+        return frame
+
+    def frames(self, interval=1.0, count=None):
+        return ScreenCaptureSource.frames(self, interval, count)
+
+    def close(self):
+        self.recorder.close()
+
+
+class ReplaySource:
+    """Feed a recording back through the pipeline like a live capture
+
+    The archive is memory-mapped and decompressed one chunk at a time, so
+    recordings larger than RAM replay fine. With `realtime` frames are
+    released at the pace they were captured, otherwise as fast as the
+    pipeline takes them. Frames keep their recorded timestamps, and
+    multi-region recordings get their named regions back, so a replay
+    goes through exactly what the live run saw.
+    """
+
+    def __init__(self, path, realtime=True, ring=None):
+        self.path = path
+        self.realtime = realtime
+        self.ring = ring
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise RecordingError(f"Empty recording: {path}")
+        if self.map[:len(FILE_MAGIC)] != FILE_MAGIC:
+            self.close()
+            raise RecordingError(f"Not a frame recording: {path}")
+        self.chunks = self.read_index()
+        self.iterator = None
+
+    def read_index(self):
+        """[offset, frame count, first timestamp] per chunk, from the footer or by scanning"""
+        if len(self.map) >= len(FILE_MAGIC) + FOOTER.size:
+            index_offset, magic = FOOTER.unpack_from(self.map, len(self.map) - FOOTER.size)
+            if magic == INDEX_MAGIC:
+                return json.loads(bytes(self.map[index_offset:len(self.map) - FOOTER.size]))['chunks']
+
+        # No index: the recording was interrupted; keep every complete chunk
+        chunks = []
+        offset = len(FILE_MAGIC)
+        while offset + CHUNK_HEADER.size <= len(self.map):
+            magic, meta_length, data_length = CHUNK_HEADER.unpack_from(self.map, offset)
+            end = offset + CHUNK_HEADER.size + meta_length + data_length
+            if magic != CHUNK_MAGIC or end > len(self.map):
+                break
+            meta = json.loads(bytes(self.map[offset + CHUNK_HEADER.size:offset + CHUNK_HEADER.size + meta_length]))
+            chunks.append([offset, len(meta), meta[0]['timestamp']])
+            offset = end
+        return chunks
+
+    def __len__(self):
+        return sum(count for _, count, _ in self.chunks)
+
+    def read_chunk(self, offset):
+        """Decode one chunk into (metadata, image) pairs"""
+        magic, meta_length, data_length = CHUNK_HEADER.unpack_from(self.map, offset)
+        if magic != CHUNK_MAGIC:
+            raise RecordingError(f"Corrupt chunk at byte {offset} of {self.path}")
+        start = offset + CHUNK_HEADER.size
+        meta = json.loads(bytes(self.map[start:start + meta_length]))
+        # zlib reads straight from the mapping; only the decompressed chunk is in memory
+        with memoryview(self.map) as view:
+            raw = zlib.decompress(view[start + meta_length:start + meta_length + data_length])
+
+        frames = []
+        position = 0
+        previous = None
+        for item in meta:
+            shape = tuple(item['shape'])
+            size = int(np.prod(shape))
+            img = np.frombuffer(raw, dtype=np.uint8, count=size, offset=position).reshape(shape)
+            position += size
+            img = np.bitwise_xor(img, previous) if item['delta'] else img.copy()
+            previous = img
+            frames.append((item, img))
+        return frames
+
+    def frames(self):
+        first_recorded = first_replayed = None
+        for offset, _, _ in self.chunks:
+            for item, img in self.read_chunk(offset):
+                timestamp = item['timestamp']
+                if self.realtime:
+                    if first_recorded is None:
+                        first_recorded, first_replayed = timestamp, time.monotonic()
+                    delay = (timestamp - first_recorded) - (time.monotonic() - first_replayed)
+                    if delay > 0:
+                        time.sleep(delay)
+                yield self.to_frame(item, img)
+
+    def to_frame(self, item, img):
+        seq = None
+        if self.ring is not None and self.ring.fits(img):
+            seq = self.ring.write(img, item['timestamp'])
+            img = self.ring.read(seq)[0]
+        regions = None
+        if item.get('regions'):
+            regions = {
+                name: (slice_region(img, item['region'], region), region)
+                for name, region in item['regions'].items()
+            }
+        return Frame(img, item['timestamp'], self.path, regions, seq)
+
+    def grab(self):
+        """Next recorded frame; starts over at the end of the recording"""
+        if self.iterator is None:
+            self.iterator = self.frames()
+        try:
+            return next(self.iterator)
+        except StopIteration:
+            self.iterator = self.frames()
+            return next(self.iterator)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def recording_path(directory):
+    """New timestamped recording file in `directory`"""
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, time.strftime("capture-%Y%m%d-%H%M%S") + RECORDING_EXTENSION)
@@ -0,0 +1,153 @@
+from statistics import median
+
+from capture import ScreenCaptureSource, default_chat_region, PRIMARY_REGION
+
+# Where to look for chat when auto-detecting, as fractions of the monitor.
+# Generous around the default chatbox, but clear of the minimap and ability bar.
+SEARCH_AREA = {'left': 0.0, 'top': 0.55, 'width': 0.36, 'height': 0.45}
+LOCALIZE_SAMPLES = 5
+LOCALIZE_INTERVAL = 0.4
+REGION_MARGIN = 8
+MIN_REGION_SIZE = 50
+# Lines the chatbox shows before older messages scroll away
+CHAT_ROWS = 8
+
+
+def monitor_key(monitor_index, monitor):
+    """Profile key for a monitor at its current resolution, e.g. '1:2560x1440'"""
+    return f"{monitor_index}:{monitor['width']}x{monitor['height']}"
+
+
+def search_region(monitor):
+    """Absolute screen region searched for chat text"""
+    return {
+        "left": monitor.get("left", 0) + round(monitor["width"] * SEARCH_AREA['left']),
+        "top": monitor.get("top", 0) + round(monitor["height"] * SEARCH_AREA['top']),
+        "width": round(monitor["width"] * SEARCH_AREA['width']),
+        "height": round(monitor["height"] * SEARCH_AREA['height'])
+    }
+
+
+def text_extent(boxes):
+    """Union of (x_min, x_max, y_min, y_max) boxes, or None"""
+    if not boxes:
+        return None
+    return (
+        min(box[0] for box in boxes),
+        max(box[1] for box in boxes),
+        min(box[2] for box in boxes),
+        max(box[3] for box in boxes)
+    )
+
+
+def line_height(boxes):
+    """Typical height of a detected text line, or 0"""
+    return median(box[3] - box[2] for box in boxes) if boxes else 0
+
+
+def relative_extent(search, region):
+    """An absolute region as an extent inside `search`"""
+    left = region['left'] - search['left']
+    top = region['top'] - search['top']
+    return (left, left + region['width'], top, top + region['height'])
+
+
+def tighten_region(search, extent, min_width=MIN_REGION_SIZE, min_height=MIN_REGION_SIZE, margin=REGION_MARGIN):
+    """Absolute region around a text extent found inside `search`, clamped to it
+
+    The region is at least min_width x min_height, grown from the chat's
+    anchor (bottom-left) to the right and upwards, so only empty margins
+    are cut and longer messages or more lines than were visible still fit.
+    """
+    x_min, x_max, y_min, y_max = extent
+    left = max(0, int(x_min) - margin)
+    top = max(0, int(y_min) - margin)
+    right = min(search['width'], int(x_max) + margin)
+    bottom = min(search['height'], int(y_max) + margin)
+
+    min_width = min(min_width, search['width'])
+    min_height = min(min_height, search['height'])
+    if right - left < min_width:
+        right = min(search['width'], left + min_width)
+        left = right - min_width
+    if bottom - top < min_height:
+        top = max(0, bottom - min_height)
+        bottom = top + min_height
+
+    return {
+        "left": search['left'] + left,
+        "top": search['top'] + top,
+        "width": right - left,
+        "height": bottom - top
+    }
+
+
+def localize_chat_region(ocr, monitor, previous=None, samples=LOCALIZE_SAMPLES, interval=LOCALIZE_INTERVAL):
+    """Find the chat box from the visible chat text
+
+    Grabs a few frames of the search area, runs text detection only and takes
+    the union of the boxes, so lines that fade in or out between samples are
+    still covered. A few short lines say where the chat is, not how big it
+    gets, so the region is at least CHAT_ROWS measured lines tall and also
+    covers `previous`, an earlier detection, so the extent only grows
+    across detections. Returns None when no text was found.
+    """
+    search = search_region(monitor)
+    source = ScreenCaptureSource(search)
+    boxes = []
+    for frame in source.frames(interval=interval, count=samples):
+        boxes.extend(ocr.detect_boxes(frame.image))
+
+    extent = text_extent(boxes)
+    if extent is None:
+        return None
+    if previous:
+        extent = text_extent([extent, relative_extent(search, previous)])
+    min_height = max(MIN_REGION_SIZE, round(line_height(boxes) * CHAT_ROWS))
+    return tighten_region(search, extent, min_height=min_height)
+
+
+class RegionProfiles:
+    """Named capture regions remembered per monitor and resolution
+
+    Each profile maps region names (all_chat, party_chat, banner) to screen
+    regions. Older profiles that stored a single region are read as all_chat.
+    """
+
+    def __init__(self, profiles=None):
+        self.profiles = {}
+        for key, profile in (profiles or {}).items():
+            if 'left' in profile:
+                profile = {PRIMARY_REGION: profile}
+            self.profiles[key] = {name: dict(region) for name, region in profile.items()}
+
+    def get(self, monitor_index, monitor, name=PRIMARY_REGION):
+        return self.get_regions(monitor_index, monitor).get(name)
+
+    def get_regions(self, monitor_index, monitor):
+        return dict(self.profiles.get(monitor_key(monitor_index, monitor), {}))
+
+    def set(self, monitor_index, monitor, region, name=PRIMARY_REGION):
+        profile = self.profiles.setdefault(monitor_key(monitor_index, monitor), {})
+        profile[name] = dict(region)
+
+    def remove(self, monitor_index, monitor, name=None):
+        """Forget one named region, or the whole profile when name is None"""
+        key = monitor_key(monitor_index, monitor)
+        if name is None:
+            self.profiles.pop(key, None)
+            return
+        profile = self.profiles.get(key, {})
+        profile.pop(name, None)
+        if not profile:
+            self.profiles.pop(key, None)
+
+    def resolve(self, monitor_index, monitor, fallback=None):
+        """All regions for a monitor; all_chat falls back to `fallback` or the default chatbox"""
+        regions = self.get_regions(monitor_index, monitor)
+        if PRIMARY_REGION not in regions:
+            regions[PRIMARY_REGION] = fallback or default_chat_region(monitor)
+        return regions
+
+    def to_dict(self):
+        return {key: dict(profile) for key, profile in self.profiles.items()}
@@ -0,0 +1,190 @@
+import itertools
+import threading
+from collections import defaultdict, deque
+
+from normalize import cache_key, edit_distance
+
+STABLE_FRAMES = 2          # consecutive captures a reading must survive before it is committed
+MAX_MISSING_FRAMES = 5     # captures a line may be missing before its track is dropped
+MAX_READINGS = 8
+MIN_SIMILARITY = 0.6       # share of matching characters for a reading to join a track
+POSITION_PENALTY = 0.002   # per pixel of vertical distance, breaks ties between identical lines
+CHARACTER_VOTE_READINGS = 3
+
+
+def similarity(a, b):
+    """1.0 for identical keys, down to 0.0 for nothing in common"""
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    limit = int(longest * (1 - MIN_SIMILARITY))
+    return 1 - edit_distance(a, b, limit) / longest
+
+
+def line_center(line):
+    return (line.box[1] + line.box[3]) / 2
+
+
+def line_height(line):
+    return line.box[3] - line.box[1]
+
+
+class TrackedLine:
+    """One chat line followed across captures, with every reading it got"""
+
+    def __init__(self, track_id, region, line, frame_number):
+        self.id = track_id
+        self.region = region
+        self.line = line
+        self.readings = deque(maxlen=MAX_READINGS)
+        self.text = None
+        self.key = None
+        self.stable = 0
+        self.last_seen = frame_number
+        self.last_capture = None
+        self.committed = False
+        self.add(line, frame_number)
+
+    def add(self, line, frame_number):
+        self.line = line
+        self.last_seen = frame_number
+        self.readings.append((line.text, line.confidence))
+        text = self.consensus()
+        self.stable = self.stable + 1 if text == self.text else 1
+        self.text = text
+        self.key = cache_key(text)
+
+    def consensus(self):
+        """Best reading: confidence-weighted vote, per character when readings line up"""
+        weights = defaultdict(float)
+        for text, confidence in self.readings:
+            weights[text] += max(confidence, 0.01)
+        best = max(weights, key=weights.get)
+
+        aligned = [(text, confidence) for text, confidence in self.readings if len(text) == len(best)]
+        if len(aligned) < CHARACTER_VOTE_READINGS:
+            return best
+        characters = []
+        for position in range(len(best)):
+            votes = defaultdict(float)
+            for text, confidence in aligned:
+                votes[text[position]] += max(confidence, 0.01)
+            characters.append(max(votes, key=votes.get))
+        return "".join(characters)
+
+    def confidence(self):
+        matching = [confidence for text, confidence in self.readings if text == self.text]
+        readings = matching or [confidence for _, confidence in self.readings]
+        return sum(readings) / len(readings)
+
+    def consensus_line(self):
+        """Latest OCRLine carrying the consensus text"""
+        return self.line._replace(text=self.text, confidence=self.confidence())
+
+
+class LineTracker:
+    """Follows chat lines across consecutive captures by content and position
+
+    Each capture's lines are matched to existing tracks; a track commits
+    once its consensus reading has been stable for `stable_frames` captures,
+    and is reported exactly once. Tracks that leave the screen expire.
+    A committed track only takes readings where its line can be, so a new
+    message similar to an old one is tracked, and translated, on its own.
+    """
+
+    def __init__(self, stable_frames=STABLE_FRAMES, max_missing=MAX_MISSING_FRAMES):
+        self.stable_frames = stable_frames
+        self.max_missing = max_missing
+        self.tracks = []
+        self.ids = itertools.count(1)
+        self.frame_number = 0
+        self.captures = 0           # frame_number plus captures without chat lines
+        self.lock = threading.Lock()
+
+    def match(self, region, line, taken):
+        key = cache_key(line.text)
+        best, best_score = None, None
+        for track in self.tracks:
+            if track.region != region or track.id in taken:
+                continue
+            score = similarity(key, track.key)
+            if score < MIN_SIMILARITY or track.committed and not self.continues(track, line, key):
+                continue
+            score -= POSITION_PENALTY * abs(line_center(line) - line_center(track.line))
+            if best_score is None or score > best_score:
+                best, best_score = track, score
+        return best
+
+    def continues(self, track, line, key):
+        """True if a reading can be the committed `track`'s line
+
+        Chat lines only ever move up. A reading that differs from the
+        track's text (OCR jitter) must also be where the track was in the
+        previous capture: after the chat faded, a similar new message in the
+        bottom row is a new line.
+        """
+        tolerance = line_height(line) / 2
+        offset = line_center(line) - line_center(track.line)
+        if offset > tolerance:
+            return False
+        if key == track.key:
+            return True
+        return track.last_capture == self.captures - 1 and abs(offset) <= tolerance
+
+    def gap(self):
+        """A capture showed no chat lines; tracks are kept, but their continuity ends"""
+        with self.lock:
+            self.captures += 1
+
+    def update(self, items):
+        """Feed one capture's (index, region, OCRLine) items
+
+        Returns (committed, pending): (index, track) pairs whose line just
+        became stable, and tracks still waiting for a stable reading.
+        """
+        with self.lock:
+            self.frame_number += 1
+            self.captures += 1
+            taken = set()
+            seen = []
+            for index, region, line in items:
+                track = self.match(region, line, taken)
+                if track is None:
+                    track = TrackedLine(next(self.ids), region, line, self.frame_number)
+                    self.tracks.append(track)
+                else:
+                    track.add(line, self.frame_number)
+                track.last_capture = self.captures
+                taken.add(track.id)
+                seen.append((index, track))
+
+            self.tracks = [
+                track for track in self.tracks
+                if self.frame_number - track.last_seen <= self.max_missing
+            ]
+
+            committed = []
+            pending = []
+            for index, track in seen:
+                if track.committed:
+                    continue
+                if track.stable >= self.stable_frames:
+                    track.committed = True
+                    committed.append((index, track))
+                else:
+                    pending.append(track)
+            return committed, pending
+
+    def track_ids(self):
+        """IDs of the lines still followed, i.e. not scrolled away yet"""
+        with self.lock:
+            return {track.id for track in self.tracks}
+
+    def has_pending(self):
+        """True while some visible line still waits for a stable reading"""
+        with self.lock:
+            return any(not track.committed for track in self.tracks)
+
+    def clear(self):
+        with self.lock:
+            self.tracks = []
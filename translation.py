@@ -0,0 +1,355 @@
+import json
+import threading
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from googletrans import Translator
+
+from defaults import DEFAULT_TARGET_LANGUAGE, DEFAULT_CACHE_SIZE
+from normalize import cache_key
+from rate_limiter import RateLimitedTranslator, SharedTicket, StaleRequest
+
+REMOTE_TIMEOUT = 10
+TRIM_SHARE = 0.5      # share of cached translations dropped when memory runs high
+
+
+def parse_target_languages(value):
+    """Comma separated target language codes, e.g. 'en,de,pt'"""
+    return list(dict.fromkeys(code.strip().lower() for code in value.split(',') if code.strip()))
+
+
+class GoogleTranslator:
+    """Translation backend using the unofficial Google endpoint"""
+
+    name = 'google'
+
+    def __init__(self):
+        self.translator = Translator()
+
+    def translate(self, text, dest=DEFAULT_TARGET_LANGUAGE, ticket=None):
+        """Translate a single line and return the translated text (tickets only matter to a limiter)"""
+        return self.translator.translate(text, dest=dest).text
+
+    def translate_batch(self, texts, dest=DEFAULT_TARGET_LANGUAGE, tickets=None):
+        """Translate several lines; failures are returned as exceptions in place"""
+        translated = []
+        for text in texts:
+            try:
+                translated.append(self.translate(text, dest=dest))
+            except Exception as e:
+                translated.append(e)
+        return translated
+
+
+class TranslationCache:
+    """Thread-safe LRU cache of (text, dest) -> translation"""
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def peek(self, key):
+        """get() without touching recency or hit statistics"""
+        with self.lock:
+            return self.entries.get(key)
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def resize(self, max_size):
+        """Change capacity, evicting least recently used entries if it shrinks"""
+        with self.lock:
+            self.max_size = max_size
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def trim(self, share=TRIM_SHARE):
+        """Drop the least recently used `share` of the entries, keeping the capacity"""
+        with self.lock:
+            for _ in range(int(len(self.entries) * share)):
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class CachedTranslator:
+    """Cache in front of a backend that merges duplicate in-flight requests
+
+    Lines are keyed by their exact cache_key. Readings that are merely
+    similar never share a translation: "rush A" and "rush B" are one
+    edit apart.
+
+    Callers waiting on the same in-flight request share one SharedTicket,
+    so the request is only dropped as stale once every one of their lines
+    is; a caller whose line is still on screen then simply asks again.
+    """
+
+    def __init__(self, backend, cache=None):
+        self.backend = backend
+        self.cache = cache or TranslationCache()
+        self.name = backend.name
+        self.inflight = {}       # key -> (future, SharedTicket)
+        self.lock = threading.Lock()
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    def resolve_key(self, text, dest):
+        return (cache_key(text) or text, dest)
+
+    def translate(self, text, dest=DEFAULT_TARGET_LANGUAGE, ticket=None):
+        """`ticket` (rate_limiter.Ticket) places an upstream call in the limiter's queue"""
+        key = self.resolve_key(text, dest)
+        while True:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+            with self.lock:
+                inflight = self.inflight.get(key)
+                leader = inflight is None
+                if leader:
+                    inflight = (Future(), SharedTicket([ticket]))
+                    self.inflight[key] = inflight
+                    self.upstream_calls += 1
+                else:
+                    inflight[1].add(ticket)
+                    self.coalesced += 1
+            future, shared = inflight
+            if leader:
+                break
+            try:
+                return future.result()
+            except StaleRequest:
+                # Dropped while every waiter was stale; this line has come back since
+                if ticket is not None and ticket.is_stale():
+                    raise
+
+        try:
+            translated = self.backend.translate(text, dest=dest, ticket=shared)
+            self.cache.put(key, translated)
+            future.set_result(translated)
+            return translated
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+
+    def draft(self, text, dest=DEFAULT_TARGET_LANGUAGE):
+        """(translation, final) from the cache without calling the backend, or None"""
+        cached = self.cache.peek(self.resolve_key(text, dest))
+        return None if cached is None else (cached, True)
+
+    def translate_batch(self, texts, dest=DEFAULT_TARGET_LANGUAGE, tickets=None):
+        """Translate several lines; the ones neither cached nor in flight go to the backend as one batch"""
+        tickets = dict(zip(texts, tickets)) if tickets else {}
+        results = {}
+        leading = {}     # key -> (text, future, shared ticket) this call sends upstream
+        waiting = {}     # text -> future to wait for
+        for text in dict.fromkeys(texts):
+            key = self.resolve_key(text, dest)
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[text] = cached
+                continue
+            with self.lock:
+                inflight = self.inflight.get(key)
+                if inflight is None:
+                    inflight = (Future(), SharedTicket([tickets.get(text)]))
+                    self.inflight[key] = inflight
+                    leading[key] = (text, *inflight)
+                    self.upstream_calls += 1
+                else:
+                    inflight[1].add(tickets.get(text))
+                    self.coalesced += 1
+            waiting[text] = inflight[0]
+
+        if leading:
+            try:
+                try:
+                    translated = self.backend.translate_batch(
+                        [text for text, _, _ in leading.values()], dest=dest,
+                        tickets=[shared for _, _, shared in leading.values()]
+                    )
+                except Exception as e:
+                    translated = [e] * len(leading)
+                for (key, (text, future, _)), result in zip(leading.items(), translated):
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        self.cache.put(key, result)
+                        future.set_result(result)
+            finally:
+                with self.lock:
+                    for key in leading:
+                        self.inflight.pop(key, None)
+
+        for text, future in waiting.items():
+            try:
+                results[text] = future.result()
+            except StaleRequest as e:
+                ticket = tickets.get(text)
+                results[text] = e if ticket is not None and ticket.is_stale() else self.retry(text, dest, ticket)
+            except Exception as e:
+                results[text] = e
+        return [results[text] for text in texts]
+
+    def retry(self, text, dest, ticket):
+        """translate() for a line whose shared request was dropped as stale, error in place"""
+        try:
+            return self.translate(text, dest=dest, ticket=ticket)
+        except Exception as e:
+            return e
+
+    def set_cache_size(self, max_size):
+        self.cache.resize(max_size)
+
+    def trim_memory(self):
+        self.cache.trim()
+
+    def stats(self):
+        return {
+            'cache_size': len(self.cache),
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'upstream_calls': self.upstream_calls,
+            'coalesced': self.coalesced
+        }
+
+
+class RemoteTranslator:
+    """Client for a translation_server daemon"""
+
+    name = 'remote'
+
+    def __init__(self, url, timeout=REMOTE_TIMEOUT):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def translate(self, text, dest=DEFAULT_TARGET_LANGUAGE, ticket=None):
+        translated = self.translate_batch([text], dest=dest)[0]
+        if isinstance(translated, Exception):
+            raise translated
+        return translated
+
+    def translate_batch(self, texts, dest=DEFAULT_TARGET_LANGUAGE, tickets=None):
+        payload = json.dumps({'texts': list(texts), 'dest': dest}).encode('utf-8')
+        request = urllib.request.Request(
+            f"{self.url}/translate",
+            data=payload,
+            headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = json.loads(response.read().decode('utf-8'))
+
+        return [
+            item['text'] if item.get('error') is None else RuntimeError(item['error'])
+            for item in body['translations']
+        ]
+
+
+class GlossaryTranslator:
+    """Answer from the glossary when possible, otherwise forward to the backend"""
+
+    def __init__(self, backend, glossary):
+        self.backend = backend
+        self.glossary = glossary
+        self.name = backend.name
+        self.glossary_hits = 0
+        self.partial_hits = 0
+
+    def translate(self, text, dest=DEFAULT_TARGET_LANGUAGE, ticket=None):
+        substituted, complete = self.glossary.substitute(text, dest)
+        if complete:
+            self.glossary_hits += 1
+            return substituted
+        if substituted != text:
+            self.partial_hits += 1
+        return self.backend.translate(substituted, dest=dest, ticket=ticket)
+
+    def draft(self, text, dest=DEFAULT_TARGET_LANGUAGE):
+        """Local answer for a line: (translation, final), or None if there is nothing to show
+
+        Fully covered and cached lines are final. A partially covered line
+        is returned with its glossary phrases substituted, as a draft for
+        the backend's translation to replace.
+        """
+        substituted, complete = self.glossary.substitute(text, dest)
+        if complete:
+            self.glossary_hits += 1
+            return substituted, True
+        if hasattr(self.backend, 'draft'):
+            cached = self.backend.draft(substituted, dest=dest)
+            if cached is not None:
+                return cached
+        if substituted != text:
+            return substituted, False
+        return None
+
+    def translate_batch(self, texts, dest=DEFAULT_TARGET_LANGUAGE, tickets=None):
+        """Answer covered lines from the glossary and send the rest to the backend as one batch"""
+        translated = [None] * len(texts)
+        pending = {}     # substituted text -> positions
+        for i, text in enumerate(texts):
+            substituted, complete = self.glossary.substitute(text, dest)
+            if complete:
+                self.glossary_hits += 1
+                translated[i] = substituted
+                continue
+            if substituted != text:
+                self.partial_hits += 1
+            pending.setdefault(substituted, []).append(i)
+        if pending:
+            shared = [SharedTicket(tickets[i] for i in positions) if tickets else None for positions in pending.values()]
+            results = self.backend.translate_batch(list(pending), dest=dest, tickets=shared)
+            for substituted, result in zip(pending, results):
+                for i in pending[substituted]:
+                    translated[i] = result
+        return translated
+
+    def set_cache_size(self, max_size):
+        if hasattr(self.backend, 'set_cache_size'):
+            self.backend.set_cache_size(max_size)
+
+    def trim_memory(self):
+        if hasattr(self.backend, 'trim_memory'):
+            self.backend.trim_memory()
+
+    def stats(self):
+        stats = self.backend.stats() if hasattr(self.backend, 'stats') else {}
+        stats.update({'glossary_hits': self.glossary_hits, 'glossary_partial_hits': self.partial_hits})
+        return stats
+
+
+def create_translator(server_url=None, glossary=None, cache_size=DEFAULT_CACHE_SIZE, limiter=None):
+    """Return the translator the app should use, remote if a daemon is configured
+
+    With a RateLimiter, only calls that miss the cache wait for it.
+    """
+    cache = TranslationCache(cache_size)
+    backend = RemoteTranslator(server_url) if server_url else GoogleTranslator()
+    if limiter is not None:
+        backend = RateLimitedTranslator(backend, limiter)
+    translator = CachedTranslator(backend, cache)
+    if glossary is not None:
+        translator = GlossaryTranslator(translator, glossary)
+    return translator
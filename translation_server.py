@@ -0,0 +1,104 @@
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rate_limiter import RateLimiter, RateLimitedTranslator
+from translation import CachedTranslator, GoogleTranslator, TranslationCache, DEFAULT_TARGET_LANGUAGE
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_BATCH = 200
+UPSTREAM_WORKERS = 4
+
+
+class TranslationService:
+    """Shared cache + request coalescing in front of one upstream backend"""
+
+    def __init__(self, backend=None, cache_size=None, upstream_workers=UPSTREAM_WORKERS, rate=None):
+        cache = TranslationCache(cache_size) if cache_size else TranslationCache()
+        backend = backend or GoogleTranslator()
+        # One limiter for all clients, which share the upstream's quota
+        self.limiter = RateLimiter(rate) if rate else None
+        if self.limiter:
+            backend = RateLimitedTranslator(backend, self.limiter)
+        self.translator = CachedTranslator(backend, cache)
+        self.pool = ThreadPoolExecutor(max_workers=upstream_workers, thread_name_prefix='upstream')
+
+    def translate_batch(self, texts, dest):
+        # Distinct texts go upstream concurrently; duplicates across clients
+        # wait on the same in-flight call inside CachedTranslator
+        futures = {text: self.pool.submit(self.translator.translate, text, dest) for text in dict.fromkeys(texts)}
+        translations = []
+        for text in texts:
+            try:
+                translations.append({'text': futures[text].result(), 'error': None})
+            except Exception as e:
+                translations.append({'text': None, 'error': str(e)})
+        return translations
+
+    def stats(self):
+        stats = self.translator.stats()
+        if self.limiter:
+            stats.update({f'rate_{key}': value for key, value in self.limiter.stats().items()})
+        return stats
+
+
+class TranslationRequestHandler(BaseHTTPRequestHandler):
+    server_version = "ValorantTranslator/1.0"
+
+    def send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_json(200, {'status': 'ok', **self.server.service.stats()})
+        else:
+            self.send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/translate':
+            self.send_json(404, {'error': 'not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            if not isinstance(request, dict):
+                raise ValueError("request body must be a JSON object")
+            texts = request['texts']
+            dest = request.get('dest', DEFAULT_TARGET_LANGUAGE)
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise ValueError("'texts' must be a list of strings")
+            if len(texts) > MAX_BATCH:
+                raise ValueError(f"at most {MAX_BATCH} texts per request")
+        except (ValueError, KeyError) as e:
+            self.send_json(400, {'error': str(e)})
+            return
+
+        self.send_json(200, {'translations': self.server.service.translate_batch(texts, dest)})
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"[{self.log_date_time_string()}] {self.address_string()} {format % args}\n")
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, service=None):
+    server = ThreadingHTTPServer((host, port), TranslationRequestHandler)
+    server.daemon_threads = True
+    server.service = service or TranslationService()
+    return server
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, cache_size=None, rate=None):
+    """Run the translation daemon until interrupted"""
+    server = create_server(host, port, TranslationService(cache_size=cache_size, rate=rate))
+    print(f"Translation service listening on http://{host}:{port}", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()